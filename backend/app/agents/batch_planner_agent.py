@@ -0,0 +1,173 @@
+import copy
+import asyncio
+from app.agents.flight_agent import search_flight_options_async, rank_flight_options_async, get_fare_calendar_async
+from app.agents.hotel_agent import search_hotel_options_async, rank_hotel_options_async
+from app.agents.itinerary_agent import generate_daywise_itinerary_async
+from app.agents.trip_planner_agent import STAGE_TIMEOUTS, run_stage, no_airport_error
+from app.models.records import to_dicts
+from app.services.quota_scheduler import serpapi_priority, MAX_QUEUE_WAIT
+from app.utils.iata_lookup import get_iata_code
+
+DEFAULT_BATCH_CONCURRENCY = 4
+
+# Searches may also wait this long for a SerpAPI token at batch priority
+SEARCH_QUEUE_WAIT = MAX_QUEUE_WAIT["batch"]
+
+
+class _SharedCalls:
+    """
+    Runs each distinct sub-query of a batch once, with at most
+    `max_concurrency` upstream calls in flight across the whole batch.
+    Deadlines apply per call and start once the call holds a concurrency
+    slot, so plans queued behind a large batch do not time out unstarted.
+    """
+
+    def __init__(self, max_concurrency):
+        self._sem = asyncio.Semaphore(max_concurrency)
+        self._tasks = {}
+        self.requested = 0
+
+    def get(self, key, factory, timeout=None):
+        """
+        Awaitable result of the shared call for `key`. Shielded: a plan that
+        gives up does not cancel the call for the other plans sharing it.
+        """
+        self.requested += 1
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self.bounded(factory, timeout))
+            self._tasks[key] = task
+        return asyncio.shield(task)
+
+    async def bounded(self, factory, timeout=None):
+        async with self._sem:
+            try:
+                return await asyncio.wait_for(factory(), timeout)
+            except asyncio.TimeoutError:
+                raise asyncio.TimeoutError(f"timed out after {timeout}s") from None
+
+    def unique(self, kind):
+        return sum(1 for key in self._tasks if key[0] == kind)
+
+    def cancel(self):
+        for task in self._tasks.values():
+            task.cancel()
+
+
+async def stream_plan_batch(plans, max_concurrency=DEFAULT_BATCH_CONCURRENCY):
+    """
+    Generates many plans at once, yielding each plan as soon as it finishes.
+    - Flight searches are shared by plans with the same route and date
+    - Hotel searches are shared by plans with the same destination and dates
+    - Itineraries are shared by plans with identical inputs
+    - Fare calendars (flexDays > 0) are shared by plans with the same route, date and flexDays
+    Gemini ranking still runs per plan (it depends on each plan's preferences)
+    on a private copy of the shared results. SerpAPI searches run at batch
+    priority, behind interactive requests.
+    Yields ("plan", {index, plan}) per finished plan, then ("done", batch stats).
+    """
+    shared = _SharedCalls(max_concurrency)
+
+    async def build(plan):
+        preferences = plan.dict()
+        from_iata = get_iata_code(preferences["from_"])
+        to_iata = get_iata_code(preferences["to"])
+        city = preferences["to"]
+        depart, ret = preferences["departureDate"], preferences["returnDate"]
+        affordability = preferences.get("hotelAffordability", "medium")
+        flex_days = preferences.get("flexDays")
+
+        no_airport = no_airport_error(from_iata, to_iata, preferences)
+
+        async def flights_stage():
+            if no_airport:
+                raise ValueError(no_airport)
+            found = await shared.get(
+                ("flights", from_iata, to_iata, depart),
+                lambda: search_flight_options_async(from_iata, to_iata, depart),
+                STAGE_TIMEOUTS["flights"] + SEARCH_QUEUE_WAIT,
+            )
+            flights = [copy.copy(f) for f in found]
+            ranked = await shared.bounded(
+                lambda: rank_flight_options_async(flights, from_iata, to_iata, depart, preferences),
+                STAGE_TIMEOUTS["flights"],
+            )
+            return to_dicts(ranked)
+
+        async def hotels_stage():
+            found = await shared.get(
+                ("hotels", city, depart, ret, affordability),
+                lambda: search_hotel_options_async(city, depart, ret, preferences),
+                STAGE_TIMEOUTS["hotels"] + SEARCH_QUEUE_WAIT,
+            )
+            hotels = [copy.copy(h) for h in found]
+            ranked = await shared.bounded(
+                lambda: rank_hotel_options_async(hotels, city, depart, ret, preferences),
+                STAGE_TIMEOUTS["hotels"],
+            )
+            return to_dicts(ranked)
+
+        async def itinerary_stage():
+            key = (
+                "itinerary", city, depart, ret,
+                tuple(preferences.get("interests") or ()), preferences.get("travelers"), preferences.get("diet"),
+            )
+            return await shared.get(
+                key, lambda: generate_daywise_itinerary_async(city, depart, ret, preferences),
+                STAGE_TIMEOUTS["itinerary"],
+            )
+
+        async def fare_calendar_stage():
+            if no_airport:
+                raise ValueError(no_airport)
+            return await shared.get(
+                ("fareCalendar", from_iata, to_iata, depart, flex_days),
+                lambda: get_fare_calendar_async(from_iata, to_iata, depart, flex_days),
+                STAGE_TIMEOUTS["fareCalendar"] + SEARCH_QUEUE_WAIT,
+            )
+
+        async def no_fare_calendar():
+            return None, None
+
+        # No stage-wide deadline here: each shared call has its own (see _SharedCalls)
+        (flights, flight_err), (hotels, hotel_err), (itinerary, itinerary_err), (calendar, calendar_err) = await asyncio.gather(
+            run_stage("flights", flights_stage, None),
+            run_stage("hotels", hotels_stage, None),
+            run_stage("itinerary", itinerary_stage, None),
+            run_stage("fareCalendar", fare_calendar_stage, None) if flex_days else no_fare_calendar(),
+        )
+
+        response = {"flights": flights, "hotels": hotels, "itinerary": itinerary}
+        if flex_days:
+            response["fareCalendar"] = calendar
+        errors = {
+            stage: err
+            for stage, err in (
+                ("flights", flight_err), ("hotels", hotel_err), ("itinerary", itinerary_err), ("fareCalendar", calendar_err),
+            )
+            if err
+        }
+        if errors:
+            response["errors"] = errors
+        return response
+
+    async def indexed(i, plan):
+        return "plan", {"index": i, "plan": await build(plan)}
+
+    with serpapi_priority("batch"):
+        tasks = [asyncio.create_task(indexed(i, plan)) for i, plan in enumerate(plans)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+        yield "done", {
+            "plans": len(plans),
+            "flightSearches": shared.unique("flights"),
+            "hotelSearches": shared.unique("hotels"),
+            "itineraries": shared.unique("itinerary"),
+            "fareCalendars": shared.unique("fareCalendar"),
+            "subQueriesRequested": shared.requested,
+        }
+    finally:
+        for task in tasks:
+            task.cancel()
+        shared.cancel()
@@ -1,30 +1,43 @@
-from app.services.serpapi_service import search_flights
-from app.services.gemini_service import generate_gemini_response
-import json
-import re
+import asyncio
+from datetime import date, timedelta
+from app.services.serpapi_service import search_flights_async
+from app.services.gemini_service import generate_gemini_json_async
+from app.services.flight_ranking_service import rank_flights, explain_pick
+from app.services.metrics import instrument, FALLBACKS
+from app.models.gemini_models import FlightPick
+from app.utils.prompt_encoding import encode_candidates, record_prompt_tokens
+from app.utils.log import get_logger
 
-def get_flight_recommendations(from_city, to_city, departure_date, preferences):
-    flights = search_flights(from_city, to_city, departure_date)
+log = get_logger(__name__)
 
-    if not flights:
-        return []
+FLIGHT_PROMPT_COLUMNS = ["id", "airline", "code", "departure", "arrival", "duration_min", "flight_type", "price", "travel_class"]
+
+# 📅 Fare calendar: at most ± this many days around the requested date (one search per day)
+FARE_CALENDAR_MAX_DAYS = 3
+FARE_CALENDAR_COLUMNS = ["date", "cheapestPrice", "cheapestId", "fastestMinutes", "fastestPrice", "fastestId", "options"]
+
+
+def _by_price(flight):
+    return flight.price
 
-    
-    def clean_price(price_str):
-        return int(str(price_str).replace("₹", "").replace(",", "").strip())
 
-    flights.sort(key=lambda x: clean_price(x["price"]))
-    flights[0]["cheapest"] = True
+def _mark_cheapest(flights):
+    flights.sort(key=_by_price)
+    flights[0].cheapest = True
 
-    try:
-        prompt = f"""
+
+def _build_flight_prompt(from_city, to_city, departure_date, preferences, flights):
+    # Cheapest top-K only, as a compact table (see PROMPT_LIMITS)
+    table = encode_candidates("flight_agent", flights, FLIGHT_PROMPT_COLUMNS, key=_by_price)
+
+    prompt = f"""
 You are an AI travel assistant. A user is flying from {from_city} to {to_city} on {departure_date}.
 Their preferences: interests = {preferences.get("interests")}, class = {preferences.get("travelClass")}, diet = {preferences.get("diet")}.
 
-Here are available flight options (in JSON format):
-{json.dumps(flights, indent=2)}
+These flight options are nearly equal on price, duration and stops (one per line, columns separated by "|"):
+{table}
 
-Pick the best flight and explain why.
+Pick the best flight for this user and explain why.
 Respond ONLY in this strict JSON format:
 {{
   "recommended_id": "<flight_id>",
@@ -36,29 +49,138 @@ Respond ONLY in this strict JSON format:
   }}
 }}
         """.strip()
+    record_prompt_tokens("flight_agent", prompt)
+    return prompt
+
+
+def _check_pick(parsed, allowed_ids):
+    """
+    Returns (recommended_id, reason) from a validated Gemini pick, or None if unusable.
+    """
+    if parsed is None:
+        return None
+    if parsed["recommended_id"] not in allowed_ids:
+        log.warning("Gemini picked a flight outside the shortlist", recommended_id=parsed["recommended_id"])
+        return None
+    return parsed["recommended_id"], parsed["reason"]
 
-        gemini_reply = generate_gemini_response(prompt)
-        print("\n🧠 Gemini Raw Response:\n", gemini_reply)
-
-        
-        match = re.search(r'\{.*\}', gemini_reply, re.DOTALL)
-        if match:
-            parsed = json.loads(match.group())
-
-            for flight in flights:
-                if flight["id"] == parsed.get("recommended_id"):
-                    flight["aiRecommended"] = True
-                    flight["aiReasoning"] = parsed.get("reason", {})
-                    flight["popular"] = True
-                else:
-                    flight["aiReasoning"] = flight.get("aiReasoning", {})
-        else:
-            print("⚠️ No valid JSON found in Gemini reply.")
-
-    except json.JSONDecodeError as je:
-        print("⚠️ JSON Decode Error from Gemini:", je)
-        print("⚠️ Raw Gemini reply:", gemini_reply)
-    except Exception as e:
-        print("⚠️ Gemini AI Reasoning Error:", e)
 
+def _apply_pick(flights, flight_id, reason):
+    for flight in flights:
+        if flight.id == flight_id:
+            flight.ai_recommended = True
+            flight.ai_reasoning = reason
+            flight.popular = True
+        elif flight.ai_reasoning is None:
+            flight.ai_reasoning = {}
+
+
+def _local_pick(flights, preferences):
+    """
+    Scores flights locally. Returns (ranking, flight_id, reason, shortlist);
+    the shortlist is non-empty only when Gemini should break a near-tie.
+    """
+    ranking = rank_flights(flights, preferences)
+    best = flights[ranking.best]
+    shortlist = [flights[i] for i in ranking.tied] if ranking.needs_tiebreak else []
+    return ranking, best.id, explain_pick(flights, ranking, ranking.best), shortlist
+
+
+@instrument("flight_agent", "search")
+async def search_flight_options_async(from_city, to_city, departure_date):
+    """
+    First phase of the flight stage: SerpAPI results sorted by price, no Gemini.
+    """
+    flights = await search_flights_async(from_city, to_city, departure_date)
+    if flights:
+        _mark_cheapest(flights)
     return flights
+
+
+@instrument("flight_agent", "rank")
+async def rank_flight_options_async(flights, from_city, to_city, departure_date, preferences):
+    """
+    Second phase of the flight stage: picks the best flight locally and marks it
+    in place. Gemini is only asked when several options are near-equal.
+    """
+    if not flights:
+        return flights
+
+    ranking, pick_id, reason, shortlist = _local_pick(flights, preferences)
+
+    if shortlist:
+        try:
+            prompt = _build_flight_prompt(from_city, to_city, departure_date, preferences, shortlist)
+            parsed = await generate_gemini_json_async(prompt, FlightPick, parser="flight_pick")
+            picked = _check_pick(parsed, {f.id for f in shortlist})
+            if picked:
+                pick_id, reason = picked
+            else:
+                FALLBACKS.inc(kind="flight_local_pick")
+        except Exception as e:
+            log.warning("Gemini flight tie-break failed", error=e)
+            FALLBACKS.inc(kind="flight_local_pick")
+
+    _apply_pick(flights, pick_id, reason)
+    return flights
+
+
+def flight_ai_patches(flights):
+    """
+    The ranking fields added to flights, as {id, ...} patches.
+    """
+    return [
+        {"id": flight.id, "aiRecommended": True, "aiReasoning": flight.ai_reasoning or {}, "popular": flight.popular}
+        for flight in flights
+        if flight.ai_recommended
+    ]
+
+
+@instrument("flight_agent", "total")
+async def get_flight_recommendations_async(from_city, to_city, departure_date, preferences):
+    """
+    Flight options for a route and date, cheapest first, with the best pick
+    marked (local scoring; Gemini only breaks near-ties).
+    """
+    flights = await search_flight_options_async(from_city, to_city, departure_date)
+    return await rank_flight_options_async(flights, from_city, to_city, departure_date, preferences)
+
+
+def _calendar_dates(departure_date, flex_days):
+    """
+    departure_date ± flex_days, skipping days already in the past.
+    """
+    center = date.fromisoformat(departure_date)
+    today = date.today()
+    days = (center + timedelta(days=offset) for offset in range(-flex_days, flex_days + 1))
+    return [day.isoformat() for day in days if day >= today or day == center]
+
+
+def _calendar_row(day, flights):
+    if not flights:
+        return [day, None, None, None, None, None, 0]
+    cheapest = min(flights, key=_by_price)
+    fastest = min(flights, key=lambda f: (f.duration_min, f.price))
+    return [day, cheapest.price, cheapest.id, fastest.duration_min, fastest.price, fastest.id, len(flights)]
+
+
+@instrument("flight_agent", "calendar")
+async def get_fare_calendar_async(from_city, to_city, departure_date, flex_days):
+    """
+    Searches departure_date ± flex_days concurrently (cached days cost nothing,
+    and the requested day shares its search with the flight stage) and returns
+    the cheapest and fastest option per day as a compact matrix:
+    {columns, rows, selectedDate, cheapestDate}. Prices are whole rupees.
+    """
+    flex_days = min(max(int(flex_days or 0), 0), FARE_CALENDAR_MAX_DAYS)
+    days = _calendar_dates(departure_date, flex_days)
+    results = await asyncio.gather(*(search_flights_async(from_city, to_city, day) for day in days))
+
+    rows = [_calendar_row(day, flights) for day, flights in zip(days, results)]
+    priced = [row for row in rows if row[1] is not None]
+    return {
+        "columns": FARE_CALENDAR_COLUMNS,
+        "rows": rows,
+        "selectedDate": departure_date,
+        "cheapestDate": min(priced, key=lambda row: row[1])[0] if priced else None,
+    }
@@ -1,33 +1,37 @@
-from app.services.serpapi_service import search_hotels
-from app.services.gemini_service import generate_gemini_response
-import json
-import re
-import random
+from app.services.serpapi_service import search_hotels_async
+from app.services.gemini_service import generate_gemini_json_async
+from app.services.metrics import instrument, FALLBACKS
+from app.models.gemini_models import HotelPick
+from app.models.records import Hotel
+from app.utils.prompt_encoding import encode_candidates, record_prompt_tokens
 from datetime import datetime
+from app.utils.log import get_logger
 
+log = get_logger(__name__)
+
+HOTEL_PROMPT_COLUMNS = ["id", "name", "price", "price_fallback", "rating", "reviews", "location", "amenities"]
 
-def get_hotel_recommendations(city, checkin_date, checkout_date, preferences):
-    """
-    Uses SerpAPI to fetch hotel listings and Gemini to select the best one
-    based on user preferences (interests, budget, travelers, diet).
-    """
-    hotels = search_hotels(city, checkin_date, checkout_date)
 
+def _prepare_hotels(hotels, city, checkin_date, checkout_date, preferences):
     if not hotels:
-        print("⚠️ No hotels returned from SerpAPI. Using fallback hotels.")
+        log.warning("No hotels returned from SerpAPI, using fallback hotels", city=city)
+        FALLBACKS.inc(kind="fallback_hotels")
         affordability = preferences.get("hotelAffordability", "medium")
         hotels = generate_fallback_hotels(city, checkin_date, checkout_date, affordability)
     else:
         # Fallback pricing for hotels with no price
         affordability = preferences.get("hotelAffordability", "medium")
         for hotel in hotels:
-            if "price" not in hotel or hotel["price"] is None:
-                hotel["price"] = estimate_price_from_name(hotel.get("name", ""), hotel.get("description", ""), affordability)
-                hotel["priceFallback"] = True
-            else:
-                hotel["priceFallback"] = False
+            if hotel.price is None:
+                hotel.price = estimate_price_from_name(hotel.name, hotel.description, affordability)
+                hotel.price_fallback = True
+    return hotels
+
+
+def _build_hotel_prompt(city, checkin_date, checkout_date, preferences, hotels):
+    # First top-K listings (SerpAPI relevance order), as a compact table
+    table = encode_candidates("hotel_agent", hotels, HOTEL_PROMPT_COLUMNS)
 
-    # 🧠 Prepare prompt for Gemini
     prompt = f"""
 You are an AI travel expert helping users choose the best hotel in {city} from {checkin_date} to {checkout_date}.
 User preferences:
@@ -36,8 +40,11 @@ User preferences:
 - Travelers: {preferences.get("travelers")}
 - Diet: {preferences.get("diet")}
 
-Hotels available (in JSON):
-{json.dumps(hotels[:5], indent=2)}
+Hotels available (one per line, columns separated by "|"):
+{table}
+
+price_fallback=True means the price is our estimate, not a listed rate.
+"-" means the listing did not report that value; do not guess it.
 
 Pick one hotel and explain why.
 Reply ONLY in JSON like this:
@@ -51,33 +58,74 @@ Reply ONLY in JSON like this:
   }}
 }}
 """
+    record_prompt_tokens("hotel_agent", prompt)
+    return prompt
 
-    try:
-        gemini_reply = generate_gemini_response(prompt)
-        print("\n🏨 Gemini Hotel Raw Response:\n", gemini_reply)
-
-        match = re.search(r'\{.*\}', gemini_reply, re.DOTALL)
-        if match:
-            parsed = json.loads(match.group())
-
-            for hotel in hotels:
-                if hotel["id"] == parsed.get("recommended_id"):
-                    hotel["aiRecommended"] = True
-                    hotel["ai_reasoning"] = parsed.get("reason", {})
-                else:
-                    hotel["ai_reasoning"] = hotel.get("ai_reasoning", {})
-        else:
-            print("⚠️ No valid JSON found in Gemini hotel reply.")
 
+def _apply_gemini_pick(hotels, parsed):
+    if parsed is None:
+        FALLBACKS.inc(kind="hotel_no_pick")
+        return
+
+    for hotel in hotels:
+        if hotel.id == parsed["recommended_id"]:
+            hotel.ai_recommended = True
+            hotel.ai_reasoning = parsed["reason"]
+        elif hotel.ai_reasoning is None:
+            hotel.ai_reasoning = {}
+
+
+@instrument("hotel_agent", "search")
+async def search_hotel_options_async(city, checkin_date, checkout_date, preferences):
+    """
+    First phase of the hotel stage: SerpAPI listings with fallback pricing, no Gemini.
+    """
+    hotels = await search_hotels_async(city, checkin_date, checkout_date)
+    return _prepare_hotels(hotels, city, checkin_date, checkout_date, preferences)
+
+
+@instrument("hotel_agent", "rank")
+async def rank_hotel_options_async(hotels, city, checkin_date, checkout_date, preferences):
+    """
+    Second phase of the hotel stage: asks Gemini to pick one hotel and marks it in place.
+    """
+    prompt = _build_hotel_prompt(city, checkin_date, checkout_date, preferences, hotels)
+
+    try:
+        parsed = await generate_gemini_json_async(prompt, HotelPick, parser="hotel_pick")
+        _apply_gemini_pick(hotels, parsed)
     except Exception as e:
-        print("⚠️ Error in hotel recommendation:", e)
+        log.warning("Error in hotel recommendation", error=e)
+        FALLBACKS.inc(kind="hotel_no_pick")
 
     return hotels
 
 
+def hotel_ai_patches(hotels):
+    """
+    The Gemini-added fields of ranked hotels, as {id, ...} patches.
+    """
+    return [
+        {"id": hotel.id, "aiRecommended": True, "ai_reasoning": hotel.ai_reasoning or {}}
+        for hotel in hotels
+        if hotel.ai_recommended
+    ]
+
+
+@instrument("hotel_agent", "total")
+async def get_hotel_recommendations_async(city, checkin_date, checkout_date, preferences):
+    """
+    Uses SerpAPI to fetch hotel listings and Gemini to select the best one
+    based on user preferences (interests, budget, travelers, diet).
+    """
+    hotels = await search_hotel_options_async(city, checkin_date, checkout_date, preferences)
+    return await rank_hotel_options_async(hotels, city, checkin_date, checkout_date, preferences)
+
+
 def estimate_price_from_name(name: str, desc: str, affordability: str) -> int:
     """
-    Estimate price based on name/description and affordability.
+    Estimate price based on name/description and affordability. Always the
+    same figure for the same hotel, so prompts (and their cache keys) are stable.
     """
     text = (name + " " + desc).lower()
     is_oyo = "oyo" in text
@@ -87,44 +135,44 @@ def estimate_price_from_name(name: str, desc: str, affordability: str) -> int:
 
     if affordability == "low":
         if is_oyo or is_basic:
-            return random.randint(800, 1200)
+            return 1000
         elif is_midrange:
-            return random.randint(1200, 1800)
+            return 1500
         else:
-            return random.randint(1500, 2200)
+            return 1850
 
     elif affordability == "high":
         if is_luxury:
-            return random.randint(6000, 9000)
+            return 7500
         elif is_midrange:
-            return random.randint(4500, 6000)
+            return 5250
         else:
-            return random.randint(3500, 5000)
+            return 4250
 
     # default = medium
     if is_oyo or is_basic:
-        return random.randint(1500, 2500)
+        return 2000
     elif is_luxury:
-        return random.randint(5000, 7000)
+        return 6000
     elif is_midrange:
-        return random.randint(2500, 4000)
-    return random.randint(3000, 4500)
+        return 3250
+    return 3750
 
 
 def generate_fallback_hotels(city, checkin_date, checkout_date, affordability="medium"):
     sample_hotels = [
-        {
-            "id": f"fallback-{i}",
-            "name": f"{prefix} {city} Stay {i+1}",
-            "rating": round(random.uniform(3.8, 4.9), 1),
-            "reviews": random.randint(200, 800),
-            "location": f"{city} Central",
-            "description": f"A {prefix.lower()} accommodation in {city} with great access to city highlights.",
-            "price": estimate_price_from_name(prefix, city, affordability),
-            "priceFallback": True,
-            "image": f"https://via.placeholder.com/300x200?text=Hotel+{i+1}",
-            "amenities": ["Free WiFi", "Restaurant", "24h Desk", "Air Conditioning"]
-        }
+        Hotel(
+            id=f"fallback-{i}",
+            name=f"{prefix} {city} Stay {i+1}",
+            price=estimate_price_from_name(prefix, city, affordability),
+            price_fallback=True,
+            rating=None,
+            reviews=None,
+            location=f"{city} Central",
+            amenities=["Free WiFi", "Restaurant", "24h Desk", "Air Conditioning"],
+            thumbnail=f"https://via.placeholder.com/300x200?text=Hotel+{i+1}",
+            description=f"A {prefix.lower()} accommodation in {city} with great access to city highlights.",
+        )
         for i, prefix in enumerate(["Budget", "Popular", "Top Rated"])
     ]
     return sample_hotels
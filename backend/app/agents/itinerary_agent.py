@@ -1,14 +1,17 @@
-from app.services.gemini_service import generate_gemini_response
-import re
-import json
+from app.services.gemini_service import generate_gemini_json_async, stream_gemini_response
+from app.services.metrics import instrument, AGENT_SECONDS
+from app.models.gemini_models import ItineraryDay
+from app.utils.json_stream import JSONArrayStream
+from app.utils.llm_json import json_mode, validate_item, record_parse
+from app.utils.tracing import record_span
+import time
+from app.utils.log import get_logger
 
-def generate_daywise_itinerary(city, from_date, to_date, preferences):
-    """
-    Generates a day-wise itinerary using Gemini based on city, dates, and user preferences.
-    """
+log = get_logger(__name__)
 
-    # 🧠 Build prompt
-    prompt = f"""
+
+def _build_itinerary_prompt(city, from_date, to_date, preferences):
+    return f"""
 You are an AI travel planner. Generate a 3-day itinerary for a trip to {city} from {from_date} to {to_date}.
 Preferences:
 - Interests: {preferences.get("interests")}
@@ -30,18 +33,64 @@ Respond ONLY in JSON format:
 ]
 """
 
-    try:
-        reply = generate_gemini_response(prompt)
-        print("\n🗓️ Gemini Itinerary Raw Response:\n", reply)
 
-        # 🔍 Extract JSON list from Gemini output
-        match = re.search(r'\[.*\]', reply, re.DOTALL)
-        if match:
-            return json.loads(match.group())
-        else:
-            print("⚠️ No valid JSON array found in Gemini response.")
+@instrument("itinerary_agent", "generate")
+async def generate_daywise_itinerary_async(city, from_date, to_date, preferences):
+    """
+    Generates a day-wise itinerary using Gemini based on city, dates, and user preferences.
+    """
+    prompt = _build_itinerary_prompt(city, from_date, to_date, preferences)
+
+    try:
+        return await generate_gemini_json_async(prompt, ItineraryDay, parser="itinerary", many=True) or []
 
     except Exception as e:
-        print("⚠️ Error generating itinerary:", e)
+        log.warning("Error generating itinerary", error=e)
 
     return []
+
+
+async def stream_itinerary_days(prompt, model=ItineraryDay):
+    """
+    Streams the Gemini reply for an itinerary prompt (JSON mode, list of `model`)
+    and yields each day as soon as it is complete and valid in the JSON array.
+    The reply is only cached (where generate_gemini_json_async reads it too) when
+    the whole array parsed into valid days.
+    """
+    parser = JSONArrayStream()
+    valid = invalid = 0
+
+    def usable(text):
+        return parser.done and valid > 0 and not invalid and not parser.errors
+
+    chunks = stream_gemini_response(prompt, json_mode(model, many=True), keep=usable)
+    started = time.perf_counter()
+    try:
+        async for text in chunks:
+            for item in parser.feed(text):
+                day = validate_item(model, item)
+                if day is None:
+                    invalid += 1
+                    continue
+                valid += 1
+                yield day
+    finally:
+        await chunks.aclose()
+        elapsed = time.perf_counter() - started
+        AGENT_SECONDS.observe(elapsed, agent="itinerary_agent", stage="stream")
+        record_span("itinerary_agent.stream", elapsed)
+
+    invalid += parser.errors
+    if valid:
+        record_parse("itinerary_stream", ok=True, count=valid)
+    if invalid:
+        log.warning("Skipped malformed day(s) in streamed itinerary", skipped=invalid)
+        record_parse("itinerary_stream", ok=False, count=invalid)
+
+
+def stream_daywise_itinerary(city, from_date, to_date, preferences):
+    """
+    Streaming version of generate_daywise_itinerary_async: yields days one at a time.
+    """
+    prompt = _build_itinerary_prompt(city, from_date, to_date, preferences)
+    return stream_itinerary_days(prompt)
@@ -0,0 +1,245 @@
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from datetime import date
+from app.agents.flight_agent import search_flight_options_async, rank_flight_options_async
+from app.agents.hotel_agent import search_hotel_options_async, rank_hotel_options_async
+from app.services.serpapi_service import prewarm_flights_async, prewarm_hotels_async
+from app.services.quota_scheduler import QuotaExhausted, serpapi_priority
+from app.services.metrics import Counter, Gauge
+from app.utils.log import get_logger
+
+log = get_logger(__name__)
+
+# 🔥 Background prewarming: learns the most requested routes and stays from
+# traffic and refreshes their searches (and ranked results) off-peak, at
+# prewarm priority and within an hourly SerpAPI budget.
+PREWARM_ENABLED = os.getenv("RAAHI_PREWARM", "1") != "0"
+PREWARM_INTERVAL = float(os.getenv("RAAHI_PREWARM_INTERVAL", "600"))
+PREWARM_TOP_N = int(os.getenv("RAAHI_PREWARM_TOP_N", "20"))
+PREWARM_BUDGET_PER_HOUR = int(os.getenv("RAAHI_PREWARM_BUDGET_PER_HOUR", "60"))
+
+# Off-peak = fewer than PEAK_REQUESTS planning requests in the last PEAK_WINDOW seconds
+PEAK_REQUESTS = int(os.getenv("RAAHI_PREWARM_PEAK_REQUESTS", "20"))
+PEAK_WINDOW = 5 * 60
+
+# Refresh a cached search once it has used this share of its TTL
+REFRESH_AT = 0.5
+
+# Popularity halves every HALF_LIFE seconds without new requests
+HALF_LIFE = 6 * 60 * 60
+MAX_TRACKED = 500
+
+# Position of the (first) travel date in each kind of key
+_DATE_FIELD = {"flights": 3, "hotels": 2}
+
+PREWARM_JOBS = Counter(
+    "raahi_prewarm_jobs_total", "Prewarm jobs by kind and outcome.", ("kind", "outcome")
+)
+
+
+class TrafficTracker:
+    """
+    Decaying request counts per search key:
+    ("flights", from_iata, to_iata, departure_date) or ("hotels", city, checkin, checkout).
+    Keeps the latest preferences seen for each key so ranking can be prewarmed too.
+    """
+
+    def __init__(self, half_life=HALF_LIFE, max_tracked=MAX_TRACKED):
+        self.half_life = half_life
+        self.max_tracked = max_tracked
+        self._entries = {}      # key → [score, updated_at, preferences]
+        self._recent = deque()  # request timestamps, for peak detection
+        self._lock = threading.Lock()
+
+    def _score(self, entry, now):
+        return entry[0] * 0.5 ** ((now - entry[1]) / self.half_life)
+
+    def hit(self, now=None):
+        now = now or time.time()
+        with self._lock:
+            self._recent.append(now)
+            while self._recent and now - self._recent[0] > PEAK_WINDOW:
+                self._recent.popleft()
+
+    def record(self, key, preferences=None, now=None):
+        now = now or time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = [0.0, now, None]
+            entry[0] = self._score(entry, now) + 1
+            entry[1] = now
+            if preferences is not None:
+                entry[2] = preferences
+            if len(self._entries) > self.max_tracked:
+                self._prune(now)
+
+    def _prune(self, now):
+        keep = sorted(self._entries, key=lambda k: self._score(self._entries[k], now), reverse=True)
+        for key in keep[int(self.max_tracked * 0.9):]:
+            del self._entries[key]
+
+    def recent_requests(self, window=PEAK_WINDOW, now=None):
+        now = now or time.time()
+        with self._lock:
+            return sum(1 for t in self._recent if now - t <= window)
+
+    def top(self, kind, n, now=None):
+        """
+        The n most popular keys of a kind whose travel date has not passed,
+        as (key, score, preferences).
+        """
+        now = now or time.time()
+        today = date.today().isoformat()
+        field = _DATE_FIELD[kind]
+        with self._lock:
+            ranked = [
+                (key, self._score(entry, now), entry[2])
+                for key, entry in self._entries.items()
+                if key[0] == kind and key[field] >= today
+            ]
+        ranked.sort(key=lambda item: item[1], reverse=True)
+        return ranked[:n]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+traffic = TrafficTracker()
+Gauge("raahi_prewarm_tracked_keys", "Search keys tracked for prewarming.", lambda: len(traffic))
+
+
+def record_plan_traffic(from_iata, to_iata, city, departure_date, return_date, preferences):
+    """
+    Counts one interactive plan request towards route and destination popularity.
+    Routes without a known airport at either end are not counted.
+    """
+    now = time.time()
+    traffic.hit(now)
+    if from_iata and to_iata:
+        traffic.record(("flights", from_iata, to_iata, departure_date), preferences, now)
+    traffic.record(("hotels", city, departure_date, return_date), preferences, now)
+
+
+def record_hotel_traffic(city, checkin_date, checkout_date):
+    now = time.time()
+    traffic.hit(now)
+    traffic.record(("hotels", city, checkin_date, checkout_date), None, now)
+
+
+class Prewarmer:
+    """
+    Every `interval` seconds, when traffic is off-peak, refreshes the top-N
+    flight and hotel searches whose cache entries are ageing, then re-runs
+    ranking for them so the Gemini replies are cached too. Stops early when
+    the hourly budget is spent or the scheduler reports the prewarm quota floor.
+    """
+
+    def __init__(self, tracker, interval=PREWARM_INTERVAL, top_n=PREWARM_TOP_N, budget_per_hour=PREWARM_BUDGET_PER_HOUR):
+        self.tracker = tracker
+        self.interval = interval
+        self.top_n = top_n
+        self.budget_per_hour = budget_per_hour
+        self._spent = deque()
+        self._task = None
+        self.stats = {"runs": 0, "skipped_peak": 0, "searches": 0, "ranked": 0, "failures": 0, "budget_stops": 0}
+
+    def start(self):
+        if PREWARM_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception:
+                log.exception("Prewarm run failed")
+
+    def budget_left(self, now=None):
+        now = now or time.time()
+        while self._spent and now - self._spent[0] > 3600:
+            self._spent.popleft()
+        return self.budget_per_hour - len(self._spent)
+
+    async def run_once(self):
+        if self.tracker.recent_requests() >= PEAK_REQUESTS:
+            self.stats["skipped_peak"] += 1
+            log.info("Skipping prewarm run during peak traffic")
+            return
+
+        self.stats["runs"] += 1
+        jobs = self.tracker.top("flights", self.top_n) + self.tracker.top("hotels", self.top_n)
+        jobs.sort(key=lambda job: job[1], reverse=True)
+
+        for key, _, preferences in jobs:
+            if self.budget_left() <= 0:
+                self.stats["budget_stops"] += 1
+                log.info("Prewarm budget spent for this hour", budget=self.budget_per_hour)
+                break
+            try:
+                outcome = await self._warm(key, preferences)
+            except QuotaExhausted as e:
+                log.info("Stopping prewarm run at the quota floor", error=e)
+                break
+            except Exception as e:
+                self.stats["failures"] += 1
+                outcome = "failed"
+                log.warning("Prewarm job failed", key=key, error=e)
+            PREWARM_JOBS.inc(kind=key[0], outcome=outcome)
+
+    async def _warm(self, key, preferences):
+        with serpapi_priority("prewarm"):
+            if key[0] == "flights":
+                _, origin, dest, depart = key
+                if not await prewarm_flights_async(origin, dest, depart, REFRESH_AT):
+                    return "fresh"
+                self._spend()
+                if preferences is not None:
+                    flights = await search_flight_options_async(origin, dest, depart)
+                    await rank_flight_options_async(flights, origin, dest, depart, preferences)
+                    self.stats["ranked"] += 1
+            else:
+                _, city, checkin, checkout = key
+                if not await prewarm_hotels_async(city, checkin, checkout, REFRESH_AT):
+                    return "fresh"
+                self._spend()
+                if preferences is not None:
+                    hotels = await search_hotel_options_async(city, checkin, checkout, preferences)
+                    await rank_hotel_options_async(hotels, city, checkin, checkout, preferences)
+                    self.stats["ranked"] += 1
+        return "refreshed"
+
+    def _spend(self):
+        self._spent.append(time.time())
+        self.stats["searches"] += 1
+
+
+prewarmer = Prewarmer(traffic)
+
+
+def prewarm_stats():
+    return {
+        **prewarmer.stats,
+        "enabled": PREWARM_ENABLED,
+        "tracked_keys": len(traffic),
+        "budget_left_this_hour": prewarmer.budget_left(),
+        "top": [
+            {"key": "|".join(key), "score": round(score, 2)}
+            for key, score, _ in sorted(
+                traffic.top("flights", 5) + traffic.top("hotels", 5), key=lambda item: item[1], reverse=True
+            )[:5]
+        ],
+    }
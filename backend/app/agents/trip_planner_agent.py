@@ -1,47 +1,260 @@
-from app.agents.flight_agent import get_flight_recommendations
-from app.agents.hotel_agent import get_hotel_recommendations
-from app.agents.itinerary_agent import generate_daywise_itinerary
-from app.utils.iata_lookup import get_iata_code  
+import asyncio
+from app.agents.flight_agent import (
+    get_flight_recommendations_async,
+    search_flight_options_async,
+    rank_flight_options_async,
+    flight_ai_patches,
+    get_fare_calendar_async,
+)
+from app.agents.hotel_agent import (
+    get_hotel_recommendations_async,
+    search_hotel_options_async,
+    rank_hotel_options_async,
+    hotel_ai_patches,
+)
+from app.agents.itinerary_agent import (
+    generate_daywise_itinerary_async,
+    stream_daywise_itinerary,
+)
+from app.agents.prewarm_agent import record_plan_traffic
+from app.models.records import to_dicts
+from app.utils.iata_lookup import get_iata_code
+from app.utils.log import get_logger
 
-def generate_full_plan(plan):
+log = get_logger(__name__)
+
+# ⏱️ Per-stage deadlines (seconds) for the concurrent orchestrator.
+# Each stage is one SerpAPI call (10s timeout) plus one Gemini call (15s timeout).
+STAGE_TIMEOUTS = {
+    "flights": 30,
+    "hotels": 30,
+    "itinerary": 20,
+    "fareCalendar": 30,
+}
+
+
+async def run_stage(name, func, timeout, **kwargs):
     """
-    Orchestrates the full travel planning process:
-    - Fetches flight options (city name → IATA)
-    - Recommends hotels (city name directly)
-    - Generates daywise itinerary
+    Runs one async planning stage under a deadline (None: no deadline); a stage
+    that overruns is cancelled. Returns (result, error) so a failed or cancelled
+    stage never sinks the others.
     """
-    preferences = plan.dict()
+    try:
+        result = await asyncio.wait_for(func(**kwargs), timeout=timeout)
+        return result, None
+    except asyncio.TimeoutError as e:
+        log.warning("Plan stage timed out", stage=name, timeout_s=timeout)
+        return [], str(e) or f"timed out after {timeout}s"
+    except asyncio.CancelledError:
+        if asyncio.current_task().cancelling():
+            raise  # this plan itself is being cancelled
+        # A call shared with other requests was cancelled under us
+        log.warning("Plan stage cancelled", stage=name)
+        return [], "cancelled"
+    except Exception as e:
+        log.warning("Plan stage failed", stage=name, error=e)
+        return [], str(e)
 
-    # ✅ Convert city names to IATA codes for flights only
-    from_iata = get_iata_code(preferences["from_"])
-    to_iata = get_iata_code(preferences["to"])
 
-    # ✈️ Flight Recommendations
-    flights = get_flight_recommendations(
+def no_airport_error(from_iata, to_iata, preferences):
+    """
+    Why the flight stages cannot run (a place without a known airport), or None.
+    """
+    if not from_iata:
+        return f"No airport found for '{preferences['from_']}'"
+    if not to_iata:
+        return f"No airport found for '{preferences['to']}'"
+    return None
+
+
+def _with_airports(func, from_iata, to_iata, preferences):
+    """
+    `func` for a flight stage, or a stand-in that fails fast without calling SerpAPI.
+    """
+    error = no_airport_error(from_iata, to_iata, preferences)
+    if error is None:
+        return func
+
+    async def no_airport(**kwargs):
+        raise ValueError(error)
+    return no_airport
+
+
+async def _fare_calendar_stage(from_iata, to_iata, preferences, timeout):
+    if not preferences.get("flexDays"):
+        return None, None
+    return await run_stage(
+        "fareCalendar", _with_airports(get_fare_calendar_async, from_iata, to_iata, preferences), timeout,
         from_city=from_iata,
         to_city=to_iata,
         departure_date=preferences["departureDate"],
-        preferences=preferences
+        flex_days=preferences["flexDays"],
     )
 
-    # 🏨 Hotel Recommendations (use city name as-is)
-    hotels = get_hotel_recommendations(
-        city=preferences["to"],
-        checkin_date=preferences["departureDate"],
-        checkout_date=preferences["returnDate"],
-        preferences=preferences
-    )
 
-    # 📅 Itinerary Generation (use city name as-is)
-    itinerary = generate_daywise_itinerary(
-        city=preferences["to"],
-        from_date=preferences["departureDate"],
-        to_date=preferences["returnDate"],
-        preferences=preferences
+async def generate_full_plan_async(plan, stage_timeouts=None):
+    """
+    Generates a full plan (flights, hotels, itinerary):
+    - Runs flights, hotels and itinerary stages at the same time
+    - Applies a deadline to each stage (see STAGE_TIMEOUTS)
+    - Returns partial results; failed stages come back empty and are
+      listed under "errors"
+    - With flexDays > 0, also returns a fare calendar for departureDate ± flexDays
+    """
+    timeouts = {**STAGE_TIMEOUTS, **(stage_timeouts or {})}
+    preferences = plan.dict()
+
+    from_iata = get_iata_code(preferences["from_"])
+    to_iata = get_iata_code(preferences["to"])
+    record_plan_traffic(from_iata, to_iata, preferences["to"], preferences["departureDate"], preferences["returnDate"], preferences)
+
+    (flights, flight_err), (hotels, hotel_err), (itinerary, itinerary_err), (calendar, calendar_err) = await asyncio.gather(
+        run_stage(
+            "flights", _with_airports(get_flight_recommendations_async, from_iata, to_iata, preferences), timeouts["flights"],
+            from_city=from_iata,
+            to_city=to_iata,
+            departure_date=preferences["departureDate"],
+            preferences=preferences,
+        ),
+        run_stage(
+            "hotels", get_hotel_recommendations_async, timeouts["hotels"],
+            city=preferences["to"],
+            checkin_date=preferences["departureDate"],
+            checkout_date=preferences["returnDate"],
+            preferences=preferences,
+        ),
+        run_stage(
+            "itinerary", generate_daywise_itinerary_async, timeouts["itinerary"],
+            city=preferences["to"],
+            from_date=preferences["departureDate"],
+            to_date=preferences["returnDate"],
+            preferences=preferences,
+        ),
+        _fare_calendar_stage(from_iata, to_iata, preferences, timeouts["fareCalendar"]),
     )
 
-    return {
-        "flights": flights,
-        "hotels": hotels,
+    response = {
+        "flights": to_dicts(flights),
+        "hotels": to_dicts(hotels),
         "itinerary": itinerary
     }
+    if preferences.get("flexDays"):
+        response["fareCalendar"] = calendar
+
+    errors = {
+        stage: err
+        for stage, err in (
+            ("flights", flight_err), ("hotels", hotel_err), ("itinerary", itinerary_err), ("fareCalendar", calendar_err),
+        )
+        if err
+    }
+    if errors:
+        response["errors"] = errors
+
+    return response
+
+
+async def stream_full_plan(plan, stage_timeouts=None, on_complete=None):
+    """
+    Progressive variant of generate_full_plan_async. Yields (event, data) pairs
+    as each section becomes available:
+    - flights_raw / hotels_raw: SerpAPI results, before Gemini
+    - flights_ranked / hotels_ranked: patches ({id, ...}) with the Gemini-added fields
+    - itinerary_day: one itinerary day at a time
+    - fare_calendar: cheapest/fastest flight per day (only with flexDays > 0)
+    - error: a stage failed or timed out ({stage, error})
+    - done: always last, with any stage errors
+    When every stage succeeds, `await on_complete(response)` gets the assembled plan
+    (same shape as generate_full_plan_async) and may return fields to add to done.
+    """
+    timeouts = {**STAGE_TIMEOUTS, **(stage_timeouts or {})}
+    preferences = plan.dict()
+
+    from_iata = get_iata_code(preferences["from_"])
+    to_iata = get_iata_code(preferences["to"])
+    city = preferences["to"]
+    depart, ret = preferences["departureDate"], preferences["returnDate"]
+    record_plan_traffic(from_iata, to_iata, city, depart, ret, preferences)
+
+    queue = asyncio.Queue()
+    sections = {"flights": [], "hotels": [], "itinerary": []}
+
+    no_airport = no_airport_error(from_iata, to_iata, preferences)
+
+    async def flights_stage():
+        if no_airport:
+            raise ValueError(no_airport)
+        flights = await search_flight_options_async(from_iata, to_iata, depart)
+        await queue.put(("flights_raw", to_dicts(flights)))
+        await rank_flight_options_async(flights, from_iata, to_iata, depart, preferences)
+        await queue.put(("flights_ranked", flight_ai_patches(flights)))
+        sections["flights"] = flights
+
+    async def hotels_stage():
+        hotels = await search_hotel_options_async(city, depart, ret, preferences)
+        await queue.put(("hotels_raw", to_dicts(hotels)))
+        await rank_hotel_options_async(hotels, city, depart, ret, preferences)
+        await queue.put(("hotels_ranked", hotel_ai_patches(hotels)))
+        sections["hotels"] = hotels
+
+    async def itinerary_stage():
+        async for day in stream_daywise_itinerary(city, depart, ret, preferences):
+            sections["itinerary"].append(day)
+            await queue.put(("itinerary_day", day))
+
+    async def fare_calendar_stage():
+        if no_airport:
+            raise ValueError(no_airport)
+        calendar = await get_fare_calendar_async(from_iata, to_iata, depart, preferences["flexDays"])
+        sections["fareCalendar"] = calendar
+        await queue.put(("fare_calendar", calendar))
+
+    errors = {}
+
+    async def run(name, stage):
+        try:
+            await asyncio.wait_for(stage(), timeout=timeouts[name])
+        except asyncio.TimeoutError:
+            log.warning("Plan stage timed out", stage=name, timeout_s=timeouts[name])
+            errors[name] = f"timed out after {timeouts[name]}s"
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():
+                raise  # the stream itself is being closed
+            # A call shared with other requests was cancelled under us
+            log.warning("Plan stage cancelled", stage=name)
+            errors[name] = "cancelled"
+        except Exception as e:
+            log.warning("Plan stage failed", stage=name, error=e)
+            errors[name] = str(e)
+        if name in errors:
+            await queue.put(("error", {"stage": name, "error": errors[name]}))
+        await queue.put(None)
+
+    tasks = [
+        asyncio.create_task(run("flights", flights_stage)),
+        asyncio.create_task(run("hotels", hotels_stage)),
+        asyncio.create_task(run("itinerary", itinerary_stage)),
+    ]
+    if preferences.get("flexDays"):
+        tasks.append(asyncio.create_task(run("fareCalendar", fare_calendar_stage)))
+
+    try:
+        remaining = len(tasks)
+        while remaining:
+            item = await queue.get()
+            if item is None:
+                remaining -= 1
+                continue
+            yield item
+
+        done = {"errors": errors}
+        if on_complete is not None and not errors:
+            response = {**sections, "flights": to_dicts(sections["flights"]), "hotels": to_dicts(sections["hotels"])}
+            done.update(await on_complete(response) or {})
+        yield "done", done
+    finally:
+        # Client went away (or we finished): stop any stage still running and
+        # wait for it, so no stage outlives the stream
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
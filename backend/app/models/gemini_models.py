@@ -0,0 +1,62 @@
+from typing import List
+from pydantic import BaseModel
+
+
+# 🧾 Shapes Gemini is asked to return (sent as responseSchema in JSON mode)
+
+class FlightReason(BaseModel):
+    price: str
+    duration: str
+    airline: str
+    departure: str
+
+
+class FlightPick(BaseModel):
+    recommended_id: str
+    reason: FlightReason
+
+
+class HotelReason(BaseModel):
+    rating: str
+    location: str
+    amenities: str
+    value: str
+
+
+class HotelPick(BaseModel):
+    recommended_id: str
+    reason: HotelReason
+
+
+class HotelNote(BaseModel):
+    name: str
+    reason: str
+
+
+class Activity(BaseModel):
+    time: str
+    title: str
+    details: str
+
+
+class ItineraryDay(BaseModel):
+    day: int
+    date: str
+    title: str
+    activities: List[Activity]
+
+
+class TimelineActivity(BaseModel):
+    time: str
+    icon: str
+    activity: str
+
+
+class TimelineDay(BaseModel):
+    """
+    Itinerary day in the shape the /api/itinerary page renders.
+    """
+    day: int
+    date: str
+    title: str
+    activities: List[TimelineActivity]
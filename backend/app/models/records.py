@@ -0,0 +1,117 @@
+# 🧱 Compact records for search results. Prices are whole rupees and durations
+# are minutes from parsing through ranking; they are formatted for the API
+# only in to_dict(), at the response boundary.
+
+
+def format_price(rupees) -> str:
+    return f"₹{rupees}"
+
+
+def format_duration(minutes) -> str:
+    return f"{minutes // 60}h {minutes % 60}m"
+
+
+class Flight:
+    __slots__ = (
+        "id", "airline", "code", "departure", "arrival", "departure_airport", "arrival_airport",
+        "duration_min", "flight_type", "stops", "price", "travel_class",
+        "cheapest", "ai_recommended", "ai_reasoning", "popular",
+    )
+
+    def __init__(self, id, airline, code, departure, arrival, departure_airport, arrival_airport,
+                 duration_min, flight_type, stops, price, travel_class):
+        self.id = id
+        self.airline = airline
+        self.code = code
+        self.departure = departure          # "HH:MM"
+        self.arrival = arrival              # "HH:MM"
+        self.departure_airport = departure_airport
+        self.arrival_airport = arrival_airport
+        self.duration_min = duration_min    # int minutes
+        self.flight_type = flight_type
+        self.stops = stops
+        self.price = price                  # int rupees
+        self.travel_class = travel_class
+        self.cheapest = False
+        self.ai_recommended = False
+        self.ai_reasoning = None
+        self.popular = False
+
+    def to_dict(self) -> dict:
+        data = {
+            "id": self.id,
+            "airline": self.airline,
+            "code": self.code,
+            "departure": self.departure,
+            "arrival": self.arrival,
+            "departureAirport": self.departure_airport,
+            "arrivalAirport": self.arrival_airport,
+            "duration": format_duration(self.duration_min),
+            "type": self.flight_type,
+            "stops": self.stops,
+            "price": format_price(self.price),
+            "class": self.travel_class,
+        }
+        if self.cheapest:
+            data["cheapest"] = True
+        if self.ai_recommended:
+            data["aiRecommended"] = True
+        if self.ai_reasoning is not None:
+            data["aiReasoning"] = self.ai_reasoning
+        if self.popular:
+            data["popular"] = True
+        return data
+
+
+# Hotel fields sent only when a `fields=` projection asks for them
+HOTEL_OPTIONAL_FIELDS = ("description",)
+
+
+class Hotel:
+    __slots__ = (
+        "id", "name", "price", "price_fallback", "rating", "reviews", "location", "amenities",
+        "thumbnail", "link", "description", "ai_recommended", "ai_reasoning",
+    )
+
+    def __init__(self, id, name, price, price_fallback, rating, reviews, location, amenities,
+                 thumbnail=None, link=None, description=""):
+        self.id = id
+        self.name = name
+        self.price = price                  # int rupees per night, None until estimated
+        self.price_fallback = price_fallback
+        self.rating = rating                # float 0..5
+        self.reviews = reviews              # int count
+        self.location = location
+        self.amenities = amenities
+        self.thumbnail = thumbnail
+        self.link = link
+        self.description = description
+        self.ai_recommended = False
+        self.ai_reasoning = None
+
+    def to_dict(self, extra=()) -> dict:
+        data = {
+            "id": self.id,
+            "name": self.name,
+            "price": format_price(self.price),
+            "priceFallback": self.price_fallback,
+            "rating": self.rating,
+            "reviews": self.reviews,
+            "location": self.location,
+            "amenities": self.amenities,
+            "thumbnail": self.thumbnail,
+            "link": self.link,
+        }
+        if "description" in extra:
+            data["description"] = self.description
+        if self.ai_recommended:
+            data["aiRecommended"] = True
+        if self.ai_reasoning is not None:
+            data["ai_reasoning"] = self.ai_reasoning
+        return data
+
+
+def to_dicts(records, extra=()):
+    if extra:
+        return [record.to_dict(extra) for record in records]
+    return [record.to_dict() for record in records]
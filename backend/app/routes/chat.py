@@ -1,6 +1,11 @@
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from app.services.gemini_service import generate_gemini_response
+from app.services.gemini_service import generate_gemini_response_async, stream_gemini_response
+from app.utils.sse import format_sse, STREAM_HEADERS
+from app.utils.log import get_logger
+
+log = get_logger(__name__)
 
 router = APIRouter()
 
@@ -9,5 +14,30 @@ class ChatRequest(BaseModel):
 
 @router.post("/chat")
 async def chat_with_gemini(request: ChatRequest):
-    response = generate_gemini_response(request.query)
-    return {"response": response}
\ No newline at end of file
+    # Conversational replies are not served from the prompt cache
+    response = await generate_gemini_response_async(request.query, use_cache=False)
+    return {"response": response}
+
+
+@router.post("/chat/stream")
+async def stream_chat_with_gemini(request: ChatRequest):
+    """
+    Streams the Gemini reply as server-sent events:
+    - `data: {"text": "..."}` for each chunk as it arrives
+    - `event: done` once the reply is complete
+    - `event: error` if Gemini fails mid-stream
+    If the client disconnects, the upstream Gemini request is closed.
+    """
+    async def events():
+        chunks = stream_gemini_response(request.query, use_cache=False)
+        try:
+            async for text in chunks:
+                yield format_sse({"text": text})
+            yield format_sse({}, event="done")
+        except Exception as e:
+            log.warning("Gemini chat stream failed", error=e)
+            yield format_sse({"error": "Gemini failed to respond."}, event="error")
+        finally:
+            await chunks.aclose()
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=STREAM_HEADERS)
@@ -1,8 +1,16 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 from typing import List, Dict, Any
 
-from app.services.hotel_ranking_service import get_ranked_hotels_from_iata
+from app.services.hotel_ranking_service import get_ranked_hotels_from_iata_async
+from app.services.serpapi_service import page_hotels_async, decode_hotel_cursor
+from app.models.records import to_dicts, HOTEL_OPTIONAL_FIELDS
+from app.agents.prewarm_agent import record_hotel_traffic
+from app.utils.location_index import destination_city
+from app.utils.responses import project, parse_fields, MAX_LIMIT
+from app.utils.log import get_logger
+
+log = get_logger(__name__)
 
 router = APIRouter()
 
@@ -15,6 +23,7 @@ class HotelRecommendationRequest(BaseModel):
     travelers: str
     interests: List[str]
     diet: str
+    aiReasons: bool = False
 
 
 def extract_budget_value(budget_str: str) -> int:
@@ -36,22 +45,73 @@ def extract_travelers_value(travelers_str: str) -> int:
     return mapping.get(travelers_str, 1)
 
 
+MAX_HOTEL_PAGE_SIZE = 50
+
+
 @router.post("/recommend/hotels")
-def recommend_hotels(preferences: HotelRecommendationRequest) -> Dict[str, Any]:
+async def recommend_hotels(
+    preferences: HotelRecommendationRequest,
+    fields: str = Query(None, description="Comma-separated hotel fields to return, e.g. name,price,rating"),
+    limit: int = Query(None, ge=0, le=MAX_LIMIT, description="Maximum hotels to return"),
+) -> Dict[str, Any]:
+    # Hotels don't need an airport: unknown places (e.g. Manali) are searched by name
+    city = destination_city(preferences.to)
+
     budget_limit = extract_budget_value(preferences.budget)
     num_travelers = extract_travelers_value(preferences.travelers)
 
-    print(f"🔍 Getting hotels for: {preferences.to}, ₹{budget_limit}, {num_travelers} travelers")
+    log.info("Getting hotel recommendations", to=preferences.to, budget=budget_limit, travelers=num_travelers)
     prefs_dict = preferences.dict()
     prefs_dict["budget_range"] = f"₹{budget_limit}"
     prefs_dict["travelers"] = num_travelers
     prefs_dict["dietary_pref"] = prefs_dict.pop("diet")
+    ai_reasons = prefs_dict.pop("aiReasons")
+    record_hotel_traffic(city, preferences.departureDate, preferences.returnDate)
 
-    hotels = get_ranked_hotels_from_iata(
-        iata_code=preferences.to,
+    hotels = await get_ranked_hotels_from_iata_async(
+        iata_code=city,
         checkin_date=preferences.departureDate,
         checkout_date=preferences.returnDate,
-        preferences=prefs_dict
+        preferences=prefs_dict,
+        ai_reasons=ai_reasons,
     )
 
-    return {"recommendations": hotels}
+    return {"recommendations": project(hotels, fields, limit)}
+
+
+@router.get("/hotels/search")
+async def search_hotels_page(
+    to: str,
+    checkin: str,
+    checkout: str,
+    limit: int = Query(10, ge=1, le=MAX_HOTEL_PAGE_SIZE),
+    cursor: str = Query(None, description="nextCursor from the previous page"),
+    maxPrice: int = Query(None, ge=0, description="Maximum nightly price in rupees"),
+    minRating: float = Query(None, ge=0, le=5),
+    fields: str = Query(None, description="Comma-separated hotel fields to return, e.g. name,price,rating,description"),
+) -> Dict[str, Any]:
+    """
+    Cursor-paginated hotel listings, parsed lazily from SerpAPI result pages.
+    Pass the returned nextCursor (with the same query) to get the next page;
+    nextCursor is null once results are exhausted. Pages can come back short
+    when the filters are selective. `description` is only sent when listed in `fields`.
+    """
+    city = destination_city(to)
+    if cursor:
+        try:
+            decode_hotel_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        record_hotel_traffic(city, checkin, checkout)
+
+    try:
+        hotels, next_cursor = await page_hotels_async(
+            city, checkin, checkout, limit, cursor, max_price=maxPrice, min_rating=minRating,
+        )
+    except Exception as e:
+        log.error("Hotel search page failed", city=city, error=e)
+        raise HTTPException(status_code=502, detail="Hotel search is unavailable, please retry")
+
+    extra = [name for name in parse_fields(fields or "") if name in HOTEL_OPTIONAL_FIELDS]
+    return {"hotels": project(to_dicts(hotels, extra), fields), "nextCursor": next_cursor}
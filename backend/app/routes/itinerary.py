@@ -1,8 +1,15 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Request, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List
-from app.services.gemini_service import generate_gemini_response
-import json, re
+from app.services.gemini_service import generate_gemini_json_async
+from app.agents.itinerary_agent import stream_itinerary_days
+from app.models.gemini_models import TimelineDay
+from app.utils.sse import format_event, STREAM_MEDIA_TYPES, STREAM_HEADERS
+from app.utils.responses import project, MAX_LIMIT
+from app.utils.log import get_logger
+
+log = get_logger(__name__)
 
 router = APIRouter()
 
@@ -14,15 +21,9 @@ class ItineraryRequest(BaseModel):
     travelers: str
     diet: str
 
-@router.post("/api/itinerary")
-async def generate_itinerary(request: Request):
-    try:
-        body = await request.json()
-        print("🟡 Received from frontend:", body)
-
-        parsed = ItineraryRequest(**body)
 
-        prompt = f"""
+def _build_prompt(parsed: ItineraryRequest) -> str:
+    return f"""
 You are an AI travel planner. Generate a 3-day itinerary for a trip to {parsed.to} from {parsed.departureDate} to {parsed.returnDate}.
 Preferences:
 - Interests: {', '.join(parsed.interests)}
@@ -42,15 +43,49 @@ Respond ONLY in JSON format:
 ]
 """
 
-        reply = generate_gemini_response(prompt)
-        print("🟢 Gemini raw reply:\n", reply)
 
-        match = re.search(r'\[.*\]', reply, re.DOTALL)
-        if match:
-            return json.loads(match.group())
-        else:
+@router.post("/api/itinerary")
+async def generate_itinerary(
+    request: Request,
+    fields: str = Query(None, description="Comma-separated day fields to return, e.g. day,title,activities.activity"),
+    limit: int = Query(None, ge=0, le=MAX_LIMIT, description="Maximum days to return"),
+):
+    try:
+        body = await request.json()
+        log.debug("Itinerary request", body=body)
+
+        parsed = ItineraryRequest(**body)
+        prompt = _build_prompt(parsed)
+
+        days = await generate_gemini_json_async(prompt, TimelineDay, parser="itinerary_route", many=True)
+        if days is None:
             return {"error": "Invalid JSON response from Gemini."}
+        return project(days, fields, limit)
 
     except Exception as e:
-        print("❌ Itinerary Error:", e)
+        log.exception("Itinerary error")
         return {"error": str(e)}
+
+
+@router.post("/api/itinerary/stream")
+async def stream_itinerary(parsed: ItineraryRequest, format: str = Query("ndjson", pattern="^(ndjson|sse)$")):
+    """
+    Streams the itinerary day by day while Gemini is still generating.
+    Each completed day is sent as a `day` event, followed by a `done` event
+    (or an `error` event). `format` selects NDJSON (default) or SSE framing.
+    """
+    async def events():
+        days = 0
+        try:
+            async for day in stream_itinerary_days(_build_prompt(parsed), TimelineDay):
+                days += 1
+                yield format_event(day, "day", format)
+            if days:
+                yield format_event({"days": days}, "done", format)
+            else:
+                yield format_event({"error": "Invalid JSON response from Gemini."}, "error", format)
+        except Exception as e:
+            log.exception("Itinerary stream error")
+            yield format_event({"error": str(e)}, "error", format)
+
+    return StreamingResponse(events(), media_type=STREAM_MEDIA_TYPES[format], headers=STREAM_HEADERS)
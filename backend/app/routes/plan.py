@@ -1,8 +1,17 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
+import asyncio
+from fastapi import APIRouter, Query, HTTPException, Header, Depends
+from fastapi.responses import StreamingResponse, Response
+from pydantic import BaseModel, Field
 from typing import List
-from app.agents.trip_planner_agent import generate_full_plan
-from app.utils.iata_lookup import get_iata_code  
+from app.agents.trip_planner_agent import generate_full_plan_async, stream_full_plan
+from app.agents.batch_planner_agent import stream_plan_batch, DEFAULT_BATCH_CONCURRENCY
+from app.agents.flight_agent import FARE_CALENDAR_MAX_DAYS
+from app.services.plan_store import plan_store, plan_id_for, etag_for
+from app.services.metrics import track_fallbacks
+from app.utils.responses import project, dumps, loads, MAX_LIMIT
+from app.utils.location_index import resolve_airport, destination_city, LocationNotFound
+from app.utils.sse import format_event, STREAM_MEDIA_TYPES, STREAM_HEADERS
+from app.utils.admin import require_admin
 
 router = APIRouter()
 
@@ -16,19 +25,196 @@ class PlanInput(BaseModel):
     travelers: str
     interests: List[str]
     diet: str
+    flexDays: int = Field(0, ge=0, le=FARE_CALENDAR_MAX_DAYS)
+
+
+class PlanBatchInput(BaseModel):
+    plans: List[PlanInput]
+    maxConcurrency: int = DEFAULT_BATCH_CONCURRENCY
+
+
+MAX_BATCH_PLANS = 50
+MAX_BATCH_CONCURRENCY = 16
+
+# Stored plans never change under an ETag, but may be regenerated: always revalidate
+PLAN_CACHE_HEADERS = {"Cache-Control": "no-cache"}
+
+# Plan keys kept by every `fields=` projection
+PLAN_KEEP_FIELDS = ("planId", "errors")
+
+FIELDS_QUERY = Query(None, description="Comma-separated fields to return, e.g. flights.price,flights.airline,hotels.name")
+LIMIT_QUERY = Query(None, ge=0, le=MAX_LIMIT, description="Maximum items per list")
+
+
+def _require_iata(name: str, field: str) -> str:
+    """
+    City/alias/IATA → IATA code for the flight search. Codes outside the
+    airport table and other unresolvable input are rejected with 422 (plus
+    suggestions) instead of sending a guaranteed-empty SerpAPI query.
+    """
+    try:
+        return resolve_airport(name)
+    except LocationNotFound as e:
+        raise HTTPException(status_code=422, detail={
+            "field": field,
+            "message": str(e),
+            "suggestions": [m.dict() for m in e.suggestions],
+        })
 
 
 @router.post("/generate-plan")
-def generate_plan(plan: PlanInput):
+async def generate_plan(plan: PlanInput, fields: str = FIELDS_QUERY, limit: int = LIMIT_QUERY):
     """
     Main endpoint for generating a full travel plan.
-    - Converts from/to cities to IATA for flight search
-    - Passes raw city name for hotel and itinerary
+    - Converts from/to cities to IATA for flight search (422 if the origin is unknown;
+      a destination without a known airport only fails the flight stage)
+    - Passes the city name (as given when unknown) for hotel and itinerary
+    - Runs flight, hotel and itinerary stages concurrently
     - Returns structured response: flights, hotels, and itinerary
+      (plus "errors" for any stage that failed or timed out)
+    - flexDays (0-3) adds "fareCalendar": the cheapest/fastest flight for each
+      day in departureDate ± flexDays
+    - Complete plans are stored under a planId derived from the request and
+      returned with ETag and Location (/api/plans/{planId}) headers; a fresh
+      stored plan for the same request is returned without regenerating it
+    - `fields=` (dotted, e.g. hotels.name) and `limit=` (items per list) trim the response
     """
-    plan.from_ = get_iata_code(plan.from_)
-    plan.to = get_iata_code(plan.to)
+    plan.from_ = _require_iata(plan.from_, "from_")
+    plan.to = destination_city(plan.to)
+
+    request = plan.dict()
+    stored = await asyncio.to_thread(plan_store.get, plan_id_for(request), fresh_only=True)
+    if stored is not None:
+        return _plan_response(stored, fields, limit)
 
     # 🌍 Proceed with the full plan generation
-    plan_response = generate_full_plan(plan)
-    return plan_response
+    fallbacks = track_fallbacks()
+    plan_response = await generate_full_plan_async(plan)
+    if not _storable(plan_response, fallbacks):
+        # Partial or degraded plans are not stored; the next request retries them
+        return project(plan_response, fields, limit, keep=PLAN_KEEP_FIELDS)
+
+    # 💾 Store it so views/share links can GET /api/plans/{planId} instead of regenerating
+    stored = await asyncio.to_thread(plan_store.put, request, plan_response)
+    return _plan_response(stored, fields, limit)
+
+
+def _storable(plan_response, fallbacks) -> bool:
+    """
+    Only complete, live plans are stored: no failed stage, no empty section,
+    and no fallback (stale search, canned hotels, Gemini outage) taken for it.
+    """
+    if "errors" in plan_response or fallbacks:
+        return False
+    return all(plan_response.get(section) for section in ("flights", "hotels", "itinerary"))
+
+
+def _plan_response(stored, fields=None, limit=None, if_none_match=None):
+    """
+    The stored body as-is, or its projection (with an ETag per projection).
+    304 when If-None-Match already has that representation.
+    """
+    body, etag = stored.body, stored.etag
+    if fields or limit is not None:
+        etag = etag_for(f"{etag}|{fields or ''}|{limit}".encode("utf-8"))
+    headers = {"ETag": etag, "Location": f"/api/plans/{stored.id}", **PLAN_CACHE_HEADERS}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    if etag != stored.etag:
+        body = dumps(project(loads(body), fields, limit, keep=PLAN_KEEP_FIELDS))
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _etag_matches(if_none_match, etag) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+@router.post("/plans/expire", dependencies=[Depends(require_admin)])
+def expire_plans():
+    """
+    Drops expired plans (RAAHI_PLAN_TTL) and the least recently read ones over RAAHI_PLAN_MAX.
+    Also runs automatically as plans are stored. Admin only (X-Admin-Token).
+    """
+    return {"removed": plan_store.expire(), **plan_store.stats()}
+
+
+@router.get("/plans/{plan_id}")
+def get_plan(plan_id: str, fields: str = FIELDS_QUERY, limit: int = LIMIT_QUERY, if_none_match: str = Header(None)):
+    """
+    A stored plan, exactly as /generate-plan returned it (with planId), without
+    touching SerpAPI or Gemini. Send the ETag back in If-None-Match to get 304.
+    Supports the same `fields=`/`limit=` projection as /generate-plan.
+    """
+    stored = plan_store.get(plan_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Plan not found (it may have expired)")
+    return _plan_response(stored, fields, limit, if_none_match)
+
+
+@router.delete("/plans/{plan_id}", status_code=204, dependencies=[Depends(require_admin)])
+def delete_plan(plan_id: str):
+    """
+    Removes a stored plan. Admin only (X-Admin-Token): plan IDs are shared by
+    everyone who asked for the same trip, so no single user owns one.
+    """
+    if not plan_store.delete(plan_id):
+        raise HTTPException(status_code=404, detail="Plan not found")
+    return Response(status_code=204)
+
+
+@router.post("/generate-plan/stream")
+async def generate_plan_stream(plan: PlanInput, format: str = Query("ndjson", pattern="^(ndjson|sse)$")):
+    """
+    Progressive version of /generate-plan. Streams typed events as each
+    section completes: flights_raw, hotels_raw, flights_ranked, hotels_ranked
+    (patches with aiRecommended/aiReasoning), itinerary_day, fare_calendar
+    (with flexDays), error and done.
+    When every stage succeeds live (no fallbacks) the plan is stored and done carries its planId.
+    `format` selects NDJSON (default) or SSE framing.
+    """
+    plan.from_ = _require_iata(plan.from_, "from_")
+    plan.to = destination_city(plan.to)
+
+    async def events():
+        fallbacks = track_fallbacks()
+
+        async def store(response):
+            if not _storable(response, fallbacks):
+                return {}
+            stored = await asyncio.to_thread(plan_store.put, plan.dict(), response)
+            return {"planId": stored.id}
+
+        async for event, data in stream_full_plan(plan, on_complete=store):
+            yield format_event(data, event, format)
+
+    return StreamingResponse(events(), media_type=STREAM_MEDIA_TYPES[format], headers=STREAM_HEADERS)
+
+
+@router.post("/generate-plans")
+async def generate_plans(batch: PlanBatchInput, format: str = Query("ndjson", pattern="^(ndjson|sse)$")):
+    """
+    Batch endpoint for generating many plans (e.g. campaigns).
+    - Shared flight/hotel searches across plans run only once
+    - At most `maxConcurrency` upstream calls run at a time
+    - Plans with flexDays get a fareCalendar, as from /generate-plan
+    - Streams a `plan` event ({index, plan}) as each plan finishes, then `done` with batch stats
+    """
+    if not batch.plans:
+        raise HTTPException(status_code=422, detail="plans must not be empty")
+    if len(batch.plans) > MAX_BATCH_PLANS:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_BATCH_PLANS} plans per batch")
+
+    for i, plan in enumerate(batch.plans):
+        plan.from_ = _require_iata(plan.from_, f"plans[{i}].from_")
+        plan.to = destination_city(plan.to)
+
+    concurrency = min(max(batch.maxConcurrency, 1), MAX_BATCH_CONCURRENCY)
+
+    async def events():
+        async for event, data in stream_plan_batch(batch.plans, concurrency):
+            yield format_event(data, event, format)
+
+    return StreamingResponse(events(), media_type=STREAM_MEDIA_TYPES[format], headers=STREAM_HEADERS)
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, HTTPException
+from app.services.serpapi_service import search_cache_stats, search_quota_stats
+from app.services.gemini_service import gemini_cache_stats
+from app.services.singleflight import singleflight_stats
+from app.services.resilience import resilience_stats
+from app.agents.prewarm_agent import prewarm_stats
+from app.services.plan_store import plan_store_stats
+from app.utils.prompt_encoding import prompt_token_stats
+from app.utils.llm_json import parse_stats
+from app.utils.tracing import get_trace
+
+router = APIRouter()
+
+
+@router.get("/stats")
+def get_stats():
+    """
+    Runtime counters for the upstream caching, request-coalescing, resilience,
+    prewarming and plan storage layers.
+    """
+    return {
+        "serpapi_cache": search_cache_stats(),
+        "serpapi_quota": search_quota_stats(),
+        "gemini_cache": gemini_cache_stats(),
+        "singleflight": singleflight_stats(),
+        "prompt_tokens": prompt_token_stats(),
+        "gemini_parsing": parse_stats(),
+        "upstreams": resilience_stats(),
+        "prewarm": prewarm_stats(),
+        "plan_store": plan_store_stats(),
+    }
+
+
+@router.get("/traces/{trace_id}")
+def get_trace_spans(trace_id: str):
+    """
+    Timed spans (route, agent stages, upstream calls) recorded for a recent request.
+    """
+    spans = get_trace(trace_id)
+    if spans is None:
+        raise HTTPException(status_code=404, detail="Trace not found (only recent requests are kept)")
+    return {"trace_id": trace_id, "spans": spans}
@@ -0,0 +1,236 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from app.utils.log import get_logger
+
+log = get_logger(__name__)
+
+# 🗄️ Local cache storage (SQLite tier). Override with RAAHI_CACHE_DIR.
+CACHE_DIR = os.getenv(
+    "RAAHI_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ".cache"),
+)
+
+
+class CacheEntry:
+    __slots__ = ("value", "stored_at", "size")
+
+    def __init__(self, value, stored_at, size=0):
+        self.value = value
+        self.stored_at = stored_at
+        self.size = size
+
+    @property
+    def age(self):
+        return time.time() - self.stored_at
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU cache.
+    Bounded by entry count and (optionally) total byte size; entries older
+    than max_age are dropped on read.
+    """
+
+    def __init__(self, max_entries=512, max_bytes=None, max_age=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if self.max_age is not None and entry.age > self.max_age:
+                self._remove(key)
+                return None
+            self._data.move_to_end(key)
+            return entry
+
+    def set(self, key, value, size=0, stored_at=None):
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = CacheEntry(value, stored_at or time.time(), size)
+            self._bytes += size
+            while len(self._data) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        entry = self._data.pop(key)
+        self._bytes -= entry.size
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def total_bytes(self):
+        return self._bytes
+
+
+class SQLiteCache:
+    """
+    On-disk JSON cache backed by a single SQLite table.
+    Bounded by row count (least recently used rows are evicted) and max_age.
+    """
+
+    def __init__(self, path, max_entries=5000, max_age=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, stored_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, stored_at = row
+            if self.max_age is not None and time.time() - stored_at > self.max_age:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return CacheEntry(json.loads(value), stored_at, len(value))
+
+    def set(self, key, value, stored_at=None):
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, payload, stored_at or now, now),
+            )
+            self._writes += 1
+            if self._writes % 50 == 0:
+                self._evict()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+    def _evict(self):
+        if self.max_age is not None:
+            cur = self._conn.execute("DELETE FROM cache WHERE stored_at < ?", (time.time() - self.max_age,))
+            self.evictions += max(cur.rowcount, 0)
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+            self.evictions += overflow
+
+    def __len__(self):
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+        return count
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class TieredCache:
+    """
+    Two-tier cache: in-memory LRU in front of an on-disk SQLite store.
+    Disk hits are promoted to memory. Keeps hit/miss counters per tier.
+    """
+
+    def __init__(self, memory, disk=None):
+        self.memory = memory
+        self.disk = disk
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+        # Counters are updated from the event loop and worker threads; the
+        # lock is never held while calling into a tier
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        entry = self.memory.get(key)
+        if entry is not None:
+            with self._lock:
+                self.hits["memory"] += 1
+            return entry
+
+        if self.disk is not None:
+            try:
+                entry = self.disk.get(key)
+            except sqlite3.Error as e:
+                log.warning("Disk cache read failed", error=e)
+                entry = None
+            if entry is not None:
+                with self._lock:
+                    self.hits["disk"] += 1
+                self.memory.set(key, entry.value, size=entry.size, stored_at=entry.stored_at)
+                return entry
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, value)
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                log.warning("Disk cache write failed", error=e)
+
+    def stats(self):
+        with self._lock:
+            hits, misses = dict(self.hits), self.misses
+        return {
+            "hits_memory": hits["memory"],
+            "hits_disk": hits["disk"],
+            "misses": misses,
+            "memory_entries": len(self.memory),
+            "memory_evictions": self.memory.evictions,
+            "disk_entries": len(self.disk) if self.disk is not None else 0,
+            "disk_evictions": self.disk.evictions if self.disk is not None else 0,
+        }
@@ -0,0 +1,139 @@
+from app.models.records import format_duration
+from app.utils.parsing import parse_clock_minutes
+
+# ⚖️ Cost weights per travel class (price, duration, stops, departure time).
+# Lower total cost is better; every criterion is min-max normalised to 0..1.
+CLASS_WEIGHTS = {
+    "economy": {"price": 0.55, "duration": 0.25, "stops": 0.15, "departure": 0.05},
+    "premium economy": {"price": 0.40, "duration": 0.30, "stops": 0.20, "departure": 0.10},
+    "business": {"price": 0.20, "duration": 0.40, "stops": 0.25, "departure": 0.15},
+    "first": {"price": 0.10, "duration": 0.40, "stops": 0.30, "departure": 0.20},
+}
+
+# Budget travellers care more about price
+BUDGET_PRICE_BOOST = 0.15
+
+# Frontier options whose cost is within this margin of the best are "near-equal"
+TIE_MARGIN = 0.05
+
+# Departures in this window (minutes after midnight) count as red-eye
+RED_EYE_START, RED_EYE_END = 0, 5 * 60
+
+
+def _normalise(column):
+    lo, hi = min(column), max(column)
+    span = hi - lo
+    if span == 0:
+        return [0.0] * len(column)
+    return [(v - lo) / span for v in column]
+
+
+def _weights(preferences):
+    travel_class = str(preferences.get("travelClass") or "economy").strip().lower()
+    weights = dict(CLASS_WEIGHTS.get(travel_class, CLASS_WEIGHTS["economy"]))
+
+    budget = str(preferences.get("budget") or "").lower()
+    if budget == "budget" or budget.startswith("₹0"):
+        weights["price"] += BUDGET_PRICE_BOOST
+
+    total = sum(weights.values())
+    return {k: v / total for k, v in weights.items()}
+
+
+def pareto_frontier(prices, durations, stops):
+    """
+    Indices of options not dominated on (price, duration, stops):
+    no other option is at least as good on all three and better on one.
+    """
+    order = sorted(range(len(prices)), key=lambda i: (prices[i], durations[i], stops[i]))
+    frontier = []
+    for i in order:
+        dominated = any(
+            durations[j] <= durations[i] and stops[j] <= stops[i]
+            and (prices[j], durations[j], stops[j]) != (prices[i], durations[i], stops[i])
+            for j in frontier
+        )
+        if not dominated:
+            frontier.append(i)
+    return frontier
+
+
+class FlightRanking:
+    __slots__ = ("scores", "frontier", "best", "tied", "columns")
+
+    def __init__(self, scores, frontier, best, tied, columns):
+        self.scores = scores        # cost per flight (lower is better)
+        self.frontier = frontier    # indices on the Pareto frontier
+        self.best = best            # index of the best flight
+        self.tied = tied            # frontier indices within TIE_MARGIN of the best
+        self.columns = columns      # parsed price/duration/stops/departure arrays
+
+    @property
+    def needs_tiebreak(self):
+        return len(self.tied) > 1
+
+
+def rank_flights(flights, preferences) -> FlightRanking:
+    """
+    Scores all Flight records in one pass over column arrays (price, duration,
+    stops, departure time), weighted by travelClass and budget. The best flight
+    is the lowest-cost option on the Pareto frontier.
+    """
+    prices = [f.price for f in flights]
+    durations = [f.duration_min for f in flights]
+    stops = [f.stops for f in flights]
+    departures = [parse_clock_minutes(f.departure) for f in flights]
+    red_eye = [1.0 if RED_EYE_START <= d < RED_EYE_END else 0.0 for d in departures]
+
+    w = _weights(preferences)
+    scores = [
+        w["price"] * p + w["duration"] * d + w["stops"] * s + w["departure"] * r
+        for p, d, s, r in zip(_normalise(prices), _normalise(durations), _normalise(stops), red_eye)
+    ]
+
+    frontier = pareto_frontier(prices, durations, stops)
+    best = min(frontier, key=lambda i: scores[i])
+    tied = sorted(
+        (i for i in frontier if scores[i] - scores[best] <= TIE_MARGIN),
+        key=lambda i: scores[i],
+    )
+
+    columns = {"price": prices, "duration": durations, "stops": stops, "departure": departures}
+    return FlightRanking(scores, frontier, best, tied, columns)
+
+
+def explain_pick(flights, ranking, index):
+    """
+    Templated reasoning for a locally picked flight, in the same shape Gemini returns.
+    """
+    flight = flights[index]
+    cols = ranking.columns
+    price, duration = cols["price"][index], cols["duration"][index]
+    cheapest, fastest = min(cols["price"]), min(cols["duration"])
+
+    if price == cheapest:
+        price_note = f"Lowest fare available at ₹{price}."
+    else:
+        price_note = f"₹{price}, only ₹{price - cheapest} more than the cheapest option."
+
+    if duration == fastest:
+        duration_note = f"Fastest option at {format_duration(duration)}."
+    else:
+        duration_note = f"{format_duration(duration)}, {duration - fastest} min longer than the fastest."
+
+    stops = cols["stops"][index]
+    airline_note = f"{flight.airline or 'This airline'} {flight.code or ''}".strip()
+    airline_note += ", non-stop." if stops == 0 else f", {stops} stop(s)."
+
+    departure = cols["departure"][index]
+    if RED_EYE_START <= departure < RED_EYE_END:
+        departure_note = f"Early departure at {flight.departure}."
+    else:
+        departure_note = f"Convenient departure at {flight.departure}."
+
+    return {
+        "price": price_note,
+        "duration": duration_note,
+        "airline": airline_note,
+        "departure": departure_note,
+    }
@@ -1,21 +1,122 @@
 import os
-import requests
+import json
+import hashlib
+import threading
+import httpx
 from dotenv import load_dotenv
+from app.services.http_client import get_async_client
+from app.services.cache import LRUCache
+from app.services.singleflight import SingleFlight
+from app.services.resilience import Upstream, CircuitOpenError
+from app.services.metrics import Gauge, CACHE_LOOKUPS, FALLBACKS, PAYLOAD_BYTES
+from app.utils.llm_json import json_mode, parse_reply, record_parse, ReplyParseError
+from app.utils.log import get_logger, HOT_PATH_SAMPLE
+
+log = get_logger(__name__)
 
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINIAPI_KEY")
 GEMINI_MODEL = "gemini-2.0-flash"
-GEMINI_API_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent"
+GEMINI_API_BASE = os.getenv("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta")
+GEMINI_API_URL = f"{GEMINI_API_BASE}/models/{GEMINI_MODEL}:generateContent"
+GEMINI_STREAM_URL = f"{GEMINI_API_BASE}/models/{GEMINI_MODEL}:streamGenerateContent?alt=sse"
+GEMINI_TIMEOUT = 15
+# Previous reply included in the one repair retry of generate_gemini_json
+MAX_REPAIR_REPLY_CHARS = 4000
 
 if not GEMINI_API_KEY:
     raise ValueError(" GEMINIAPI_KEY not found in .env file")
 
+# 🗄️ Exact-match response cache: identical (model, prompt, config) → same reply
+GEMINI_CACHE_TTL = 6 * 60 * 60
+GEMINI_CACHE_MAX_ENTRIES = 1024
+GEMINI_CACHE_MAX_BYTES = 8 * 1024 * 1024
+
+# Replies returned on failure; these are never cached
+FAILURE_REPLIES = {
+    "Gemini gave no response.",
+    "Gemini gave an empty response.",
+    "Gemini failed to respond due to request error.",
+    "Gemini failed to respond.",
+    "Gemini is temporarily unavailable.",
+}
+
+response_cache = LRUCache(
+    max_entries=GEMINI_CACHE_MAX_ENTRIES,
+    max_bytes=GEMINI_CACHE_MAX_BYTES,
+    max_age=GEMINI_CACHE_TTL,
+)
+cache_stats = {"hits": 0, "misses": 0, "bypassed": 0}
+_stats_lock = threading.Lock()
+Gauge("raahi_gemini_cache_bytes", "Bytes held by the Gemini response cache.", lambda: response_cache.total_bytes)
+
+# Concurrent identical prompts share one upstream request
+gemini_singleflight = SingleFlight("gemini")
 
-def generate_gemini_response(prompt: str) -> str:
+
+def _is_upstream_failure(error):
     """
-    Sends a prompt to Gemini API and returns the generated text response.
+    Rejected requests (4xx other than 429) are our fault, not Gemini's health.
     """
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    if status is not None and 400 <= status < 500 and status != 429:
+        return False
+    return True
+
+
+# Adaptive timeouts, hedged requests and a circuit breaker for Gemini
+gemini_upstream = Upstream("gemini", GEMINI_TIMEOUT, is_failure=_is_upstream_failure)
+
+
+def _cache_key(prompt: str, generation_config=None) -> str:
+    material = json.dumps(
+        {"model": GEMINI_MODEL, "prompt": prompt, "config": generation_config or {}},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _count(name):
+    with _stats_lock:
+        cache_stats[name] += 1
+
+
+def _cache_get(key, use_cache):
+    if not use_cache:
+        _count("bypassed")
+        CACHE_LOOKUPS.inc(cache="gemini", result="bypass")
+        return None
+    entry = response_cache.get(key)
+    if entry is None:
+        _count("misses")
+        CACHE_LOOKUPS.inc(cache="gemini", result="miss")
+        return None
+    _count("hits")
+    CACHE_LOOKUPS.inc(cache="gemini", result="hit")
+    return entry.value
+
+
+def _cache_put(key, text, use_cache):
+    PAYLOAD_BYTES.observe(len(text.encode("utf-8")), upstream="gemini", direction="response")
+    if use_cache and text not in FAILURE_REPLIES:
+        response_cache.set(key, text, size=len(text.encode("utf-8")))
+
+
+def gemini_cache_stats():
+    with _stats_lock:
+        counters = dict(cache_stats)
+    return {
+        **counters,
+        "entries": len(response_cache),
+        "bytes": response_cache.total_bytes,
+        "evictions": response_cache.evictions,
+    }
+
+
+def _build_request(prompt: str, generation_config=None):
     headers = {
         "Content-Type": "application/json",
         "X-goog-api-key": GEMINI_API_KEY
@@ -28,29 +129,163 @@ def generate_gemini_response(prompt: str) -> str:
             }
         ]
     }
+    if generation_config:
+        payload["generationConfig"] = generation_config
+    PAYLOAD_BYTES.observe(len(prompt.encode("utf-8")), upstream="gemini", direction="prompt")
+    return headers, payload
+
+
+def _extract_text(data: dict) -> str:
+    candidates = data.get("candidates", [])
+    if not candidates:
+        log.warning("No candidates returned from Gemini")
+        return "Gemini gave no response."
+
+    parts = candidates[0].get("content", {}).get("parts", [])
+    if not parts:
+        log.warning("No parts returned in Gemini content")
+        return "Gemini gave an empty response."
+
+    return parts[0].get("text", "Gemini gave no response.")
+
+
+async def _request_gemini_async(key, prompt, generation_config, use_cache):
+    headers, payload = _build_request(prompt, generation_config)
 
     try:
-        print(" Sending prompt to Gemini API...")
-        response = requests.post(GEMINI_API_URL, headers=headers, json=payload, timeout=15)
-        response.raise_for_status()
-        data = response.json()
+        log.info("Sending prompt to Gemini", prompt_chars=len(prompt), sample=HOT_PATH_SAMPLE)
 
-        candidates = data.get("candidates", [])
-        if not candidates:
-            print("⚠️ No candidates returned from Gemini.")
-            return "Gemini gave no response."
+        async def attempt(timeout):
+            response = await get_async_client().post(GEMINI_API_URL, headers=headers, json=payload, timeout=timeout)
+            response.raise_for_status()
+            return response.json()
 
-        parts = candidates[0].get("content", {}).get("parts", [])
-        if not parts:
-            print("⚠️ No parts returned in Gemini content.")
-            return "Gemini gave an empty response."
+        text = _extract_text(await gemini_upstream.call_async(attempt))
+        _cache_put(key, text, use_cache)
+        return text
 
-        return parts[0].get("text", "Gemini gave no response.")
+    except CircuitOpenError as e:
+        log.warning("Skipping Gemini call", error=e)
+        FALLBACKS.inc(kind="gemini_circuit_open")
+        return "Gemini is temporarily unavailable."
 
-    except requests.exceptions.RequestException as e:
-        print("⚠️ Gemini API request failed:", e)
+    except httpx.HTTPError as e:
+        log.warning("Gemini API request failed", error=e)
+        FALLBACKS.inc(kind="gemini_request_error")
         return "Gemini failed to respond due to request error."
 
-    except Exception as e:
-        print("⚠️ Unexpected error from Gemini:", e)
+    except Exception:
+        log.exception("Unexpected error from Gemini")
+        FALLBACKS.inc(kind="gemini_request_error")
         return "Gemini failed to respond."
+
+
+async def generate_gemini_response_async(prompt: str, generation_config=None, use_cache=True) -> str:
+    """
+    Sends a prompt to Gemini on the shared connection pool and returns the reply text.
+    Identical prompts are answered from the response cache unless use_cache=False;
+    identical prompts already in flight share that request.
+    """
+    key = _cache_key(prompt, generation_config)
+    cached = _cache_get(key, use_cache)
+    if cached is not None:
+        return cached
+
+    if not use_cache:
+        return await _request_gemini_async(key, prompt, generation_config, use_cache)
+    return await gemini_singleflight.do_async(
+        key, lambda: _request_gemini_async(key, prompt, generation_config, use_cache)
+    )
+
+
+async def stream_gemini_response(prompt: str, generation_config=None, use_cache=True, keep=None):
+    """
+    Streams a Gemini reply as it is generated, yielding text chunks.
+    A cached reply is yielded as a single chunk; a completed stream is cached
+    unless keep(text) says it is unusable (e.g. it did not parse).
+    Closing the generator (e.g. client disconnect) closes the upstream request.
+    Raises httpx.HTTPError if the request fails, CircuitOpenError if Gemini is
+    currently failing fast.
+    """
+    key = _cache_key(prompt, generation_config)
+    cached = _cache_get(key, use_cache)
+    if cached is not None:
+        yield cached
+        return
+
+    headers, payload = _build_request(prompt, generation_config)
+    received = []
+
+    log.info("Streaming prompt to Gemini", prompt_chars=len(prompt), sample=HOT_PATH_SAMPLE)
+    started = gemini_upstream.begin()
+    try:
+        async with get_async_client().stream(
+            "POST", GEMINI_STREAM_URL, headers=headers, json=payload, timeout=gemini_upstream.timeout()
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = json.loads(line[5:])
+                candidates = data.get("candidates", [])
+                if not candidates:
+                    continue
+                for part in candidates[0].get("content", {}).get("parts", []):
+                    text = part.get("text")
+                    if text:
+                        received.append(text)
+                        yield text
+    except Exception as e:
+        gemini_upstream.end(started, e, track_latency=False)
+        raise
+    except BaseException:
+        gemini_upstream.breaker.release()
+        raise
+    gemini_upstream.end(started, track_latency=False)
+
+    text = "".join(received)
+    _cache_put(key, text, use_cache and bool(received) and (keep is None or keep(text)))
+
+
+def _repair_prompt(prompt, reply, error):
+    return f"""{prompt}
+
+Your previous reply could not be used: {error}
+Previous reply:
+{reply[:MAX_REPAIR_REPLY_CHARS]}
+
+Reply again with ONLY the corrected JSON."""
+
+
+def _parse_or_none(reply, model, many, parser, repaired=False):
+    if reply in FAILURE_REPLIES:
+        return None, None
+    try:
+        parsed = parse_reply(reply, model, many)
+    except ReplyParseError as e:
+        record_parse(parser, ok=False)
+        log.warning("Unusable Gemini JSON reply", parser=parser, error=e, reply=reply)
+        return None, e
+    record_parse(parser, ok=True, repaired=repaired)
+    return parsed, None
+
+
+async def generate_gemini_json_async(prompt: str, model, parser: str, many=False, use_cache=True):
+    """
+    Asks Gemini for JSON matching a pydantic model (a list of them with many=True)
+    using JSON mode and a response schema. A reply that does not parse or
+    validate gets one repair retry; unusable replies are not kept in the
+    response cache. Returns plain dicts, or None.
+    """
+    config = json_mode(model, many)
+    reply = await generate_gemini_response_async(prompt, config, use_cache)
+    parsed, error = _parse_or_none(reply, model, many, parser)
+    if error is None:
+        return parsed
+    response_cache.delete(_cache_key(prompt, config))
+
+    repair = _repair_prompt(prompt, reply, error)
+    parsed, error = _parse_or_none(await generate_gemini_response_async(repair, config, use_cache), model, many, parser, repaired=True)
+    if error is not None:
+        response_cache.delete(_cache_key(repair, config))
+    return parsed
@@ -1,58 +1,204 @@
-import json
-from app.services.serpapi_service import search_hotels
-from app.services.gemini_service import generate_gemini_response
+import math
+from datetime import datetime
+from app.services.serpapi_service import find_hotels_async, fallback_hotels
+from app.services.gemini_service import generate_gemini_json_async
 from app.utils.location_utils import resolve_city_from_iata
+from app.utils.parsing import parse_price
+from app.services.metrics import FALLBACKS
+from app.models.gemini_models import HotelNote
+from app.utils.prompt_encoding import encode_candidates, record_prompt_tokens
+from app.utils.log import get_logger
 
+log = get_logger(__name__)
 
-def rank_hotels_with_gemini(hotels, user_prefs):
+TOP_N = 3
+
+# 🔎 Lazy candidate search for async ranking: stop once RANK_CANDIDATES hotels fit
+# the nightly budget and RANK_MIN_RATING; read another result page (up to
+# RANK_MAX_PAGES) only when fewer than TOP_N fit
+RANK_CANDIDATES = 10
+RANK_MIN_RATING = 3.5
+RANK_MAX_PAGES = 2
+
+# ⚖️ Score weights (higher total is better; each feature is scaled to 0..1)
+SCORE_WEIGHTS = {"price": 0.35, "rating": 0.35, "reviews": 0.10, "amenities": 0.20}
+
+# Share of the trip budget assumed to go to the hotel (same split as the SerpAPI fallback prices)
+HOTEL_BUDGET_SHARE = 0.45
+
+# Amenity keywords that match user interests and diet
+INTEREST_AMENITIES = {
+    "beaches": ["beach", "pool"],
+    "food": ["restaurant", "breakfast", "bar", "kitchen"],
+    "nightlife": ["bar", "lounge", "club"],
+    "wellness": ["spa", "fitness", "gym", "yoga", "hot tub"],
+    "spa & wellness": ["spa", "fitness", "gym", "yoga", "hot tub"],
+    "adventure": ["bicycle", "hiking", "outdoor", "pool"],
+    "mountains": ["fireplace", "heating", "balcony", "view"],
+    "shopping": ["shuttle", "airport", "central"],
+    "sightseeing": ["shuttle", "tour", "central"],
+    "city sightseeing": ["shuttle", "tour", "central"],
+    "culture": ["heritage", "tour", "central"],
+    "wildlife": ["safari", "nature", "garden"],
+}
+DIET_AMENITIES = {
+    "vegetarian": ["vegetarian", "restaurant", "kitchen"],
+    "veg": ["vegetarian", "restaurant", "kitchen"],
+    "vegan": ["vegan", "vegetarian", "kitchen"],
+}
+COMMON_AMENITIES = ["free wifi", "air conditioning", "ac room", "breakfast"]
+
+
+def _nights(checkin_date, checkout_date):
+    try:
+        days = (datetime.strptime(checkout_date, "%Y-%m-%d") - datetime.strptime(checkin_date, "%Y-%m-%d")).days
+    except (TypeError, ValueError):
+        return 1
+    return max(days, 1)
+
+
+def _nightly_budget(user_prefs):
+    total = parse_price(user_prefs.get("budget_range"))
+    if not total:
+        return None
+    return total * HOTEL_BUDGET_SHARE / _nights(user_prefs.get("checkin_date"), user_prefs.get("checkout_date"))
+
+
+def _wanted_amenities(user_prefs):
+    wanted = set(COMMON_AMENITIES)
+    for interest in user_prefs.get("interests") or []:
+        wanted.update(INTEREST_AMENITIES.get(str(interest).strip().lower(), []))
+    diet = str(user_prefs.get("dietary_pref") or "").strip().lower()
+    wanted.update(DIET_AMENITIES.get(diet, []))
+    return sorted(wanted)
+
+
+def _amenity_matches(amenities, wanted):
+    text = " ".join(str(a).lower() for a in amenities or [])
+    return [w for w in wanted if w in text]
+
+
+def score_hotels(hotels, user_prefs):
+    """
+    Scores every Hotel record in one pass over column arrays:
+    - price: 1 at or under the nightly budget, falling off above it
+    - rating: 0..5 scaled to 0..1 (0 when unrated)
+    - reviews: log-scaled review count (0 when unknown)
+    - amenities: share of wanted amenities (interests, diet, basics) present
+    Returns (scores, columns).
+    """
+    prices = [h.price or 0 for h in hotels]
+    ratings = [h.rating for h in hotels]
+    reviews = [h.reviews or 0 for h in hotels]
+    wanted = _wanted_amenities(user_prefs)
+    matches = [_amenity_matches(h.amenities, wanted) for h in hotels]
+
+    target = _nightly_budget(user_prefs) or (sorted(prices)[len(prices) // 2] if prices else 0)
+    price_fit = [
+        0.0 if p <= 0 else 1.0 if p <= target else max(0.0, 1.0 - (p / target - 1.0))
+        for p in prices
+    ]
+    rating_fit = [0.0 if r is None else min(max(r, 0.0), 5.0) / 5.0 for r in ratings]
+    max_reviews = math.log1p(max(reviews)) if reviews and max(reviews) > 0 else 1.0
+    review_fit = [math.log1p(r) / max_reviews for r in reviews]
+    amenity_fit = [len(m) / max(len(wanted), 1) for m in matches]
+
+    w = SCORE_WEIGHTS
+    scores = [
+        w["price"] * p + w["rating"] * r + w["reviews"] * v + w["amenities"] * a
+        for p, r, v, a in zip(price_fit, rating_fit, review_fit, amenity_fit)
+    ]
+    columns = {
+        "price": prices,
+        "rating": ratings,
+        "reviews": reviews,
+        "matches": matches,
+        "target": target,
+    }
+    return scores, columns
+
+
+def _local_reason(i, columns):
+    price, rating = columns["price"][i], columns["rating"][i]
+    parts = ["Not yet rated" if rating is None else f"Rated {rating:g}/5"]
+    if rating is not None and columns["reviews"][i]:
+        parts[0] += f" by {columns['reviews'][i]}+ guests"
+    target = columns["target"]
+    if price and target and price <= target:
+        parts.append(f"₹{price}/night fits your budget")
+    elif price:
+        parts.append(f"₹{price}/night")
+    if columns["matches"][i]:
+        parts.append("offers " + ", ".join(columns["matches"][i][:3]))
+    return "; ".join(parts) + "."
+
+
+def _to_recommendation(hotel, price, rating, reason):
+    return {
+        "name": hotel.name,
+        "location": hotel.location,
+        "price_per_night": price,
+        "rating": rating,
+        "amenities": hotel.amenities or [],
+        "reason": reason,
+    }
+
+
+def rank_hotels(hotels, user_prefs, top_n=TOP_N):
     """
-    Ranks hotels using Gemini based on user preferences.
-    Returns top 3 hotels with AI-generated reasoning.
+    Deterministically picks the top hotels by local score (ties keep SerpAPI order).
+    Returns recommendation dicts with templated reasons.
     """
-    hotels_json = json.dumps(hotels[:10], indent=2)
+    if not hotels:
+        return []
+
+    scores, columns = score_hotels(hotels, user_prefs)
+    order = sorted(range(len(hotels)), key=lambda i: (-scores[i], i))[:top_n]
+    return [
+        _to_recommendation(hotels[i], columns["price"][i], columns["rating"][i], _local_reason(i, columns))
+        for i in order
+    ]
+
+
+def _build_reasons_prompt(recommendations, user_prefs):
+    table = encode_candidates("hotel_ranking", recommendations, ["name", "location", "price_per_night", "rating", "amenities"])
 
     prompt = f"""
-You are a hotel analyst. Given these hotel listings:
+You are a hotel analyst. These hotels were shortlisted for a trip to {user_prefs['destination']}
+({user_prefs['checkin_date']} to {user_prefs['checkout_date']}), one per line, columns separated by "|":
+
+{table}
 
-{hotels_json}
+"-" means the listing did not report that value; do not guess it.
 
-And the user's preferences:
-- Destination: {user_prefs['destination']}
-- Check-in: {user_prefs['checkin_date']}
-- Check-out: {user_prefs['checkout_date']}
+User preferences:
 - Budget: {user_prefs['budget_range']}
 - Travelers: {user_prefs['travelers']}
 - Interests: {user_prefs['interests']}
 - Diet: {user_prefs.get('dietary_pref', 'No preference')}
 
-Select the top 3 best-value hotels and explain why they are suitable.
-Be concise, insightful, and helpful.
-
-Format output as a JSON list of objects with:
-name, location, price_per_night, rating, amenities, reason.
+For each hotel, write one concise sentence on why it suits this user.
+Respond ONLY with a JSON array of {{"name": ..., "reason": ...}} objects, one per hotel.
 """
+    record_prompt_tokens("hotel_ranking", prompt)
+    return prompt
 
-    result = generate_gemini_response(prompt)
 
-    try:
-        recommendations = json.loads(result)
+def _apply_reasons(recommendations, notes):
+    if notes is None:
+        log.warning("No usable Gemini hotel reasons, keeping local reasons")
+        FALLBACKS.inc(kind="hotel_local_reasons")
         return recommendations
-    except json.JSONDecodeError:
-        print("⚠️ Failed to parse Gemini response as JSON.")
-        return []
 
+    reasons = {note["name"]: note["reason"].strip() for note in notes}
+    for rec in recommendations:
+        if reasons.get(rec["name"]):
+            rec["reason"] = reasons[rec["name"]]
+    return recommendations
 
-def get_ranked_hotels_from_iata(iata_code, checkin_date, checkout_date, preferences):
-    """
-    Fetches hotels for a city (from IATA) and ranks them using Gemini.
-    """
-    city = resolve_city_from_iata(iata_code)
-    hotels = search_hotels(city, checkin_date, checkout_date)
-
-    if not hotels:
-        return []
 
-    user_prefs = {
+def _build_user_prefs(city, checkin_date, checkout_date, preferences):
+    return {
         "destination": city,
         "checkin_date": checkin_date,
         "checkout_date": checkout_date,
@@ -62,4 +208,35 @@ def get_ranked_hotels_from_iata(iata_code, checkin_date, checkout_date, preferen
         "dietary_pref": preferences.get("dietary_pref", None),
     }
 
-    return rank_hotels_with_gemini(hotels, user_prefs)
+
+async def get_ranked_hotels_from_iata_async(iata_code, checkin_date, checkout_date, preferences, ai_reasons=False):
+    """
+    Fetches hotels for a city (from IATA) and returns the top 3 by local score;
+    with ai_reasons=True, Gemini rewrites the reason strings. Scores only the first
+    RANK_CANDIDATES hotels that fit the budget and rating (see find_hotels_async),
+    fetching a further result page only when fewer than TOP_N fit.
+    """
+    city = resolve_city_from_iata(iata_code)
+    user_prefs = _build_user_prefs(city, checkin_date, checkout_date, preferences)
+    try:
+        hotels = await find_hotels_async(
+            city, checkin_date, checkout_date, RANK_CANDIDATES,
+            max_price=_nightly_budget(user_prefs), min_rating=RANK_MIN_RATING,
+            max_pages=RANK_MAX_PAGES, enough=TOP_N,
+        )
+    except Exception as e:
+        log.error("Hotel search failed", city=city, error=e)
+        return []
+
+    if not hotels:
+        # No listings at all: same fallback list as the eager search, without searching again
+        hotels = fallback_hotels(city, checkin_date, checkout_date)
+
+    recommendations = rank_hotels(hotels, user_prefs)
+
+    if ai_reasons and recommendations:
+        notes = await generate_gemini_json_async(
+            _build_reasons_prompt(recommendations, user_prefs), HotelNote, parser="hotel_reasons", many=True
+        )
+        _apply_reasons(recommendations, notes)
+    return recommendations
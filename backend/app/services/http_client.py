@@ -0,0 +1,49 @@
+import httpx
+
+# 🔌 Shared keep-alive connection pool for upstream APIs (Gemini, SerpAPI).
+# One pool per process: TLS connections are reused across requests instead
+# of being opened and torn down for every call.
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 20
+KEEPALIVE_EXPIRY = 30  # seconds an idle connection stays in the pool
+
+_async_client = None
+
+
+def _new_async_client():
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(15.0),
+    )
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Returns the shared async HTTP client.
+    Created by the app lifespan; lazily created for scripts that run without it.
+    """
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = _new_async_client()
+    return _async_client
+
+
+async def startup():
+    """
+    Opens the shared connection pool. Called from the app lifespan.
+    """
+    get_async_client()
+
+
+async def shutdown():
+    """
+    Closes the shared connection pool. Called from the app lifespan.
+    """
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
@@ -0,0 +1,253 @@
+import time
+import bisect
+import inspect
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+from app.utils.tracing import record_span
+
+# 📊 Minimal Prometheus-compatible metrics registry (text exposition format 0.0.4).
+# Kept dependency-free; only the metric types this backend needs.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+_registry = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.label_names, key)} {_number(v)}" for key, v in items]
+
+
+# Fallback kinds taken while serving the current request (see track_fallbacks)
+_fallbacks_seen = contextvars.ContextVar("fallbacks_seen", default=None)
+
+
+class FallbackCounter(Counter):
+    """
+    Counter of fallbacks that also notes each kind on the current request,
+    so callers can tell a degraded result from a live one.
+    """
+
+    def inc(self, amount=1, **labels):
+        super().inc(amount, **labels)
+        seen = _fallbacks_seen.get()
+        if seen is not None:
+            seen.add(labels.get("kind"))
+
+
+def track_fallbacks() -> set:
+    """
+    Starts collecting fallback kinds for the current context (and tasks created
+    from it); returns the set they are added to.
+    """
+    seen = set()
+    _fallbacks_seen.set(seen)
+    return seen
+
+
+def note_fallbacks(kinds):
+    """
+    Adds fallback kinds taken on someone else's behalf (e.g. in a shared
+    single-flight call) to the current request, without counting them again.
+    """
+    seen = _fallbacks_seen.get()
+    if seen is not None:
+        seen.update(kinds)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        self._values = {}  # key → [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, [('le', _number(bound))])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, key, [('le', '+Inf')])} {state[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(state[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {state[-1]}")
+        return lines
+
+
+class Gauge(_Metric):
+    """
+    Read at scrape time from `fn`, which returns a number, or a dict of
+    label-value tuples → number for labelled gauges.
+    """
+    kind = "gauge"
+
+    def __init__(self, name, help, fn, labels=()):
+        super().__init__(name, help, labels)
+        self.fn = fn
+
+    def _samples(self):
+        try:
+            value = self.fn()
+        except Exception:
+            return []
+        if not isinstance(value, dict):
+            value = {(): value}
+        return [
+            f"{self.name}{_labels(self.label_names, key)} {_number(v)}"
+            for key, v in sorted(value.items())
+            if v is not None
+        ]
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- Metrics shared across the backend ---
+
+HTTP_SECONDS = Histogram(
+    "raahi_http_request_duration_seconds", "Route handler latency.", ("route", "method", "status")
+)
+AGENT_SECONDS = Histogram(
+    "raahi_agent_duration_seconds", "Agent stage latency.", ("agent", "stage")
+)
+UPSTREAM_SECONDS = Histogram(
+    "raahi_upstream_duration_seconds", "Upstream API call latency (including hedges).", ("upstream", "outcome")
+)
+UPSTREAM_CALLS = Counter(
+    "raahi_upstream_calls_total", "Upstream API calls by outcome.", ("upstream", "outcome")
+)
+CACHE_LOOKUPS = Counter(
+    "raahi_cache_lookups_total", "Cache lookups by result.", ("cache", "result")
+)
+FALLBACKS = FallbackCounter(
+    "raahi_fallbacks_total", "Fallbacks taken instead of a live upstream answer.", ("kind",)
+)
+PARSE_ATTEMPTS = Counter(
+    "raahi_parse_attempts_total", "Gemini replies parsed (including repair retries).", ("parser",)
+)
+PARSE_FAILURES = Counter(
+    "raahi_parse_failures_total", "Gemini replies that could not be parsed or validated.", ("parser",)
+)
+PAYLOAD_BYTES = Histogram(
+    "raahi_payload_bytes", "Prompt/response sizes sent to and received from upstreams.",
+    ("upstream", "direction"), buckets=SIZE_BUCKETS,
+)
+RESPONSE_BYTES = Counter(
+    "raahi_response_bytes_total", "Compressed API response bytes, before (raw) and after (sent) compression.",
+    ("encoding", "kind"),
+)
+
+
+def instrument(agent, stage):
+    """
+    Decorator timing a sync or async agent function into AGENT_SECONDS
+    and the current request's trace.
+    """
+    def decorator(func):
+        name = f"{agent}.{stage}"
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    elapsed = time.perf_counter() - started
+                    AGENT_SECONDS.observe(elapsed, agent=agent, stage=stage)
+                    record_span(name, elapsed)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                AGENT_SECONDS.observe(elapsed, agent=agent, stage=stage)
+                record_span(name, elapsed)
+        return wrapper
+
+    return decorator
@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from app.services.cache import CACHE_DIR
+from app.utils.responses import dumps
+from app.utils.log import get_logger
+
+log = get_logger(__name__)
+
+# 💾 Generated plans, persisted so views/share links/back-navigation read the
+# stored plan instead of regenerating it. SQLite, next to the search cache.
+PLAN_STORE_PATH = os.getenv("RAAHI_PLAN_STORE_PATH", os.path.join(CACHE_DIR, "plans.sqlite3"))
+PLAN_TTL = int(os.getenv("RAAHI_PLAN_TTL", str(7 * 24 * 60 * 60)))
+MAX_PLANS = int(os.getenv("RAAHI_PLAN_MAX", "5000"))
+
+# A stored plan younger than this is returned as-is instead of being regenerated
+PLAN_FRESH = int(os.getenv("RAAHI_PLAN_FRESH", str(60 * 60)))
+
+# Run expiry every this many writes
+EXPIRE_EVERY = 50
+
+
+def plan_id_for(request: dict) -> str:
+    """
+    Content-derived plan ID: the same (normalized) plan request always maps to the same ID.
+    """
+    material = json.dumps(request, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:20]
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+class StoredPlan:
+    __slots__ = ("id", "etag", "body", "created_at")
+
+    def __init__(self, id, etag, body, created_at):
+        self.id = id
+        self.etag = etag
+        self.body = body            # serialized JSON, served as-is
+        self.created_at = created_at
+
+
+class PlanStore:
+    """
+    Plans keyed by a content-derived ID, stored with their serialized body and ETag.
+    Bounded by age (max_age) and count (least recently read plans go first).
+    """
+
+    def __init__(self, path=PLAN_STORE_PATH, max_plans=MAX_PLANS, max_age=PLAN_TTL, fresh_for=PLAN_FRESH):
+        self.max_plans = max_plans
+        self.max_age = max_age
+        self.fresh_for = fresh_for
+        self.expired = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS plans ("
+            " id TEXT PRIMARY KEY,"
+            " etag TEXT NOT NULL,"
+            " request TEXT NOT NULL,"
+            " body BLOB NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS plans_accessed ON plans (accessed_at)")
+
+    def put(self, request: dict, plan: dict) -> StoredPlan:
+        """
+        Stores a generated plan (with its planId added) and returns it. If a
+        fresh plan is already stored under the same ID, that one (and its ETag)
+        is kept and returned; older ones are replaced.
+        """
+        plan_id = plan_id_for(request)
+        body = dumps({**plan, "planId": plan_id})
+        etag = etag_for(body)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, body, created_at FROM plans WHERE id = ?", (plan_id,)
+            ).fetchone()
+            if row is not None and now - row[2] <= self.fresh_for:
+                return StoredPlan(plan_id, row[0], bytes(row[1]), row[2])
+            self._conn.execute(
+                "INSERT OR REPLACE INTO plans (id, etag, request, body, created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (plan_id, etag, json.dumps(request, ensure_ascii=False), body, now, now),
+            )
+            self._writes += 1
+            if self._writes % EXPIRE_EVERY == 0:
+                self._expire()
+        return StoredPlan(plan_id, etag, body, now)
+
+    def get(self, plan_id, fresh_only=False) -> StoredPlan:
+        """
+        The stored plan, or None if missing/expired (or, with fresh_only, older than fresh_for).
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, body, created_at FROM plans WHERE id = ?", (plan_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            etag, body, created_at = row
+            if time.time() - created_at > self.max_age:
+                self._conn.execute("DELETE FROM plans WHERE id = ?", (plan_id,))
+                self.expired += 1
+                return None
+            if fresh_only and time.time() - created_at > self.fresh_for:
+                return None
+            self._conn.execute("UPDATE plans SET accessed_at = ? WHERE id = ?", (time.time(), plan_id))
+        return StoredPlan(plan_id, etag, bytes(body), created_at)
+
+    def delete(self, plan_id) -> bool:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM plans WHERE id = ?", (plan_id,))
+        return cur.rowcount > 0
+
+    def expire(self) -> int:
+        """
+        Drops plans older than max_age and the least recently read ones beyond
+        max_plans. Returns how many were removed.
+        """
+        with self._lock:
+            return self._expire()
+
+    def _expire(self):
+        cur = self._conn.execute("DELETE FROM plans WHERE created_at < ?", (time.time() - self.max_age,))
+        removed = max(cur.rowcount, 0)
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM plans").fetchone()
+        overflow = count - self.max_plans
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM plans WHERE id IN (SELECT id FROM plans ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+            removed += overflow
+        self.expired += removed
+        if removed:
+            log.info("Expired stored plans", removed=removed)
+        return removed
+
+    def stats(self):
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM plans").fetchone()
+        return {
+            "plans": count, "expired": self.expired, "max_plans": self.max_plans,
+            "ttl_s": self.max_age, "fresh_s": self.fresh_for,
+        }
+
+
+plan_store = PlanStore()
+
+
+def plan_store_stats():
+    return plan_store.stats()
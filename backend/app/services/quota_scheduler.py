@@ -0,0 +1,171 @@
+import os
+import time
+import heapq
+import asyncio
+import threading
+import itertools
+import contextvars
+from contextlib import contextmanager
+
+# 🎟️ SerpAPI request scheduling. Lower number = served first.
+PRIORITIES = {"interactive": 0, "batch": 1, "prewarm": 2}
+
+# Token bucket for background traffic: sustained searches per second and burst size
+SERPAPI_RATE = float(os.getenv("SERPAPI_RATE", "2"))
+SERPAPI_BURST = int(os.getenv("SERPAPI_BURST", "5"))
+
+# Below this remaining monthly quota a priority class stops calling SerpAPI
+# and is served cached/fallback data instead
+QUOTA_FLOORS = {
+    "interactive": int(os.getenv("SERPAPI_QUOTA_FLOOR_INTERACTIVE", "0")),
+    "batch": int(os.getenv("SERPAPI_QUOTA_FLOOR_BATCH", "200")),
+    "prewarm": int(os.getenv("SERPAPI_QUOTA_FLOOR_PREWARM", "1000")),
+}
+
+# Priorities that never wait for a token: a user is waiting on them (a flex-date
+# plan alone fans out to ~8 searches). Their searches are still charged to the
+# bucket, so batch/prewarm back off while interactive traffic is heavy, and the
+# quota floor still applies.
+BUCKET_EXEMPT = ("interactive",)
+
+# Longest a request waits in the queue for a token (seconds)
+MAX_QUEUE_WAIT = {"interactive": 5, "batch": 60, "prewarm": 120}
+
+request_priority = contextvars.ContextVar("serpapi_priority", default="interactive")
+
+
+@contextmanager
+def serpapi_priority(name):
+    """
+    Runs SerpAPI calls made in this context (and tasks created in it) at `name` priority.
+    """
+    token = request_priority.set(name)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+
+class QuotaExhausted(Exception):
+    """
+    The search was not sent: quota is below this priority's floor, or no
+    token became available within MAX_QUEUE_WAIT.
+    """
+
+
+class QuotaScheduler:
+    """
+    Token-bucket rate limiter with a priority queue, aware of the remaining
+    monthly quota reported by SerpAPI (x-search-quota-remaining).
+    Exempt priorities only go through the quota floor check.
+    """
+
+    def __init__(self, rate=SERPAPI_RATE, burst=SERPAPI_BURST, floors=QUOTA_FLOORS, max_wait=MAX_QUEUE_WAIT,
+                 exempt=BUCKET_EXEMPT):
+        self.rate = rate
+        self.burst = burst
+        self.floors = floors
+        self.max_wait = max_wait
+        self.exempt = exempt
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.quota_remaining = None
+        self.granted = {name: 0 for name in PRIORITIES}
+        self.rejected = {name: 0 for name in PRIORITIES}
+        self._waiters = []
+        self._seq = itertools.count()
+        self._dispatcher = None
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _check_quota(self, priority):
+        floor = self.floors.get(priority, 0)
+        if self.quota_remaining is not None and self.quota_remaining <= floor:
+            self.rejected[priority] += 1
+            raise QuotaExhausted(f"SerpAPI quota {self.quota_remaining} at or below {priority} floor {floor}")
+
+    def _take(self, priority):
+        # Exempt priorities may take the bucket below zero (by at most one burst);
+        # the debt delays background traffic
+        self.tokens = max(self.tokens - 1, -self.burst)
+        self.granted[priority] += 1
+        if self.quota_remaining is not None:
+            self.quota_remaining -= 1
+
+    def update_quota(self, remaining):
+        try:
+            self.quota_remaining = int(remaining)
+        except (TypeError, ValueError):
+            pass
+
+    async def acquire(self, priority=None):
+        """
+        Waits for a token, serving higher priorities first.
+        Raises QuotaExhausted instead of spending quota reserved for higher priorities.
+        """
+        priority = priority or request_priority.get()
+        with self._lock:
+            self._check_quota(priority)
+            self._refill()
+            if priority in self.exempt or (self.tokens >= 1 and not self._waiters):
+                self._take(priority)
+                return
+
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (PRIORITIES.get(priority, 0), next(self._seq), priority, future))
+            if self._dispatcher is None or self._dispatcher.done():
+                self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+        try:
+            await asyncio.wait_for(future, self.max_wait.get(priority, 5))
+        except asyncio.TimeoutError:
+            self.rejected[priority] += 1
+            raise QuotaExhausted(f"No SerpAPI token for {priority} request within {self.max_wait.get(priority)}s")
+
+    async def _dispatch(self):
+        while True:
+            with self._lock:
+                while self._waiters and self._waiters[0][3].done():
+                    heapq.heappop(self._waiters)  # timed out or cancelled
+                if not self._waiters:
+                    return
+                self._refill()
+                if self.tokens >= 1:
+                    _, _, priority, future = heapq.heappop(self._waiters)
+                    try:
+                        self._check_quota(priority)
+                    except QuotaExhausted as e:
+                        future.set_exception(e)
+                        continue
+                    self._take(priority)
+                    future.set_result(None)
+                    continue
+                delay = (1 - self.tokens) / self.rate
+            await asyncio.sleep(delay)
+
+    def queue_depth(self):
+        depth = {name: 0 for name in PRIORITIES}
+        with self._lock:
+            for _, _, priority, future in self._waiters:
+                if not future.done():
+                    depth[priority] = depth.get(priority, 0) + 1
+        return depth
+
+    def stats(self):
+        with self._lock:
+            self._refill()
+            tokens = round(self.tokens, 2)
+        return {
+            "quota_remaining": self.quota_remaining,
+            "tokens": tokens,
+            "rate_per_sec": self.rate,
+            "burst": self.burst,
+            "exempt": list(self.exempt),
+            "queue_depth": self.queue_depth(),
+            "granted": dict(self.granted),
+            "rejected": dict(self.rejected),
+        }
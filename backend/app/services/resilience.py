@@ -0,0 +1,254 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from app.services.metrics import UPSTREAM_CALLS, UPSTREAM_SECONDS
+from app.utils.tracing import record_span
+
+# 📈 Latency samples kept per upstream (successful calls only)
+LATENCY_WINDOW = 200
+# Percentile-based policy only kicks in once there are this many samples
+MIN_SAMPLES = 20
+# Adaptive timeout = p99 × this, clamped to [min_timeout, default_timeout]
+TIMEOUT_MULTIPLIER = 3.0
+# At most this share of calls may send a hedged duplicate
+HEDGE_BUDGET = 0.1
+
+# 🔌 Circuit breaker: trips when the recent failure rate reaches FAILURE_RATE
+BREAKER_WINDOW = 20
+BREAKER_MIN_CALLS = 10
+FAILURE_RATE = 0.5
+OPEN_SECONDS = 30
+
+_upstreams = {}
+
+
+class CircuitOpenError(Exception):
+    """
+    The upstream's circuit breaker is open; the call was not attempted.
+    """
+
+
+class LatencyTracker:
+    __slots__ = ("samples", "_lock")
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, q):
+        with self._lock:
+            if not self.samples:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def __len__(self):
+        return len(self.samples)
+
+
+class CircuitBreaker:
+    """
+    closed → open when the failure rate over the last BREAKER_WINDOW calls
+    reaches FAILURE_RATE; open → half-open after OPEN_SECONDS, when a single
+    probe call is let through; half-open → closed on success, open on failure.
+    """
+
+    def __init__(self):
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.trips = 0
+        self.rejected = 0
+        self._outcomes = deque(maxlen=BREAKER_WINDOW)
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= OPEN_SECONDS:
+                self.state = "half_open"
+                self._probing = False
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def release(self):
+        """
+        A call was abandoned (e.g. cancelled) before it had an outcome.
+        """
+        with self._lock:
+            self._probing = False
+
+    def record(self, ok):
+        with self._lock:
+            if self.state == "half_open":
+                self._probing = False
+                if ok:
+                    self.state = "closed"
+                    self._outcomes.clear()
+                else:
+                    self._trip()
+                return
+
+            self._outcomes.append(ok)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= BREAKER_MIN_CALLS and failures / len(self._outcomes) >= FAILURE_RATE:
+                self._trip()
+
+    def _trip(self):
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self.trips += 1
+        self._outcomes.clear()
+
+
+class Upstream:
+    """
+    Resilience policy for one upstream API (latency tracking, adaptive
+    timeouts, hedged requests and a circuit breaker).
+
+    `fn` passed to call_async takes the timeout (seconds) to use.
+    `is_failure(exc)` decides whether an exception counts against the
+    upstream's health (e.g. a "no results" reply should not).
+    """
+
+    def __init__(self, name, default_timeout, min_timeout=1.0, hedge=True, is_failure=None):
+        self.name = name
+        self.default_timeout = default_timeout
+        self.min_timeout = min_timeout
+        self.hedge = hedge
+        self.is_failure = is_failure or (lambda exc: True)
+        self.latency = LatencyTracker()
+        self.breaker = CircuitBreaker()
+        self.calls = 0
+        self.failures = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+        _upstreams[name] = self
+
+    def timeout(self):
+        p99 = self.latency.percentile(0.99) if len(self.latency) >= MIN_SAMPLES else None
+        if p99 is None:
+            return self.default_timeout
+        return min(max(p99 * TIMEOUT_MULTIPLIER, self.min_timeout), self.default_timeout)
+
+    def hedge_delay(self):
+        if not self.hedge or len(self.latency) < MIN_SAMPLES:
+            return None
+        with self._lock:
+            over_budget = self.hedged >= HEDGE_BUDGET * self.calls
+        if over_budget:
+            return None
+        return self.latency.percentile(0.95)
+
+    def begin(self):
+        """
+        Starts a call: raises CircuitOpenError if the breaker is open,
+        otherwise returns the start time to pass to end().
+        """
+        if not self.breaker.allow():
+            UPSTREAM_CALLS.inc(upstream=self.name, outcome="circuit_open")
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        self._count("calls")
+        return time.monotonic()
+
+    def end(self, started, error=None, track_latency=True):
+        """
+        Records a call's outcome. Use track_latency=False for calls whose
+        duration is not comparable (e.g. whole streamed replies).
+        """
+        elapsed = time.monotonic() - started
+        if error is None:
+            outcome = "ok"
+            if track_latency:
+                self.latency.record(elapsed)
+            self.breaker.record(True)
+        elif self.is_failure(error):
+            outcome = "failure"
+            self._count("failures")
+            self.breaker.record(False)
+        else:
+            outcome = "error"
+            self.breaker.record(True)
+
+        UPSTREAM_CALLS.inc(upstream=self.name, outcome=outcome)
+        if track_latency:
+            UPSTREAM_SECONDS.observe(elapsed, upstream=self.name, outcome=outcome)
+        record_span(f"upstream.{self.name}", elapsed, outcome=outcome)
+
+    async def call_async(self, fn):
+        """
+        Async call with an adaptive timeout, guarded by the breaker. If the
+        first attempt is still running after the p95 latency, a duplicate is
+        sent and whichever finishes first successfully wins.
+        """
+        started = self.begin()
+        timeout = self.timeout()
+        delay = self.hedge_delay()
+
+        primary = asyncio.ensure_future(fn(timeout))
+        attempts = [primary]
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(attempts, timeout=delay)
+                if not done:
+                    self._count("hedged")
+                    attempts.append(asyncio.ensure_future(fn(timeout)))
+
+            error = None
+            pending = set(attempts)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self._count("hedge_wins")
+                        self.end(started)
+                        return task.result()
+                    error = error or task.exception()
+
+            self.end(started, error)
+            raise error
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        finally:
+            for task in attempts:
+                if not task.done():
+                    task.cancel()
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self):
+        p50, p95, p99 = (self.latency.percentile(q) for q in (0.5, 0.95, 0.99))
+        ms = lambda s: None if s is None else round(s * 1000, 1)
+        with self._lock:
+            calls, failures, hedged, hedge_wins = self.calls, self.failures, self.hedged, self.hedge_wins
+        return {
+            "calls": calls,
+            "failures": failures,
+            "hedged": hedged,
+            "hedge_wins": hedge_wins,
+            "p50_ms": ms(p50),
+            "p95_ms": ms(p95),
+            "p99_ms": ms(p99),
+            "timeout_s": round(self.timeout(), 2),
+            "breaker": self.breaker.state,
+            "breaker_trips": self.breaker.trips,
+            "breaker_rejected": self.breaker.rejected,
+        }
+
+
+def resilience_stats():
+    return {name: upstream.stats() for name, upstream in _upstreams.items()}
@@ -1,8 +1,23 @@
 import os
-import random
-import requests
+import json
+import base64
+import asyncio
+import threading
+import httpx
 from dotenv import load_dotenv
 from datetime import datetime
+from contextlib import aclosing
+from app.services.http_client import get_async_client
+from app.services.cache import CACHE_DIR, LRUCache, SQLiteCache, TieredCache
+from app.services.singleflight import SingleFlight
+from app.services.resilience import Upstream, CircuitOpenError
+from app.services.quota_scheduler import QuotaScheduler, QuotaExhausted, serpapi_priority, request_priority
+from app.services.metrics import Gauge, CACHE_LOOKUPS, FALLBACKS, PAYLOAD_BYTES
+from app.models.records import Flight, Hotel
+from app.utils.parsing import parse_price, parse_count, parse_float, parse_duration_minutes
+from app.utils.log import get_logger, HOT_PATH_SAMPLE
+
+log = get_logger(__name__)
 
 # Load environment variables
 load_dotenv()
@@ -12,74 +27,296 @@ SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY")
 if not SERPAPI_API_KEY:
     raise ValueError("❌ SERPAPI_API_KEY not found in .env file.")
 
+SERPAPI_URL = os.getenv("SERPAPI_URL", "https://serpapi.com/search")
+SERPAPI_TIMEOUT = 10
 
-def search_flights(from_city, to_city, departure_date):
+# 🗄️ Search cache policy per engine (seconds):
+# - ttl: served as fresh
+# - swr: after ttl, served stale while a background refresh runs
+# - retain: kept as "last good result" when SerpAPI errors
+CACHE_POLICY = {
+    "google_flights": {"ttl": 15 * 60, "swr": 2 * 60 * 60, "retain": 3 * 24 * 60 * 60},
+    "google_hotels": {"ttl": 60 * 60, "swr": 12 * 60 * 60, "retain": 7 * 24 * 60 * 60},
+}
+CACHE_PATH = os.getenv("SERPAPI_CACHE_PATH", os.path.join(CACHE_DIR, "serpapi.sqlite3"))
+
+# 📄 Hotel result pages (next_page_token) scanned per lazy search call
+HOTEL_MAX_PAGES = int(os.getenv("RAAHI_HOTEL_MAX_PAGES", "3"))
+
+# Only the parts of a SerpAPI reply the parsers read are cached
+CACHED_KEYS = ("best_flights", "other_flights", "properties", "hotel_results", "organic_results", "serpapi_pagination")
+
+_max_retain = max(policy["retain"] for policy in CACHE_POLICY.values())
+search_cache = TieredCache(
+    LRUCache(max_entries=256, max_age=_max_retain),
+    SQLiteCache(CACHE_PATH, max_entries=5000, max_age=_max_retain),
+)
+cache_stats = {"stale_served": 0, "fallback_served": 0, "refreshes": 0, "refresh_failures": 0, "prewarmed": 0}
+_stats_lock = threading.Lock()
+
+# Concurrent identical searches share one upstream request
+search_singleflight = SingleFlight("serpapi")
+
+_refreshing = set()
+_refresh_tasks = set()
+
+
+class SerpAPIError(Exception):
+    """
+    SerpAPI answered, but with an error payload (bad key, quota, no results...).
+    """
+
+    def __init__(self, message, data, status=None):
+        super().__init__(message)
+        self.data = data
+        self.status = status
+
+
+def _is_upstream_failure(error):
+    """
+    Error payloads such as "no results" are answers, not outages.
+    """
+    if isinstance(error, SerpAPIError):
+        return error.status is not None and (error.status >= 500 or error.status == 429)
+    return True
+
+
+# Adaptive timeouts and a circuit breaker for SerpAPI. No hedging: a duplicate
+# search would spend a credit without a scheduler token or quota accounting.
+serpapi_upstream = Upstream("serpapi", SERPAPI_TIMEOUT, hedge=False, is_failure=_is_upstream_failure)
+
+# Rate limit and monthly quota budget, shared by interactive/batch/prewarm searches
+serpapi_scheduler = QuotaScheduler()
+
+Gauge("raahi_serpapi_quota_remaining", "SerpAPI searches left this month (last reported).",
+      lambda: serpapi_scheduler.quota_remaining)
+Gauge("raahi_serpapi_queue_depth", "SerpAPI searches waiting for a token.",
+      lambda: {(name,): depth for name, depth in serpapi_scheduler.queue_depth().items()}, labels=("priority",))
+Gauge("raahi_serpapi_cache_entries", "SerpAPI search cache entries.",
+      lambda: {("memory",): len(search_cache.memory), ("disk",): len(search_cache.disk)}, labels=("tier",))
+
+
+def _cache_key(params):
+    """
+    Normalized cache key for a search: api_key dropped, IATA codes upper-cased,
+    free-text query lower-cased, params sorted.
+    """
+    normalized = {}
+    for k, v in params.items():
+        if k == "api_key":
+            continue
+        v = str(v).strip()
+        if k in ("departure_id", "arrival_id"):
+            v = v.upper()
+        elif k == "q":
+            v = " ".join(v.lower().split())
+        normalized[k] = v
+    return "|".join(f"{k}={normalized[k]}" for k in sorted(normalized))
+
+
+def _count(name):
+    with _stats_lock:
+        cache_stats[name] += 1
+
+
+def search_cache_stats():
+    with _stats_lock:
+        counters = dict(cache_stats)
+    return {**search_cache.stats(), **counters}
+
+
+def search_quota_stats():
+    return serpapi_scheduler.stats()
+
+
+def _check_reply(response, data, engine):
+    quota = response.headers.get("x-search-quota-remaining")
+    log.info("SerpAPI response received", engine=engine, status=response.status_code, quota_remaining=quota, sample=HOT_PATH_SAMPLE)
+    serpapi_scheduler.update_quota(quota)
+
+    if response.status_code >= 400 or data.get("error"):
+        raise SerpAPIError(data.get("error") or f"HTTP {response.status_code}", data, response.status_code)
+    return {k: data[k] for k in CACHED_KEYS if k in data}
+
+
+async def _fetch_serpapi_async(params):
+    async def attempt(timeout):
+        response = await get_async_client().get(SERPAPI_URL, params=params, timeout=timeout)
+        PAYLOAD_BYTES.observe(len(response.content), upstream="serpapi", direction="response")
+        return _check_reply(response, response.json(), params["engine"])
+
+    await serpapi_scheduler.acquire()
+    return await serpapi_upstream.call_async(attempt)
+
+
+async def _fetch_and_store_async(key, params):
+    """
+    Fetches a search and caches it; concurrent calls for the same key at the
+    same priority share one request. The shared call runs at its starter's
+    priority, so an interactive request never waits on (or is refused by the
+    quota floor of) a batch/prewarm fetch of the same search.
+    """
+    async def fetch():
+        data = await _fetch_serpapi_async(params)
+        search_cache.set(key, data)
+        return data
+
+    return await search_singleflight.do_async(f"{key}:{request_priority.get()}", fetch)
+
+
+def _lookup(params):
+    """
+    Returns (key, entry, state) where state is "fresh", "stale", "expired" or "miss".
+    """
+    policy = CACHE_POLICY[params["engine"]]
+    key = _cache_key(params)
+    entry = search_cache.get(key)
+    if entry is None:
+        state = "miss"
+    elif entry.age < policy["ttl"]:
+        state = "fresh"
+    elif entry.age < policy["ttl"] + policy["swr"]:
+        state = "stale"
+    else:
+        state = "expired"
+    CACHE_LOOKUPS.inc(cache="serpapi", result=state)
+    return key, entry, state
+
+
+def _serve_last_good(entry, error):
+    """
+    Upstream failed: fall back to the last good cached result if there is one.
+    A SerpAPI error payload with nothing cached is handed to the parser as before.
+    """
+    if entry is not None:
+        log.warning("SerpAPI failed, serving last good cached result", error=error)
+        _count("fallback_served")
+        FALLBACKS.inc(kind="serpapi_last_good")
+        return entry.value
+    if isinstance(error, SerpAPIError):
+        return error.data
+    raise error
+
+
+async def _refresh_async(key, params):
     try:
-        print("✈️ Searching flights using SerpAPI...")
-        print("🔑 API Key Loaded:", SERPAPI_API_KEY[:6] + "...")
-
-        params = {
-            "engine": "google_flights",
-            "departure_id": from_city,
-            "arrival_id": to_city,
-            "outbound_date": departure_date,
-            "type": "2",
-            "hl": "en",
-            "gl": "us",
-            "currency": "INR",
-            "api_key": SERPAPI_API_KEY,
-        }
-
-        response = requests.get("https://serpapi.com/search", params=params, timeout=10)
-        data = response.json()
-
-        print("📦 SerpAPI Raw Flight Response Received.")
-        print("🔄 Quota Remaining:", response.headers.get("x-search-quota-remaining", "Unknown"))
-
-        best_flights = data.get("best_flights", []) + data.get("other_flights", [])
-        parsed_flights = []
-
-        for i, flight_option in enumerate(best_flights):
-            f = flight_option.get("flights", [{}])[0]
-
-            airline = f.get("airline", "Unknown Airline")
-            code = f.get("flight_number", "NA")
-            departure = f.get("departure_airport", {}).get("time", "00:00")[-5:]
-            arrival = f.get("arrival_airport", {}).get("time", "00:00")[-5:]
-            departure_airport = f.get("departure_airport", {}).get("id", from_city)
-            arrival_airport = f.get("arrival_airport", {}).get("id", to_city)
-            duration_mins = f.get("duration", 90)
-            duration = f"{int(duration_mins // 60)}h {int(duration_mins % 60)}m"
-            flight_type = f.get("type", "Non-stop")
-            price = f"₹{flight_option.get('price', 4999)}"
-            travel_class = f.get("travel_class", "Economy")
-
-            flight = {
-                "id": f"flight{i}",
-                "airline": airline,
-                "code": code,
-                "departure": departure,
-                "arrival": arrival,
-                "departureAirport": departure_airport,
-                "arrivalAirport": arrival_airport,
-                "duration": duration,
-                "type": flight_type,
-                "price": price,
-                "class": travel_class,
-            }
-
-            parsed_flights.append(flight)
-
-        if not parsed_flights:
-            print("⚠️ No flights found from SerpAPI.")
-        return parsed_flights
-
-    except requests.exceptions.RequestException as e:
-        print("❌ SerpAPI Flight Request Failed:", e)
-        return []
+        with serpapi_priority("prewarm"):
+            await _fetch_and_store_async(key, params)
+        _count("refreshes")
     except Exception as e:
-        print("❌ Unexpected Error While Fetching Flights:", e)
+        _count("refresh_failures")
+        log.warning("Background SerpAPI refresh failed", error=e)
+    finally:
+        _refreshing.discard(key)
+
+
+def _claim_refresh(key):
+    if key in _refreshing:
+        return False
+    _refreshing.add(key)
+    return True
+
+
+async def _cached_search_async(params):
+    key, entry, state = _lookup(params)
+    if state == "fresh":
+        return entry.value
+    if state == "stale":
+        _count("stale_served")
+        if _claim_refresh(key):
+            task = asyncio.create_task(_refresh_async(key, params))
+            _refresh_tasks.add(task)
+            task.add_done_callback(_refresh_tasks.discard)
+        return entry.value
+
+    try:
+        return await _fetch_and_store_async(key, params)
+    except (httpx.HTTPError, SerpAPIError, CircuitOpenError, QuotaExhausted, ValueError) as e:
+        return _serve_last_good(entry, e)
+
+
+async def _prewarm_async(params, refresh_at):
+    """
+    Re-fetches a cached search at prewarm priority when it is missing or has
+    used up more than `refresh_at` of its TTL. Returns True if SerpAPI was called.
+    """
+    key = _cache_key(params)
+    entry = search_cache.get(key)
+    if entry is not None and entry.age < CACHE_POLICY[params["engine"]]["ttl"] * refresh_at:
+        return False
+    with serpapi_priority("prewarm"):
+        await _fetch_and_store_async(key, params)
+    _count("prewarmed")
+    return True
+
+
+def _flight_params(from_city, to_city, departure_date):
+    return {
+        "engine": "google_flights",
+        "departure_id": from_city,
+        "arrival_id": to_city,
+        "outbound_date": departure_date,
+        "type": "2",
+        "hl": "en",
+        "gl": "us",
+        "currency": "INR",
+        "api_key": SERPAPI_API_KEY,
+    }
+
+
+def _parse_flights(data, from_city, to_city):
+    best_flights = data.get("best_flights", []) + data.get("other_flights", [])
+    parsed_flights = []
+
+    for i, flight_option in enumerate(best_flights):
+        segments = flight_option.get("flights") or [{}]
+        first, last = segments[0], segments[-1]
+
+        parsed_flights.append(Flight(
+            id=f"flight{i}",
+            airline=first.get("airline", "Unknown Airline"),
+            code=first.get("flight_number", "NA"),
+            departure=first.get("departure_airport", {}).get("time", "00:00")[-5:],
+            arrival=last.get("arrival_airport", {}).get("time", "00:00")[-5:],
+            departure_airport=first.get("departure_airport", {}).get("id", from_city),
+            arrival_airport=last.get("arrival_airport", {}).get("id", to_city),
+            duration_min=parse_duration_minutes(flight_option.get("total_duration") or first.get("duration", 90)),
+            flight_type=first.get("type", "Non-stop"),
+            stops=max(len(segments) - 1, 0),
+            price=parse_price(flight_option.get("price", 4999)),
+            travel_class=first.get("travel_class", "Economy"),
+        ))
+
+    if not parsed_flights:
+        log.warning("No flights found from SerpAPI", route=f"{from_city}-{to_city}")
+    return parsed_flights
+
+
+async def search_flights_async(from_city, to_city, departure_date):
+    """
+    Flight options for a route and date (cached SerpAPI google_flights search).
+    """
+    try:
+        log.info("Searching flights", route=f"{from_city}-{to_city}", date=departure_date)
+
+        params = _flight_params(from_city, to_city, departure_date)
+        data = await _cached_search_async(params)
+
+        return _parse_flights(data, from_city, to_city)
+
+    except httpx.HTTPError as e:
+        log.error("SerpAPI flight request failed", error=e)
         return []
+    except Exception:
+        log.exception("Unexpected error while fetching flights")
+        return []
+
+
+async def prewarm_flights_async(from_city, to_city, departure_date, refresh_at=0.5):
+    """
+    Keeps a flight search warm for interactive requests (see _prewarm_async).
+    """
+    return await _prewarm_async(_flight_params(from_city, to_city, departure_date), refresh_at)
 
 
 def get_fallback_price(total_budget, num_days, tier="mid"):
@@ -96,124 +333,273 @@ def get_fallback_price(total_budget, num_days, tier="mid"):
         min_price = base_per_night * 0.9
         max_price = base_per_night * 1.2
 
-    return f"₹{int(random.uniform(min_price, max_price))}"
+    return int((min_price + max_price) / 2)
+
+
+def _hotel_params(city, checkin_date, checkout_date, budget=None, travelers=None):
+    params = {
+        "engine": "google_hotels",
+        "q": f"hotels in {city}",
+        "check_in_date": checkin_date,
+        "check_out_date": checkout_date,
+        "currency": "INR",
+        "gl": "in",
+        "hl": "en",
+        "api_key": SERPAPI_API_KEY,
+    }
+
+    if budget:
+        params["max_price"] = budget
+    if travelers:
+        params["adults"] = travelers
+    return params
+
+
+def _serp_hotel_price(h):
+    """
+    Lowest nightly rate in whole rupees, or None when SerpAPI has no price.
+    """
+    rate = h.get("rate_per_night") or {}
+    price = h.get("price")
+    if isinstance(price, dict):
+        price = (price.get("lead") or {}).get("formatted")
+    return rate.get("extracted_lowest") or parse_price(rate.get("lowest")) or parse_price(price) or None
+
+
+def _estimate_hotel_price(name, rating, affordability):
+    name_lower = name.lower()
+    if any(word in name_lower for word in ["oyo", "lodge", "hostel", "dorm"]):
+        min_p, max_p = 500, 1400
+    elif any(word in name_lower for word in ["resort", "marriott", "hilton", "luxury", "premium"]):
+        min_p, max_p = 4000, 8000
+    elif rating is not None and rating >= 4.3:
+        min_p, max_p = 3500, 6000
+    elif rating is None or rating >= 3.8:
+        min_p, max_p = 2200, 4000
+    else:
+        min_p, max_p = 1500, 2500
+
+    if affordability == "low":
+        max_p = int(max_p * 0.7)
+        min_p = int(min_p * 0.7)
+    elif affordability == "high":
+        max_p = int(max_p * 1.3)
+        min_p = int(min_p * 1.1)
+
+    return (min_p + max_p) // 2
+
+
+def _hotel_properties(data):
+    return (
+        data.get("properties")
+        or data.get("hotel_results")
+        or data.get("organic_results")
+        or []
+    )
+
+
+def _parse_hotel(h, i, city, affordability):
+    name = h.get("name", f"Hotel {i+1}")
+    # Missing ratings/reviews stay None (shown as "-" in prompts, null to clients)
+    rating = parse_float(h.get("overall_rating") or h.get("rating"), None)
+    images = h.get("images") or [{}]
+    price = _serp_hotel_price(h)
+
+    return Hotel(
+        id=f"hotel{i}",
+        name=name,
+        price=price if price else _estimate_hotel_price(name, rating, affordability),
+        price_fallback=not price,
+        rating=rating,
+        reviews=parse_count(h.get("reviews")) or None,
+        location=h.get("address") or h.get("location") or f"{city}, India",
+        amenities=h.get("amenities", ["Free WiFi", "Breakfast Included"]),
+        thumbnail=(
+            h.get("thumbnail") or h.get("image") or images[0].get("thumbnail")
+            or f"https://via.placeholder.com/300x200?text=Hotel+{i+1}"
+        ),
+        link=h.get("link") or h.get("booking_link") or "https://www.google.com/travel/hotels",
+        description=h.get("description", ""),
+    )
+
+
+def _parse_hotels(data, city, checkin_date, checkout_date, budget=None, hotel_affordability="medium"):
+    affordability = hotel_affordability or "medium"
+
+    parsed_hotels = [
+        _parse_hotel(h, i, city, affordability) for i, h in enumerate(_hotel_properties(data))
+    ]
+
+    if not parsed_hotels:
+        parsed_hotels = fallback_hotels(city, checkin_date, checkout_date, budget)
+
+    log.info("Parsed hotels", city=city, count=len(parsed_hotels))
+    return parsed_hotels
+
+
+def fallback_hotels(city, checkin_date, checkout_date, budget=None):
+    """
+    Canned hotels priced from the trip budget, for searches with no listings.
+    Counted as a fallback, so plans built from them are never stored.
+    """
+    date1 = datetime.strptime(checkin_date, "%Y-%m-%d")
+    date2 = datetime.strptime(checkout_date, "%Y-%m-%d")
+    num_days = (date2 - date1).days or 1
+    total_budget = int(budget or 30000)
+    tier = "budget" if total_budget < 25000 else "luxury" if total_budget > 60000 else "mid"
+
+    log.warning("No hotels found from SerpAPI, generating fallback list", city=city)
+    FALLBACKS.inc(kind="fallback_hotels")
+    return [
+        Hotel(
+            id=f"fallback_hotel{i}",
+            name=f"Fallback Hotel {i+1}",
+            price=get_fallback_price(total_budget, num_days, tier),
+            price_fallback=True,
+            rating=None,
+            reviews=None,
+            location=f"{city}, India",
+            amenities=["Free WiFi", "AC Room", "Breakfast Included"],
+            thumbnail=f"https://via.placeholder.com/300x200?text=Hotel+{i+1}",
+            link="https://www.google.com/travel/hotels",
+        )
+        for i in range(5)
+    ]
+
+
+async def prewarm_hotels_async(city, checkin_date, checkout_date, refresh_at=0.5):
+    """
+    Keeps a hotel search warm for interactive requests (see _prewarm_async).
+    """
+    return await _prewarm_async(_hotel_params(city, checkin_date, checkout_date), refresh_at)
 
 
-def search_hotels(city, checkin_date, checkout_date, budget=None, travelers=None, hotel_affordability="medium"):
+async def search_hotels_async(city, checkin_date, checkout_date, budget=None, travelers=None, hotel_affordability="medium"):
+    """
+    Hotel listings for a city and stay (cached SerpAPI google_hotels search),
+    or canned fallback hotels when the search has none.
+    """
     try:
-        print("🏨 Searching hotels using SerpAPI...")
-
-        date1 = datetime.strptime(checkin_date, "%Y-%m-%d")
-        date2 = datetime.strptime(checkout_date, "%Y-%m-%d")
-        num_days = (date2 - date1).days or 1
-        total_budget = int(budget or 30000)
-
-        tier = "budget" if total_budget < 25000 else "luxury" if total_budget > 60000 else "mid"
-        affordability = hotel_affordability or "medium"
-
-        params = {
-            "engine": "google_hotels",
-            "q": f"hotels in {city}",
-            "check_in_date": checkin_date,
-            "check_out_date": checkout_date,
-            "currency": "INR",
-            "gl": "in",
-            "hl": "en",
-            "api_key": SERPAPI_API_KEY,
-        }
-
-        if budget:
-            params["max_price"] = budget
-        if travelers:
-            params["adults"] = travelers
-
-        response = requests.get("https://serpapi.com/search", params=params, timeout=10)
-        data = response.json()
-
-        print("📦 SerpAPI Raw Hotel Response Received.")
-        print("🔄 Quota Remaining:", response.headers.get("x-search-quota-remaining", "Unknown"))
-
-        hotels = (
-            data.get("properties")
-            or data.get("hotel_results")
-            or data.get("organic_results")
-            or []
-        )
+        log.info("Searching hotels", city=city, checkin=checkin_date, checkout=checkout_date)
 
-        parsed_hotels = []
-        for i, h in enumerate(hotels):
-            name = h.get("name", f"Hotel {i+1}")
-            serp_price = h.get("price", {}).get("lead", {}).get("formatted") or h.get("price")
-            rating = h.get("rating", round(random.uniform(3.2, 4.8), 1))
-            reviews = h.get("reviews", f"{random.randint(80, 400)}+ reviews")
-            location = h.get("address") or h.get("location") or f"{city}, India"
-            thumbnail = h.get("thumbnail") or h.get("image") or f"https://via.placeholder.com/300x200?text=Hotel+{i+1}"
-            link = h.get("link") or h.get("booking_link") or "https://www.google.com/travel/hotels"
-            amenities = h.get("amenities", ["Free WiFi", "Breakfast Included"])
-
-            if serp_price:
-                price = serp_price
-                price_fallback = False
-            else:
-                name_lower = name.lower()
-                if any(word in name_lower for word in ["oyo", "lodge", "hostel", "dorm"]):
-                    min_p, max_p = 500, 1400
-                elif any(word in name_lower for word in ["resort", "marriott", "hilton", "luxury", "premium"]):
-                    min_p, max_p = 4000, 8000
-                elif rating >= 4.3:
-                    min_p, max_p = 3500, 6000
-                elif rating >= 3.8:
-                    min_p, max_p = 2200, 4000
-                else:
-                    min_p, max_p = 1500, 2500
-
-                if affordability == "low":
-                    max_p = int(max_p * 0.7)
-                    min_p = int(min_p * 0.7)
-                elif affordability == "high":
-                    max_p = int(max_p * 1.3)
-                    min_p = int(min_p * 1.1)
-
-                price = f"₹{random.randint(min_p, max_p)}"
-                price_fallback = True
-
-            hotel = {
-                "id": f"hotel{i}",
-                "name": name,
-                "price": price,
-                "priceFallback": price_fallback,
-                "rating": rating,
-                "reviews": reviews,
-                "location": location,
-                "amenities": amenities,
-                "thumbnail": thumbnail,
-                "link": link,
-            }
-
-            parsed_hotels.append(hotel)
-
-        if not parsed_hotels:
-            print("⚠️ No hotels found from SerpAPI. Generating fallback list...")
-            for i in range(5):
-                parsed_hotels.append({
-                    "id": f"fallback_hotel{i}",
-                    "name": f"Fallback Hotel {i+1}",
-                    "price": get_fallback_price(total_budget, num_days, tier),
-                    "priceFallback": True,
-                    "rating": round(random.uniform(3.3, 4.6), 1),
-                    "reviews": f"{random.randint(100, 500)}+ reviews",
-                    "location": f"{city}, India",
-                    "amenities": ["Free WiFi", "AC Room", "Breakfast Included"],
-                    "thumbnail": f"https://via.placeholder.com/300x200?text=Hotel+{i+1}",
-                    "link": "https://www.google.com/travel/hotels",
-                })
-
-        print(f" Total parsed hotels returned: {len(parsed_hotels)}")
-        return parsed_hotels
-
-    except requests.exceptions.RequestException as e:
-        print(" SerpAPI Hotel Request Failed:", e)
+        params = _hotel_params(city, checkin_date, checkout_date, budget, travelers)
+        data = await _cached_search_async(params)
+
+        return _parse_hotels(data, city, checkin_date, checkout_date, budget, hotel_affordability)
+
+    except httpx.HTTPError as e:
+        log.error("SerpAPI hotel request failed", error=e)
         return []
-    except Exception as e:
-        print(" Unexpected Error While Fetching Hotels:", e)
+    except Exception:
+        log.exception("Unexpected error while fetching hotels")
         return []
+
+
+def encode_hotel_cursor(position):
+    """
+    (page_token, offset, index) → opaque URL-safe cursor (None stays None).
+    """
+    if position is None:
+        return None
+    raw = json.dumps(list(position), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_hotel_cursor(cursor):
+    """
+    Inverse of encode_hotel_cursor; raises ValueError for a malformed cursor.
+    """
+    try:
+        token, offset, index = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError("Invalid cursor") from None
+    if (token is not None and not isinstance(token, str)) or not isinstance(offset, int) or not isinstance(index, int) \
+            or offset < 0 or index < 0:
+        raise ValueError("Invalid cursor")
+    return token, offset, index
+
+
+async def iter_hotels_async(city, checkin_date, checkout_date, budget=None, travelers=None,
+                            hotel_affordability="medium", position=None, max_pages=HOTEL_MAX_PAGES):
+    """
+    Lazy hotel search: yields (Hotel, next_position) one property at a time.
+    - Properties are parsed only as they are consumed
+    - The next SerpAPI page (next_page_token) is fetched only when the consumer
+      iterates past the current one, for at most `max_pages` pages
+    - `position` (page_token, offset, index) resumes a previous scan; each
+      next_position resumes right after its hotel, None at the end of results
+    Pages go through the search cache like any other search; upstream errors propagate.
+    """
+    token, offset, index = position or (None, 0, 0)
+    affordability = hotel_affordability or "medium"
+
+    for _ in range(max_pages):
+        params = _hotel_params(city, checkin_date, checkout_date, budget, travelers)
+        if token:
+            params["next_page_token"] = token
+        data = await _cached_search_async(params)
+        properties = _hotel_properties(data)
+        next_token = (data.get("serpapi_pagination") or {}).get("next_page_token")
+
+        for o in range(offset, len(properties)):
+            hotel = _parse_hotel(properties[o], index, city, affordability)
+            index += 1
+            if o + 1 < len(properties):
+                next_position = (token, o + 1, index)
+            else:
+                next_position = (next_token, 0, index) if next_token else None
+            yield hotel, next_position
+
+        if not next_token or not properties:
+            return
+        token, offset = next_token, 0
+
+
+def _meets(hotel, max_price, min_rating):
+    return (max_price is None or hotel.price <= max_price) and (
+        min_rating is None or (hotel.rating is not None and hotel.rating >= min_rating)
+    )
+
+
+async def find_hotels_async(city, checkin_date, checkout_date, want, max_price=None, min_rating=None,
+                            max_pages=1, enough=None, hotel_affordability="medium"):
+    """
+    Scans hotels lazily until `want` of them meet the filters (nightly price
+    <= max_price, rating >= min_rating) or `max_pages` pages are used up.
+    With `enough`, a further page is fetched only while fewer than `enough` match.
+    Returns the matches, topped up to `want` with the others in SerpAPI order.
+    """
+    enough = want if enough is None else enough
+    matches, others = [], []
+    results = iter_hotels_async(city, checkin_date, checkout_date, hotel_affordability=hotel_affordability, max_pages=max_pages)
+    async with aclosing(results):
+        async for hotel, next_position in results:
+            (matches if _meets(hotel, max_price, min_rating) else others).append(hotel)
+            if len(matches) >= want:
+                break
+            page_done = next_position is not None and next_position[1] == 0
+            if page_done and len(matches) >= enough:
+                break
+    log.info("Found hotels", city=city, matches=len(matches), scanned=len(matches) + len(others))
+    return matches + others[:max(want - len(matches), 0)]
+
+
+async def page_hotels_async(city, checkin_date, checkout_date, limit, cursor=None, max_price=None, min_rating=None,
+                            max_pages=2):
+    """
+    One page of a cursor-paginated hotel search: up to `limit` hotels meeting the
+    filters, plus the cursor to continue from (None when results are exhausted).
+    A call scans at most `max_pages` SerpAPI pages, so a page can come back short
+    with a cursor when the filters are selective. Raises ValueError for a bad cursor.
+    """
+    position = decode_hotel_cursor(cursor) if cursor else None
+    hotels, next_position, scanned = [], None, False
+    results = iter_hotels_async(city, checkin_date, checkout_date, position=position, max_pages=max_pages)
+    async with aclosing(results):
+        async for hotel, next_position in results:
+            scanned = True
+            if _meets(hotel, max_price, min_rating):
+                hotels.append(hotel)
+                if len(hotels) >= limit:
+                    break
+    return hotels, encode_hotel_cursor(next_position if scanned else None)
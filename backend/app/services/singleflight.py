@@ -0,0 +1,65 @@
+import asyncio
+from app.services.metrics import track_fallbacks, note_fallbacks
+
+_groups = {}
+
+
+async def _tracked(fn):
+    """
+    Runs fn() and returns (result, fallback kinds it took), so the kinds reach
+    every caller sharing the result, not just the one whose context ran it.
+    """
+    fallbacks = track_fallbacks()
+    result = await fn()
+    return result, frozenset(fallbacks)
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical calls into one in-flight upstream call.
+
+    Callers asking for a key that is already being fetched wait for that
+    fetch and all receive its result (or its exception).
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.coalesced = 0
+        self._tasks = {}
+        _groups[name] = self
+
+    async def do_async(self, key, fn):
+        """
+        Awaits fn() once per key at a time. The shared call runs as its own
+        task, so a caller being cancelled does not cancel it for the others.
+        Fallbacks taken by the shared call are noted on every caller's request.
+        """
+        self.calls += 1
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(_tracked(fn))
+            self._tasks[key] = task
+            task.add_done_callback(lambda t, key=key: self._forget(key, t))
+        else:
+            self.coalesced += 1
+        result, fallbacks = await asyncio.shield(task)
+        note_fallbacks(fallbacks)
+        return result
+
+    def _forget(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved; callers already got it
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._tasks),
+        }
+
+
+def singleflight_stats():
+    return {name: group.stats() for name, group in _groups.items()}
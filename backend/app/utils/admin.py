@@ -0,0 +1,15 @@
+import os
+import hmac
+from fastapi import Header, HTTPException
+
+# 🔐 Operator-only endpoints (deleting stored plans, forcing expiry) need an
+# X-Admin-Token header matching RAAHI_ADMIN_TOKEN; unset, they are disabled.
+ADMIN_TOKEN = os.getenv("RAAHI_ADMIN_TOKEN")
+
+
+def require_admin(x_admin_token: str = Header(None)):
+    """
+    FastAPI dependency: 403 unless the request carries the admin token.
+    """
+    if not ADMIN_TOKEN or not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
@@ -0,0 +1,126 @@
+import os
+import gzip
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+from app.services.metrics import RESPONSE_BYTES
+
+# 🗜️ Negotiated response compression (br when available, else gzip) for
+# complete bodies above a size threshold. Streamed responses (NDJSON/SSE)
+# pass through untouched so events still arrive as they are produced.
+COMPRESS_MIN_BYTES = int(os.getenv("RAAHI_COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript")
+
+
+def _accepted(header: str) -> dict:
+    """
+    Accept-Encoding → {coding: q}.
+    """
+    codings = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            codings[name.lower()] = q
+    return codings
+
+
+def choose_encoding(header: str):
+    codings = _accepted(header or "")
+    wildcard = codings.get("*", 0.0)
+    options = (["br"] if brotli is not None else []) + ["gzip"]
+    best, best_q = None, 0.0
+    for coding in options:
+        q = codings.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware: compresses single-message responses of a compressible
+    type that are at least `minimum_size` bytes, when the client accepts it.
+    A strong ETag becomes weak, since the bytes on the wire change.
+    """
+
+    def __init__(self, app, minimum_size=COMPRESS_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        accept = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept)
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if start is None:
+                return await send(message)
+
+            pending, start = start, None
+            body = message.get("body", b"")
+            if message.get("more_body") or not self._should_compress(pending["headers"], body):
+                await send(pending)
+                return await send(message)
+
+            compressed = compress(body, encoding)
+            RESPONSE_BYTES.inc(len(body), encoding=encoding, kind="raw")
+            RESPONSE_BYTES.inc(len(compressed), encoding=encoding, kind="sent")
+            headers = [
+                (k, v) for k, v in pending["headers"] if k not in (b"content-length", b"etag")
+            ] + [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+                (b"vary", b"Accept-Encoding"),
+            ]
+            etag = next((v for k, v in pending["headers"] if k == b"etag"), None)
+            if etag is not None:
+                headers.append((b"etag", etag if etag.startswith(b"W/") else b"W/" + etag))
+            await send({**pending, "headers": headers})
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _should_compress(self, headers, body) -> bool:
+        if len(body) < self.minimum_size:
+            return False
+        content_type = b""
+        for name, value in headers:
+            if name == b"content-encoding":
+                return False
+            if name == b"content-type":
+                content_type = value
+        content_type = content_type.decode("latin-1")
+        return content_type.startswith(COMPRESSIBLE_TYPES)
@@ -1,89 +1,13 @@
-iata_map = {
-    "Delhi": "DEL",
-    "New Delhi": "DEL",
-    "Mumbai": "BOM",
-    "Bombay": "BOM",
-    "Chennai": "MAA",
-    "Madras": "MAA",
-    "Kolkata": "CCU",
-    "Calcutta": "CCU",
-    "Bangalore": "BLR",
-    "Bengaluru": "BLR",
-    "Hyderabad": "HYD",
-    "Goa": "GOI",
-    "Panaji": "GOI",
-    "Panjim": "GOI",
-    "Cochin": "COK",
-    "Kochi": "COK",
-    "Ahmedabad": "AMD",
-    "Pune": "PNQ",
-    "Jaipur": "JAI",
-    "Lucknow": "LKO",
-    "Guwahati": "GAU",
-    "Varanasi": "VNS",
-    "Indore": "IDR",
-    "Patna": "PAT",
-    "Nagpur": "NAG",
-    "Surat": "STV",
-    "Chandigarh": "IXC",
-    "Bhopal": "BHO",
-    "Raipur": "RPR",
-    "Ranchi": "IXR",
-    "Bhubaneswar": "BBI",
-    "Visakhapatnam": "VTZ",
-    "Vizag": "VTZ",
-    "Coimbatore": "CJB",
-    "Trivandrum": "TRV",
-    "Thiruvananthapuram": "TRV",
-    "Madurai": "IXM",
-    "Amritsar": "ATQ",
-    "Srinagar": "SXR",
-    "Jammu": "IXJ",
-    "Dehradun": "DED",
-    "Agra": "AGR",
-    "Kanpur": "KNU",
-    "Mangalore": "IXE",
-    "Tiruchirappalli": "TRZ",
-    "Trichy": "TRZ",
-    "Vadodara": "BDQ",
-    "Rajkot": "RAJ",
-    "Jodhpur": "JDH",
-    "Udaipur": "UDR",
-    "Aurangabad": "IXU",
-    "Gaya": "GAY",
-    "Jabalpur": "JLR",
-    "Leh": "IXL",
-    "Imphal": "IMF",
-    "Aizawl": "AJL",
-    "Shillong": "SHL",
-    "Dimapur": "DMU",
-    "Agartala": "IXA",
-    "Silchar": "IXS",
-    "Dibrugarh": "DIB",
-    "Port Blair": "IXZ",
-    "Andaman": "IXZ",
-    "Tezpur": "TEZ",
-    "Tuticorin": "TCR",
-    "Hubli": "HBX",
-    "Belgaum": "IXG",
-    "Kolhapur": "KLH",
-    "Jamnagar": "JGA",
-    "Bhavnagar": "BHU",
-    "Kandla": "IXY",
-    "Diu": "DIU",
-    "Pondicherry": "PNY",
-    "Pasighat": "IXT",
-    "Kullu": "KUU",
-    "Pantnagar": "PGH",
-    "Bhuj": "BHJ",
-    "Shirdi": "SAG",
-    "Sindhudurg": "SDW",
-    "Jorhat": "JRH",
-    "Zero": "ZER",
-    "Lilabari": "IXI",
-    "Kishangarh": "KQH",
-    "Rupsi": "RUP"
-}
+from app.utils.location_index import location_index, resolve_airport
 
-def get_iata_code(city_name: str) -> str:
-    return iata_map.get(city_name.strip().title(), city_name.strip().upper())
+# City name / alias → IATA, derived from the shared location index
+iata_map = location_index.name_to_iata()
+
+def get_iata_code(city_name: str):
+    """
+    IATA code for flight searches, or None when the place has no known airport.
+    """
+    try:
+        return resolve_airport(city_name)
+    except ValueError:
+        return None
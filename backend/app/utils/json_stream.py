@@ -0,0 +1,84 @@
+import json
+
+
+class JSONArrayStream:
+    """
+    Incremental parser for a JSON array that arrives in chunks (e.g. an LLM stream).
+
+    Feed it text as it comes in; every time an element of the first top-level
+    array is complete, it is parsed and returned. Text before the array
+    (prose, ```json fences) is skipped, and so is anything after it.
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0
+        self._depth = 0          # 0 = before the array, 1 = inside it, >1 = inside an element
+        self._elem_start = None
+        self._in_string = False
+        self._escape = False
+        self.done = False
+        self.errors = 0
+
+    def feed(self, chunk: str) -> list:
+        if self.done or not chunk:
+            return []
+
+        self._buf += chunk
+        items = []
+        buf = self._buf
+        i = self._pos
+        n = len(buf)
+
+        while i < n:
+            ch = buf[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+
+            elif self._depth == 0:
+                if ch == "[":
+                    self._depth = 1
+
+            elif ch == '"':
+                self._in_string = True
+
+            elif ch in "{[":
+                self._depth += 1
+                if self._depth == 2:
+                    self._elem_start = i
+
+            elif ch in "}]":
+                if self._depth == 1:
+                    # closing bracket of the top-level array
+                    self.done = True
+                    i += 1
+                    break
+                self._depth -= 1
+                if self._depth == 1:
+                    items.extend(self._emit(buf[self._elem_start:i + 1]))
+                    self._elem_start = None
+
+            i += 1
+
+        # Drop text that can no longer be part of an element
+        if self._elem_start is None:
+            self._buf = ""
+            self._pos = 0
+        else:
+            self._buf = buf[self._elem_start:]
+            self._pos = i - self._elem_start
+            self._elem_start = 0
+        return items
+
+    def _emit(self, text):
+        try:
+            return [json.loads(text)]
+        except json.JSONDecodeError:
+            self.errors += 1
+            return []
@@ -0,0 +1,146 @@
+import json
+import threading
+from functools import lru_cache
+from typing import List
+from pydantic import TypeAdapter, ValidationError
+from app.services.metrics import PARSE_ATTEMPTS, PARSE_FAILURES
+
+# 🧩 JSON-mode helpers for Gemini: response schemas derived from pydantic
+# models, and a tolerant parser that validates replies against them.
+MAX_ERROR_CHARS = 300
+
+# Keys of the JSON Schema subset Gemini accepts in responseSchema
+_SCHEMA_KEYS = ("description", "enum", "format", "minItems", "maxItems")
+
+_parse_stats = {}
+_stats_lock = threading.Lock()
+
+
+class ReplyParseError(ValueError):
+    pass
+
+
+def _to_gemini_schema(node, defs):
+    if "$ref" in node:
+        return _to_gemini_schema(defs[node["$ref"].rsplit("/", 1)[-1]], defs)
+
+    if "anyOf" in node:
+        options = [opt for opt in node["anyOf"] if opt.get("type") != "null"]
+        schema = _to_gemini_schema(options[0], defs)
+        if len(options) < len(node["anyOf"]):
+            schema["nullable"] = True
+        return schema
+
+    schema = {"type": node["type"].upper()}
+    for key in _SCHEMA_KEYS:
+        if key in node:
+            schema[key] = node[key]
+
+    if node["type"] == "object":
+        properties = node.get("properties", {})
+        schema["properties"] = {name: _to_gemini_schema(prop, defs) for name, prop in properties.items()}
+        schema["propertyOrdering"] = list(properties)
+        if node.get("required"):
+            schema["required"] = node["required"]
+    elif node["type"] == "array":
+        schema["items"] = _to_gemini_schema(node["items"], defs)
+    return schema
+
+
+def response_schema(model, many=False) -> dict:
+    """
+    Gemini responseSchema for a pydantic model (or a list of them): refs are
+    inlined and keys Gemini rejects (title, default, $defs) are dropped.
+    """
+    node = model.model_json_schema()
+    defs = node.get("$defs", {})
+    if many:
+        node = {"type": "array", "items": node}
+    return _to_gemini_schema(node, defs)
+
+
+@lru_cache(maxsize=None)
+def json_mode(model, many=False) -> dict:
+    """
+    generation_config asking Gemini for JSON matching `model` (shared, do not mutate).
+    """
+    return {"responseMimeType": "application/json", "responseSchema": response_schema(model, many)}
+
+
+@lru_cache(maxsize=None)
+def _adapter(model, many):
+    return TypeAdapter(List[model] if many else model)
+
+
+def extract_json(text: str, many=False):
+    """
+    Decodes the first JSON object (or array, with many=True) in `text`.
+    A clean JSON-mode reply is decoded directly; otherwise leading prose and
+    ```json fences are skipped and trailing text is ignored, retrying from the
+    next opening bracket only when a stray one precedes the real payload.
+    """
+    opener = "[" if many else "{"
+    text = text.strip()
+    if text.startswith(opener):
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            pass
+
+    decoder = json.JSONDecoder()
+    start = text.find(opener)
+    error = None
+    while start != -1:
+        try:
+            return decoder.raw_decode(text, start)[0]
+        except json.JSONDecodeError as e:
+            error = error or e
+            start = text.find(opener, start + 1)
+    raise ReplyParseError(f"no valid JSON {'array' if many else 'object'} found" + (f" ({error})" if error else ""))
+
+
+def parse_reply(text: str, model, many=False):
+    """
+    Extracts and validates a reply against `model`. Returns plain dicts (a list
+    with many=True); raises ReplyParseError with a short, prompt-safe message.
+    """
+    value = extract_json(text, many)
+    adapter = _adapter(model, many)
+    try:
+        parsed = adapter.validate_python(value)
+    except ValidationError as e:
+        problems = "; ".join(f"{'.'.join(map(str, err['loc'])) or 'reply'}: {err['msg']}" for err in e.errors())
+        raise ReplyParseError(problems[:MAX_ERROR_CHARS]) from None
+    return adapter.dump_python(parsed)
+
+
+def validate_item(model, value):
+    """
+    Validates one streamed element; returns it as a dict, or None if it does not fit.
+    """
+    try:
+        return model.model_validate(value).model_dump()
+    except ValidationError:
+        return None
+
+
+def record_parse(parser, ok, repaired=False, count=1):
+    """
+    Counts parse attempts/failures per parser (failure rate = failures / attempts).
+    """
+    PARSE_ATTEMPTS.inc(count, parser=parser)
+    if not ok:
+        PARSE_FAILURES.inc(count, parser=parser)
+    with _stats_lock:
+        stats = _parse_stats.setdefault(parser, {"attempts": 0, "failures": 0, "repaired": 0})
+        stats["attempts"] += count
+        stats["failures"] += 0 if ok else count
+        stats["repaired"] += repaired
+
+
+def parse_stats():
+    with _stats_lock:
+        return {
+            parser: {**stats, "failure_rate": round(stats["failures"] / stats["attempts"], 4) if stats["attempts"] else 0.0}
+            for parser, stats in _parse_stats.items()
+        }
@@ -0,0 +1,236 @@
+import re
+import unicodedata
+
+# 📍 Single source of truth for supported airports: (IATA, city, aliases)
+LOCATIONS = [
+    ("DEL", "New Delhi", ["Delhi"]),
+    ("BOM", "Mumbai", ["Bombay"]),
+    ("MAA", "Chennai", ["Madras"]),
+    ("CCU", "Kolkata", ["Calcutta"]),
+    ("BLR", "Bangalore", ["Bengaluru"]),
+    ("HYD", "Hyderabad", []),
+    ("GOI", "Goa", ["Panaji", "Panjim"]),
+    ("COK", "Kochi", ["Cochin"]),
+    ("AMD", "Ahmedabad", []),
+    ("PNQ", "Pune", []),
+    ("JAI", "Jaipur", []),
+    ("LKO", "Lucknow", []),
+    ("GAU", "Guwahati", []),
+    ("VNS", "Varanasi", ["Banaras", "Benares"]),
+    ("IDR", "Indore", []),
+    ("PAT", "Patna", []),
+    ("NAG", "Nagpur", []),
+    ("STV", "Surat", []),
+    ("IXC", "Chandigarh", []),
+    ("BHO", "Bhopal", []),
+    ("RPR", "Raipur", []),
+    ("IXR", "Ranchi", []),
+    ("BBI", "Bhubaneswar", []),
+    ("VTZ", "Visakhapatnam", ["Vizag"]),
+    ("CJB", "Coimbatore", []),
+    ("TRV", "Thiruvananthapuram", ["Trivandrum"]),
+    ("IXM", "Madurai", []),
+    ("ATQ", "Amritsar", []),
+    ("SXR", "Srinagar", []),
+    ("IXJ", "Jammu", []),
+    ("DED", "Dehradun", []),
+    ("AGR", "Agra", []),
+    ("KNU", "Kanpur", []),
+    ("IXE", "Mangalore", ["Mangaluru"]),
+    ("TRZ", "Tiruchirappalli", ["Trichy"]),
+    ("BDQ", "Vadodara", ["Baroda"]),
+    ("RAJ", "Rajkot", []),
+    ("JDH", "Jodhpur", []),
+    ("UDR", "Udaipur", []),
+    ("IXU", "Aurangabad", []),
+    ("GAY", "Gaya", []),
+    ("JLR", "Jabalpur", []),
+    ("IXL", "Leh", []),
+    ("IMF", "Imphal", []),
+    ("AJL", "Aizawl", []),
+    ("SHL", "Shillong", []),
+    ("DMU", "Dimapur", []),
+    ("IXA", "Agartala", []),
+    ("IXS", "Silchar", []),
+    ("DIB", "Dibrugarh", []),
+    ("IXZ", "Port Blair", ["Andaman"]),
+    ("TEZ", "Tezpur", []),
+    ("TCR", "Tuticorin", []),
+    ("HBX", "Hubli", ["Hubballi"]),
+    ("IXG", "Belgaum", ["Belagavi"]),
+    ("KLH", "Kolhapur", []),
+    ("JGA", "Jamnagar", []),
+    ("BHU", "Bhavnagar", []),
+    ("IXY", "Kandla", []),
+    ("DIU", "Diu", []),
+    ("PNY", "Pondicherry", ["Puducherry"]),
+    ("IXT", "Pasighat", []),
+    ("KUU", "Kullu", []),
+    ("PGH", "Pantnagar", []),
+    ("BHJ", "Bhuj", []),
+    ("SAG", "Shirdi", []),
+    ("SDW", "Sindhudurg", []),
+    ("JRH", "Jorhat", []),
+    ("ZER", "Zero", []),
+    ("IXI", "Lilabari", []),
+    ("KQH", "Kishangarh", []),
+    ("RUP", "Rupsi", []),
+]
+
+# Fuzzy matches below this confidence are treated as unresolved
+MIN_CONFIDENCE = 0.6
+
+# A fuzzy match also needs every word of the query to resemble a word of the
+# matched name, so "Navi Mumbai" (another city) is not taken for Mumbai
+MIN_WORD_SIMILARITY = 0.3
+
+_NON_ALNUM = re.compile(r"[^a-z0-9 ]+")
+
+
+def normalize_name(text: str) -> str:
+    """
+    "  Bengalūru, India " → "bengaluru india"
+    """
+    text = unicodedata.normalize("NFKD", str(text or "")).encode("ascii", "ignore").decode()
+    return " ".join(_NON_ALNUM.sub(" ", text.lower()).split())
+
+
+def _trigrams(name: str):
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _dice(a: set, b: set) -> float:
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def _words_match(query_key: str, name_key: str) -> bool:
+    names = [_trigrams(word) for word in name_key.split()]
+    return all(
+        any(_dice(_trigrams(word), name) >= MIN_WORD_SIMILARITY for name in names)
+        for word in query_key.split()
+    )
+
+
+class LocationMatch:
+    __slots__ = ("iata", "city", "matched", "confidence")
+
+    def __init__(self, iata, city, matched, confidence):
+        self.iata = iata              # airport code
+        self.city = city              # canonical city name
+        self.matched = matched        # the name or alias that matched
+        self.confidence = confidence  # 1.0 for exact code/name/alias, < 1 for fuzzy
+
+    def dict(self):
+        return {"iata": self.iata, "city": self.city, "matched": self.matched, "confidence": round(self.confidence, 2)}
+
+
+class LocationIndex:
+    """
+    Bidirectional city ⇄ IATA index, built once:
+    - exact lookups by IATA code, city name or alias (case/accent-insensitive)
+    - fuzzy lookups via a trigram inverted index scored by Dice similarity
+    """
+
+    def __init__(self, locations):
+        self.city_by_iata = {}
+        self._names = {}       # normalized name/alias → (iata, display name)
+        self._grams = {}       # normalized name → trigram set
+        self._postings = {}    # trigram → normalized names containing it
+
+        for iata, city, aliases in locations:
+            self.city_by_iata[iata] = city
+            for name in [city, *aliases]:
+                key = normalize_name(name)
+                self._names[key] = (iata, name)
+                grams = _trigrams(key)
+                self._grams[key] = grams
+                for gram in grams:
+                    self._postings.setdefault(gram, []).append(key)
+
+    def name_to_iata(self):
+        return {name: iata for iata, name in self._names.values()}
+
+    def candidates(self, query: str, limit=3):
+        """
+        Best fuzzy matches for `query`, one per airport, highest confidence first.
+        """
+        key = normalize_name(query)
+        if not key:
+            return []
+        grams = _trigrams(key)
+
+        shared = {}
+        for gram in grams:
+            for name in self._postings.get(gram, ()):
+                shared[name] = shared.get(name, 0) + 1
+
+        best = {}
+        for name, overlap in shared.items():
+            confidence = 2 * overlap / (len(grams) + len(self._grams[name]))
+            iata, display = self._names[name]
+            if iata not in best or confidence > best[iata].confidence:
+                best[iata] = LocationMatch(iata, self.city_by_iata[iata], display, confidence)
+
+        return sorted(best.values(), key=lambda m: (-m.confidence, m.iata))[:limit]
+
+    def resolve(self, query: str, min_confidence=MIN_CONFIDENCE):
+        """
+        Resolves an IATA code, city name, alias or near-miss spelling.
+        Returns a LocationMatch, or None if nothing is confident enough or the
+        query has words the match does not account for.
+        """
+        raw = str(query or "").strip()
+        code = raw.upper()
+        if code in self.city_by_iata:
+            return LocationMatch(code, self.city_by_iata[code], code, 1.0)
+
+        key = normalize_name(raw)
+        if key in self._names:
+            iata, display = self._names[key]
+            return LocationMatch(iata, self.city_by_iata[iata], display, 1.0)
+
+        matches = self.candidates(raw, limit=1)
+        if matches and matches[0].confidence >= min_confidence and _words_match(key, normalize_name(matches[0].matched)):
+            return matches[0]
+        return None
+
+
+class LocationNotFound(ValueError):
+    def __init__(self, query, suggestions):
+        self.query = query
+        self.suggestions = suggestions
+        hint = f" Did you mean: {', '.join(m.city for m in suggestions)}?" if suggestions else ""
+        super().__init__(f"Unknown location '{query}'.{hint}")
+
+
+location_index = LocationIndex(LOCATIONS)
+
+
+def resolve_location(query: str) -> LocationMatch:
+    """
+    Like location_index.resolve, but raises LocationNotFound (with suggestions)
+    so callers can reject the input before any upstream call.
+    """
+    match = location_index.resolve(query)
+    if match is None:
+        raise LocationNotFound(query, location_index.candidates(query, limit=3))
+    return match
+
+
+def resolve_airport(query: str) -> str:
+    """
+    IATA code for a flight search: a code, city or alias from LOCATIONS, or a
+    near-miss spelling of one. Raises LocationNotFound otherwise, so unknown
+    codes never reach SerpAPI.
+    """
+    return resolve_location(query).iata
+
+
+def destination_city(query: str) -> str:
+    """
+    City name for hotel and itinerary lookups: the canonical name when the
+    place is known, otherwise the name as given (e.g. Manali, which has no airport).
+    """
+    match = location_index.resolve(query)
+    return match.city if match else str(query or "").strip()
@@ -0,0 +1,159 @@
+import os
+import sys
+import json
+import queue
+import atexit
+import random
+import logging
+import logging.handlers
+from app.utils.tracing import current_trace_id
+
+# 📝 Structured, non-blocking logging. Request code only enqueues records;
+# formatting (incl. truncation) and the stdout write happen on a background
+# listener thread, so a slow log sink never stalls a request.
+LOG_LEVEL = os.getenv("RAAHI_LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("RAAHI_LOG_FORMAT", "text")  # "text" or "json"
+MAX_FIELD_CHARS = int(os.getenv("RAAHI_LOG_MAX_FIELD_CHARS", "500"))
+QUEUE_SIZE = 10000
+# Default keep-rate for high-volume per-call lines (log.info(..., sample=HOT_PATH_SAMPLE))
+HOT_PATH_SAMPLE = float(os.getenv("RAAHI_LOG_SAMPLE", "0.1"))
+
+ROOT_LOGGER = "raahi"
+
+_listener = None
+_handler = None
+dropped = 0
+
+
+def truncate(value, limit=MAX_FIELD_CHARS):
+    text = value if isinstance(value, str) else repr(value)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}…(+{len(text) - limit} chars)"
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues records without formatting them; drops (and counts) records
+    when the queue is full instead of blocking the caller.
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        global dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            dropped += 1
+
+
+class _TextFormatter(logging.Formatter):
+    def format(self, record):
+        line = f"{self.formatTime(record, '%H:%M:%S')} {record.levelname:<7} {record.name}: {record.msg}"
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{k}={truncate(v)}" for k, v in fields.items())
+        trace_id = getattr(record, "trace_id", None)
+        if trace_id:
+            line += f" trace={trace_id}"
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+class _JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.msg,
+        }
+        trace_id = getattr(record, "trace_id", None)
+        if trace_id:
+            entry["trace_id"] = trace_id
+        for k, v in (getattr(record, "fields", None) or {}).items():
+            entry[k] = v if isinstance(v, (int, float, bool)) or v is None else truncate(v)
+        if record.exc_text:
+            entry["exc"] = truncate(record.exc_text, MAX_FIELD_CHARS * 4)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """
+    log.info("Message", key=value, ...) — keyword arguments become structured fields.
+    sample=0.1 keeps roughly 10% of that message (applied before the record is built).
+    """
+
+    def log(self, level, msg, *args, sample=None, exc_info=None, **fields):
+        if not self.logger.isEnabledFor(level):
+            return
+        if sample is not None and random.random() >= sample:
+            return
+        self.logger.log(
+            level, msg, *args, exc_info=exc_info,
+            extra={"fields": fields, "trace_id": current_trace_id()},
+        )
+
+    def debug(self, msg, *args, **kwargs):
+        self.log(logging.DEBUG, msg, *args, **kwargs)
+
+    def info(self, msg, *args, **kwargs):
+        self.log(logging.INFO, msg, *args, **kwargs)
+
+    def warning(self, msg, *args, **kwargs):
+        self.log(logging.WARNING, msg, *args, **kwargs)
+
+    def error(self, msg, *args, **kwargs):
+        self.log(logging.ERROR, msg, *args, **kwargs)
+
+    def exception(self, msg, *args, **kwargs):
+        self.log(logging.ERROR, msg, *args, exc_info=True, **kwargs)
+
+
+def setup_logging():
+    """
+    Installs the queue handler on the "raahi" logger and starts the listener
+    thread. Safe to call more than once.
+    """
+    global _listener, _handler
+    if _listener is not None:
+        return
+
+    sink = logging.StreamHandler(sys.stdout)
+    sink.setFormatter(_JSONFormatter() if LOG_FORMAT == "json" else _TextFormatter())
+
+    log_queue = queue.Queue(QUEUE_SIZE)
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(LOG_LEVEL)
+    _handler = _NonBlockingQueueHandler(log_queue)
+    root.addHandler(_handler)
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, sink, respect_handler_level=False)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """
+    Flushes queued records and stops the listener thread.
+    """
+    global _listener, _handler
+    if _listener is not None:
+        _listener.stop()
+        logging.getLogger(ROOT_LOGGER).removeHandler(_handler)
+        _listener = _handler = None
+
+
+def get_logger(name: str) -> StructuredLogger:
+    setup_logging()
+    short = name.rsplit(".", 1)[-1]
+    return StructuredLogger(logging.getLogger(f"{ROOT_LOGGER}.{short}"), {})
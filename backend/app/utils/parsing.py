@@ -0,0 +1,54 @@
+import re
+
+_DURATION_RE = re.compile(r"(?:(\d+)\s*h)?\s*(?:(\d+)\s*m)?")
+
+
+def parse_price(price) -> int:
+    """
+    "₹4,999" / "4999" / 4999 → 4999 (0 if there is no number).
+    """
+    if isinstance(price, (int, float)):
+        return int(price)
+    digits = re.sub(r"[^\d]", "", str(price or ""))
+    return int(digits) if digits else 0
+
+
+def parse_count(value) -> int:
+    """
+    "320+ reviews" / "1,204" / 87 → 320 / 1204 / 87.
+    """
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = re.search(r"\d[\d,]*", str(value or ""))
+    return int(match.group().replace(",", "")) if match else 0
+
+
+def parse_float(value, default=0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_duration_minutes(duration) -> int:
+    """
+    "2h 5m" / "2h" / "45m" / 125 → minutes.
+    """
+    if isinstance(duration, (int, float)):
+        return int(duration)
+    match = _DURATION_RE.fullmatch(str(duration).strip())
+    if not match or not any(match.groups()):
+        return 0
+    hours, minutes = match.groups()
+    return int(hours or 0) * 60 + int(minutes or 0)
+
+
+def parse_clock_minutes(clock) -> int:
+    """
+    "06:30" (or "2025-10-01 06:30") → minutes after midnight; noon if unparseable.
+    """
+    try:
+        hours, minutes = str(clock).strip()[-5:].split(":")
+        return int(hours) * 60 + int(minutes)
+    except ValueError:
+        return 12 * 60
@@ -0,0 +1,96 @@
+import heapq
+import threading
+
+# 🔢 Rough token estimate for Gemini prompts (~4 characters per token)
+CHARS_PER_TOKEN = 4
+
+# Candidate limits per prompt: how many rows to send and the token budget for the table
+PROMPT_LIMITS = {
+    "flight_agent": {"top_k": 8, "max_tokens": 500},
+    "hotel_agent": {"top_k": 5, "max_tokens": 400},
+    "hotel_ranking": {"top_k": 10, "max_tokens": 700},
+}
+
+MAX_CELL_CHARS = 60
+
+_token_stats = {}
+_stats_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def top_k(items, k, key=None, reverse=False):
+    """
+    The k best candidates, in order. With no key, keeps the incoming order.
+    """
+    if key is None:
+        return list(items[:k])
+    if reverse:
+        return heapq.nlargest(k, items, key=key)
+    return heapq.nsmallest(k, items, key=key)
+
+
+def _cell(value) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, (list, tuple)):
+        value = ", ".join(str(v) for v in value)
+    elif isinstance(value, dict):
+        value = ", ".join(f"{k}: {v}" for k, v in value.items())
+    text = " ".join(str(value).split()).replace("|", "/")
+    if len(text) > MAX_CELL_CHARS:
+        text = text[:MAX_CELL_CHARS - 1] + "…"
+    return text
+
+
+def encode_table(rows, columns, max_tokens=None) -> str:
+    """
+    Serializes rows (dicts or records) as a compact pipe-separated table: one
+    header line with the column names, then one line per row. Rows that would
+    push the table over `max_tokens` are dropped.
+    """
+    lines = ["|".join(columns)]
+    used = estimate_tokens(lines[0]) + 1
+
+    for row in rows:
+        get = row.get if isinstance(row, dict) else lambda col: getattr(row, col, None)
+        line = "|".join(_cell(get(col)) for col in columns)
+        cost = estimate_tokens(line) + 1
+        if max_tokens is not None and used + cost > max_tokens and len(lines) > 1:
+            break
+        lines.append(line)
+        used += cost
+
+    return "\n".join(lines)
+
+
+def encode_candidates(agent, rows, columns, key=None, reverse=False):
+    """
+    Pre-filters rows to the agent's top-K and encodes them under its token budget.
+    """
+    limits = PROMPT_LIMITS[agent]
+    candidates = top_k(rows, limits["top_k"], key=key, reverse=reverse)
+    return encode_table(candidates, columns, limits["max_tokens"])
+
+
+def record_prompt_tokens(agent, prompt: str) -> int:
+    """
+    Records the (estimated) prompt size sent by an agent; returns the estimate.
+    """
+    tokens = estimate_tokens(prompt)
+    with _stats_lock:
+        stats = _token_stats.setdefault(agent, {"prompts": 0, "tokens": 0, "max_tokens": 0})
+        stats["prompts"] += 1
+        stats["tokens"] += tokens
+        stats["max_tokens"] = max(stats["max_tokens"], tokens)
+    return tokens
+
+
+def prompt_token_stats():
+    with _stats_lock:
+        return {
+            agent: {**stats, "avg_tokens": stats["tokens"] // max(stats["prompts"], 1)}
+            for agent, stats in _token_stats.items()
+        }
@@ -0,0 +1,89 @@
+import json
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+# 📦 Response serialization and field projection for API payloads.
+# Upper bound for `limit=` query parameters
+MAX_LIMIT = 500
+
+
+def dumps(value) -> bytes:
+    """
+    Compact UTF-8 JSON: orjson when installed, the stdlib json module otherwise.
+    """
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with dumps() (the app's default response class).
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def parse_fields(fields: str) -> dict:
+    """
+    "flights.price,flights.airline,itinerary" → {"flights": {"price": None, "airline": None}, "itinerary": None}.
+    None keeps the whole value.
+    """
+    tree = {}
+    for path in fields.split(","):
+        parts = [part for part in path.strip().split(".") if part]
+        if not parts:
+            continue
+        node = tree
+        for part in parts[:-1]:
+            if part in node and node[part] is None:
+                break
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = None
+    return tree
+
+
+def select(value, tree):
+    """
+    Keeps only the fields in `tree`, applied to every element of lists.
+    """
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [select(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {key: select(value[key], sub) for key, sub in tree.items() if key in value}
+    return value
+
+
+def project(value, fields=None, limit=None, keep=()):
+    """
+    Applies `fields=`/`limit=` query parameters to a response:
+    - a list is capped at `limit` items and each item projected
+    - a dict has each list-valued section capped, and is projected with
+      dotted paths (section.field); keys in `keep` always survive
+    """
+    if limit is not None:
+        if isinstance(value, list):
+            value = value[:limit]
+        elif isinstance(value, dict):
+            value = {key: item[:limit] if isinstance(item, list) else item for key, item in value.items()}
+
+    tree = parse_fields(fields) if fields else None
+    if tree:
+        if isinstance(value, dict):
+            tree.update({key: None for key in keep if key in value})
+        value = select(value, tree)
+    return value
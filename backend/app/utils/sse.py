@@ -0,0 +1,34 @@
+from app.utils.responses import dumps
+
+
+def format_sse(data, event=None) -> str:
+    """
+    Formats one server-sent event; `data` is JSON-encoded on a single line.
+    """
+    message = f"data: {dumps(data).decode('utf-8')}\n\n"
+    if event:
+        message = f"event: {event}\n" + message
+    return message
+
+
+def format_ndjson(data, event=None) -> str:
+    """
+    Formats one newline-delimited JSON record, wrapped as {"event", "data"} when an event name is given.
+    """
+    record = {"event": event, "data": data} if event else data
+    return dumps(record).decode("utf-8") + "\n"
+
+
+def format_event(data, event=None, fmt="ndjson") -> str:
+    return format_sse(data, event) if fmt == "sse" else format_ndjson(data, event)
+
+
+STREAM_MEDIA_TYPES = {
+    "sse": "text/event-stream",
+    "ndjson": "application/x-ndjson",
+}
+
+STREAM_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # keep proxies (nginx) from buffering the stream
+}
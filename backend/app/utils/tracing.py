@@ -0,0 +1,48 @@
+import uuid
+import threading
+import contextvars
+from collections import OrderedDict
+
+# 🧵 Per-request trace ID, set by the HTTP middleware and inherited by every
+# task and stage the request starts
+trace_id_var = contextvars.ContextVar("trace_id", default=None)
+
+TRACE_HEADER = "X-Trace-Id"
+MAX_TRACES = 256
+MAX_SPANS_PER_TRACE = 200
+
+_traces = OrderedDict()
+_lock = threading.Lock()
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def current_trace_id():
+    return trace_id_var.get()
+
+
+def record_span(name, seconds, **attrs):
+    """
+    Adds a timed span to the current request's trace (no-op outside a request).
+    Only the most recent MAX_TRACES traces are kept.
+    """
+    trace_id = trace_id_var.get()
+    if trace_id is None:
+        return
+    span = {"name": name, "ms": round(seconds * 1000, 2), **attrs}
+    with _lock:
+        spans = _traces.get(trace_id)
+        if spans is None:
+            spans = _traces[trace_id] = []
+            while len(_traces) > MAX_TRACES:
+                _traces.popitem(last=False)
+        if len(spans) < MAX_SPANS_PER_TRACE:
+            spans.append(span)
+
+
+def get_trace(trace_id):
+    with _lock:
+        spans = _traces.get(trace_id)
+        return list(spans) if spans is not None else None
@@ -0,0 +1,173 @@
+"""
+Load driver for the backend: runs each scenario at a target concurrency and
+reports latency percentiles, throughput and errors.
+
+    python -m bench.load --base-url http://127.0.0.1:8000 --concurrency 16 --requests 200 --out baseline.json
+    python -m bench.load ... --compare baseline.json --tolerance 0.15
+
+With --compare, exits non-zero if any scenario's p95 or RPS regressed by
+more than the tolerance.
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+from datetime import date, timedelta
+import httpx
+
+CITIES = ["Delhi", "Mumbai", "Goa", "Bangalore", "Jaipur", "Kochi", "Chennai", "Kolkata"]
+
+
+def _dates(i, distinct):
+    start = date(2025, 11, 1) + timedelta(days=i % distinct)
+    return start.isoformat(), (start + timedelta(days=3)).isoformat()
+
+
+def plan_body(i, distinct):
+    depart, ret = _dates(i, distinct)
+    origin, dest = random.sample(CITIES, 2) if distinct > 1 else ("Delhi", "Goa")
+    return {
+        "from_": origin, "to": dest, "departureDate": depart, "returnDate": ret,
+        "travelClass": "Economy", "budget": "₹25,000 - ₹60,000", "travelers": "Couple",
+        "interests": ["beaches", "food"], "diet": "vegetarian",
+    }
+
+
+def itinerary_body(i, distinct):
+    depart, ret = _dates(i, distinct)
+    return {"to": "Goa", "departureDate": depart, "returnDate": ret, "interests": ["beaches"], "travelers": "Solo", "diet": "veg"}
+
+
+def chat_body(i, distinct):
+    return {"query": f"What should I pack for Goa in November? (#{i % distinct})"}
+
+
+def hotels_body(i, distinct):
+    depart, ret = _dates(i, distinct)
+    return {
+        "to": "GOI", "departureDate": depart, "returnDate": ret, "budget": "₹25,000 - ₹60,000",
+        "travelers": "Couple", "interests": ["beaches", "wellness"], "diet": "vegetarian",
+    }
+
+
+SCENARIOS = {
+    "generate-plan": ("/api/generate-plan", plan_body),
+    "itinerary": ("/api/itinerary", itinerary_body),
+    "chat": ("/api/chat", chat_body),
+    "recommend-hotels": ("/recommend/hotels", hotels_body),
+}
+
+
+def percentile(ordered, q):
+    if not ordered:
+        return None
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+async def run_scenario(client, name, total, concurrency, distinct):
+    path, make_body = SCENARIOS[name]
+    latencies, errors = [], 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                response = await client.post(path, json=make_body(i, distinct))
+                ok = response.status_code < 400 and "error" not in response.text[:200]
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    ms = lambda s: None if s is None else round(s * 1000, 1)
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "rps": round(total / elapsed, 2),
+        "p50_ms": ms(percentile(ordered, 0.50)),
+        "p95_ms": ms(percentile(ordered, 0.95)),
+        "p99_ms": ms(percentile(ordered, 0.99)),
+        "max_ms": ms(ordered[-1] if ordered else None),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Returns human-readable regressions: p95 up or RPS down by more than `tolerance`.
+    """
+    regressions = []
+    for name, now in results.items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        if before["p95_ms"] and now["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']}ms → {now['p95_ms']}ms")
+        if before["rps"] and now["rps"] < before["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {before['rps']} → {now['rps']}")
+    return regressions
+
+
+async def main_async(args):
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        results = {}
+        for name in args.scenarios:
+            if args.warmup:
+                await run_scenario(client, name, args.warmup, min(args.concurrency, args.warmup), args.distinct)
+            results[name] = await run_scenario(client, name, args.requests, args.concurrency, args.distinct)
+            r = results[name]
+            print(f"{name:<18} rps={r['rps']:<8} p50={r['p50_ms']}ms p95={r['p95_ms']}ms p99={r['p99_ms']}ms errors={r['errors']}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100, help="requests per scenario")
+    parser.add_argument("--warmup", type=int, default=0, help="untimed requests per scenario first")
+    parser.add_argument("--distinct", type=int, default=20, help="distinct request bodies (1 = all cache hits after the first)")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", help="write results as a JSON baseline")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    results = asyncio.run(main_async(args))
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "params": {k: getattr(args, k) for k in ("concurrency", "requests", "warmup", "distinct", "seed")},
+        "scenarios": results,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Wrote {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("❌ Regressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("✅ No regressions beyond tolerance.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+One-shot benchmark: starts the upstream stubs and the backend (pointed at the
+stubs, with a fresh cache directory), runs bench.load, then stops both.
+
+    python -m bench.run --gemini-latency-ms 1500 --error-rate 0.02 -- --concurrency 16 --requests 200 --out baseline.json
+
+Arguments before `--` go to the stubs, arguments after it go to bench.load.
+"""
+import os
+import sys
+import time
+import tempfile
+import subprocess
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUB_PORT = 8900
+BACKEND_PORT = 8901
+
+
+def _wait_for(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def main():
+    argv = sys.argv[1:]
+    split = argv.index("--") if "--" in argv else len(argv)
+    stub_args, load_args = argv[:split], argv[split + 1:]
+
+    stub_url = f"http://127.0.0.1:{STUB_PORT}"
+    env = {
+        **os.environ,
+        "SERPAPI_API_KEY": os.environ.get("SERPAPI_API_KEY", "bench"),
+        "GEMINIAPI_KEY": os.environ.get("GEMINIAPI_KEY", "bench"),
+        "SERPAPI_URL": f"{stub_url}/search",
+        "GEMINI_API_BASE": f"{stub_url}/v1beta",
+        "RAAHI_CACHE_DIR": tempfile.mkdtemp(prefix="raahi-bench-"),
+    }
+
+    stubs = subprocess.Popen(
+        [sys.executable, "-m", "bench.stub_upstreams", "--port", str(STUB_PORT), *stub_args],
+        cwd=BACKEND_DIR, env=env,
+    )
+    backend = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(BACKEND_PORT), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        _wait_for(f"{stub_url}/stats")
+        _wait_for(f"http://127.0.0.1:{BACKEND_PORT}/")
+        result = subprocess.run(
+            [sys.executable, "-m", "bench.load", "--base-url", f"http://127.0.0.1:{BACKEND_PORT}", *load_args],
+            cwd=BACKEND_DIR,
+        )
+        print("📊 Upstream stub counters:", httpx.get(f"{stub_url}/stats").json()["requests"])
+        sys.exit(result.returncode)
+    finally:
+        for proc in (backend, stubs):
+            proc.terminate()
+            proc.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
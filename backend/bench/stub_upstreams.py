@@ -0,0 +1,183 @@
+"""
+Local stand-ins for SerpAPI and Gemini, for benchmarking without spending quota.
+
+Replays the recorded replies in bench/fixtures with configurable latency and
+error injection:
+
+    python -m bench.stub_upstreams --port 8900 --serpapi-latency-ms 800 --gemini-latency-ms 1500 --error-rate 0.02
+
+Point the backend at it with:
+
+    SERPAPI_URL=http://127.0.0.1:8900/search
+    GEMINI_API_BASE=http://127.0.0.1:8900/v1beta
+"""
+import os
+import re
+import json
+import random
+import asyncio
+import argparse
+import itertools
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+config = {
+    "serpapi_latency_ms": 800,
+    "gemini_latency_ms": 1500,
+    "jitter": 0.3,
+    "error_rate": 0.0,
+    "quota": 100000,
+}
+counters = {"serpapi": 0, "gemini": 0, "errors": 0}
+_quota = itertools.count()
+
+
+def _load(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+SEARCHES = {
+    "google_flights": _load("google_flights.json"),
+    "google_hotels": _load("google_hotels.json"),
+}
+REPLIES = _load("gemini_replies.json")
+HOTEL_PAGES = 3
+
+app = FastAPI(title="Raahi.ai upstream stubs")
+
+
+async def _delay(kind):
+    base = config[f"{kind}_latency_ms"] / 1000
+    jitter = base * config["jitter"]
+    await asyncio.sleep(max(0.0, random.uniform(base - jitter, base + jitter)))
+
+
+def _fail():
+    if random.random() < config["error_rate"]:
+        counters["errors"] += 1
+        return True
+    return False
+
+
+@app.get("/search")
+async def search(request: Request):
+    counters["serpapi"] += 1
+    engine = request.query_params.get("engine")
+    headers = {"x-search-quota-remaining": str(max(config["quota"] - next(_quota), 0))}
+    await _delay("serpapi")
+
+    if _fail():
+        return JSONResponse({"error": "Injected upstream error."}, status_code=503, headers=headers)
+    if engine not in SEARCHES:
+        return JSONResponse({"error": f"Unsupported engine: {engine}"}, status_code=400, headers=headers)
+    token = request.query_params.get("next_page_token")
+    if engine == "google_hotels" and token:
+        return JSONResponse(_hotel_page(token), headers=headers)
+    return JSONResponse(SEARCHES[engine], headers=headers)
+
+
+def _hotel_page(token):
+    """
+    Later hotel result pages: the fixture's first-page token is page 2,
+    "page-N" is page N, and the last page has no next_page_token.
+    """
+    page = 2 if token == SEARCHES["google_hotels"]["serpapi_pagination"]["next_page_token"] else int(token.split("-")[-1])
+    properties = [{**h, "name": f"{h['name']} (page {page})"} for h in SEARCHES["google_hotels"]["properties"]]
+    pagination = {"current_from": (page - 1) * len(properties) + 1, "current_to": page * len(properties)}
+    if page < HOTEL_PAGES:
+        pagination["next_page_token"] = f"page-{page + 1}"
+    return {"properties": properties, "serpapi_pagination": pagination}
+
+
+def _table_ids(prompt, pattern):
+    return re.findall(rf"^({pattern})\|", prompt, re.MULTILINE)
+
+
+def _reply_for(prompt):
+    """
+    Picks the recorded reply matching the kind of prompt the backend sent.
+    Picks reference an id from the prompt's own candidate table.
+    """
+    if "JSON array of {\"name\"" in prompt:
+        rows = prompt.split("name|", 1)[-1].splitlines()[1:]
+        names = [row.split("|")[0] for row in rows if "|" in row]
+        return json.dumps([{"name": name, "reason": f"{name} is well rated and fits the trip."} for name in names])
+    if "recommended_id" in prompt and "flight" in prompt.lower():
+        ids = _table_ids(prompt, r"flight\d+") or ["flight0"]
+        return json.dumps(REPLIES["flight_pick"]).replace("{id}", ids[0])
+    if "recommended_id" in prompt:
+        ids = _table_ids(prompt, r"hotel\d+|fallback-\d+") or ["hotel0"]
+        return json.dumps(REPLIES["hotel_pick"]).replace("{id}", ids[0])
+    if "itinerary" in prompt.lower():
+        days = REPLIES["itinerary"]
+        if '"icon"' in prompt:
+            # /api/itinerary asks for {time, icon, activity} activities
+            days = [
+                {**day, "activities": [{"time": a["time"], "icon": "📍", "activity": a["title"]} for a in day["activities"]]}
+                for day in days
+            ]
+        return json.dumps(days, ensure_ascii=False)
+    return REPLIES["chat"]
+
+
+def _candidate(text):
+    return {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP"}]}
+
+
+@app.post("/v1beta/models/{model_action}")
+async def gemini(model_action: str, request: Request):
+    counters["gemini"] += 1
+    body = await request.json()
+    prompt = body["contents"][0]["parts"][0]["text"]
+    text = _reply_for(prompt)
+
+    if model_action.endswith(":streamGenerateContent"):
+        async def events():
+            size = max(len(text) // 8, 1)
+            for i in range(0, len(text), size):
+                await asyncio.sleep(config["gemini_latency_ms"] / 1000 / 8)
+                yield f"data: {json.dumps(_candidate(text[i:i + size]))}\n\n"
+
+        if _fail():
+            return JSONResponse({"error": {"code": 503, "message": "Injected upstream error."}}, status_code=503)
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    await _delay("gemini")
+    if _fail():
+        return JSONResponse({"error": {"code": 503, "message": "Injected upstream error."}}, status_code=503)
+    return JSONResponse(_candidate(text))
+
+
+@app.get("/stats")
+def stats():
+    return {"config": config, "requests": counters}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--serpapi-latency-ms", type=float, default=config["serpapi_latency_ms"])
+    parser.add_argument("--gemini-latency-ms", type=float, default=config["gemini_latency_ms"])
+    parser.add_argument("--jitter", type=float, default=config["jitter"], help="± share of the base latency")
+    parser.add_argument("--error-rate", type=float, default=config["error_rate"], help="share of requests answered with 503")
+    parser.add_argument("--quota", type=int, default=config["quota"], help="starting x-search-quota-remaining")
+    args = parser.parse_args()
+
+    config.update(
+        serpapi_latency_ms=args.serpapi_latency_ms,
+        gemini_latency_ms=args.gemini_latency_ms,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        quota=args.quota,
+    )
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
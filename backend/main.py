@@ -30,21 +30,48 @@
 # app.include_router(itinerary_router)
 # app.include_router(chat.router, prefix="/api")
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from app.routes.plan import router as plan_router
 from app.routes.redirect import router as redirect_router
 from app.routes.itinerary import router as itinerary_router
+from app.routes.hotel_routes import router as hotel_router
+from app.routes.stats import router as stats_router
 from app.routes import chat
+from app.services import http_client
+from app.agents.prewarm_agent import prewarmer
+from app.services.metrics import render_metrics, CONTENT_TYPE, HTTP_SECONDS
+from app.utils.tracing import trace_id_var, new_trace_id, record_span, TRACE_HEADER
+from app.utils.log import shutdown_logging
+from app.utils.responses import FastJSONResponse
+from app.utils.compression import CompressionMiddleware
+from contextlib import asynccontextmanager
+import time
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 🔌 Shared keep-alive connection pools for Gemini & SerpAPI
+    await http_client.startup()
+    # 🔥 Off-peak refresh of popular routes and destinations
+    prewarmer.start()
+    yield
+    await prewarmer.stop()
+    await http_client.shutdown()
+    shutdown_logging()
+
+
 app = FastAPI(
     title="Raahi.ai Backend",
     description="FastAPI backend for Raahi.ai - Flights, Hotels, Itinerary & Chat",
     version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 app.add_middleware(
@@ -55,13 +82,49 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 🗜️ gzip/br for complete JSON bodies above RAAHI_COMPRESS_MIN_BYTES (streams are left alone)
+app.add_middleware(CompressionMiddleware)
+
+
+@app.middleware("http")
+async def trace_and_time(request: Request, call_next):
+    """
+    Tags the request with a trace ID (from the X-Trace-Id header, or a new one)
+    that every stage it runs inherits, and times the handler per route.
+    For streaming routes this covers the time until streaming starts.
+    """
+    token = trace_id_var.set(request.headers.get(TRACE_HEADER) or new_trace_id())
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers[TRACE_HEADER] = trace_id_var.get()
+        return response
+    finally:
+        elapsed = time.perf_counter() - started
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        HTTP_SECONDS.observe(elapsed, route=route, method=request.method, status=status)
+        record_span(f"http {request.method} {route}", elapsed, status=status)
+        trace_id_var.reset(token)
+
+
 # Root health check
 @app.get("/")
 def root():
     return {"message": "Raahi.ai backend is running 🚀"}
 
+
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+
 # Register routes
 app.include_router(plan_router, prefix="/api")
 app.include_router(redirect_router, prefix="/api")
 app.include_router(itinerary_router)
+app.include_router(hotel_router)
 app.include_router(chat.router, prefix="/api")
+app.include_router(stats_router, prefix="/api")
@@ -0,0 +1,9 @@
+import os
+import tempfile
+
+# 🧪 The services read their settings at import time: point them at dummy keys
+# and a throwaway cache directory before any test imports the app.
+os.environ.setdefault("SERPAPI_API_KEY", "test")
+os.environ.setdefault("GEMINIAPI_KEY", "test")
+os.environ.setdefault("RAAHI_CACHE_DIR", tempfile.mkdtemp(prefix="raahi-test-"))
+os.environ.setdefault("RAAHI_LOG_LEVEL", "WARNING")
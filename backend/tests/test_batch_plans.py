@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.agents import batch_planner_agent
+from app.routes import plan as plan_routes
+from app.routes.plan import PlanInput
+
+PLAN = {
+    "from_": "DEL", "to": "Goa", "departureDate": "2026-12-01", "returnDate": "2026-12-04",
+    "travelClass": "economy", "budget": "40000", "travelers": "2", "interests": ["beach"], "diet": "veg",
+}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """
+    Stubs every stage the batch planner calls; returns the calls made per stage.
+    """
+    calls = {"flights": [], "hotels": [], "itinerary": [], "fareCalendar": []}
+
+    def stub(stage, result):
+        async def call(*args):
+            calls[stage].append(args)
+            await asyncio.sleep(0)
+            return result(*args)
+        return call
+
+    async def rank(options, *args):
+        return options
+
+    monkeypatch.setattr(batch_planner_agent, "search_flight_options_async", stub("flights", lambda *a: []))
+    monkeypatch.setattr(batch_planner_agent, "search_hotel_options_async", stub("hotels", lambda *a: []))
+    monkeypatch.setattr(batch_planner_agent, "generate_daywise_itinerary_async", stub("itinerary", lambda *a: [{"day": 1}]))
+    monkeypatch.setattr(batch_planner_agent, "get_fare_calendar_async", stub("fareCalendar", lambda *a: {"flexDays": a[3]}))
+    monkeypatch.setattr(batch_planner_agent, "rank_flight_options_async", rank)
+    monkeypatch.setattr(batch_planner_agent, "rank_hotel_options_async", rank)
+    return calls
+
+
+def _run(plans):
+    async def collect():
+        return [event async for event in batch_planner_agent.stream_plan_batch([PlanInput(**p) for p in plans], 2)]
+    events = asyncio.run(collect())
+    plans_by_index = {data["index"]: data["plan"] for kind, data in events if kind == "plan"}
+    assert events[-1][0] == "done"
+    return [plans_by_index[i] for i in range(len(plans))], events[-1][1]
+
+
+def test_shared_searches_run_once(upstream):
+    plans, stats = _run([PLAN, {**PLAN, "diet": "any"}, {**PLAN, "to": "Jaipur"}])
+
+    assert [len(upstream[stage]) for stage in ("flights", "hotels", "itinerary")] == [2, 2, 3]
+    assert stats["plans"] == 3
+    assert stats["flightSearches"] == 2 and stats["hotelSearches"] == 2
+    assert all("fareCalendar" not in plan and "errors" not in plan for plan in plans)
+
+
+def test_flex_days_are_forwarded(upstream):
+    plans, stats = _run([{**PLAN, "flexDays": 2}, {**PLAN, "flexDays": 2, "diet": "any"}, PLAN])
+
+    assert [plan.get("fareCalendar") for plan in plans] == [{"flexDays": 2}, {"flexDays": 2}, None]
+    assert len(upstream["fareCalendar"]) == 1
+    assert stats["fareCalendars"] == 1
+
+
+def test_out_of_range_flex_days_are_rejected():
+    app = FastAPI()
+    app.include_router(plan_routes.router, prefix="/api")
+    client = TestClient(app)
+
+    response = client.post("/api/generate-plans", json={"plans": [{**PLAN, "flexDays": 5}]})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"][-1] == "flexDays"
+    assert client.post("/api/generate-plan", json={**PLAN, "flexDays": -1}).status_code == 422
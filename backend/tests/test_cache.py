@@ -0,0 +1,96 @@
+import time
+import asyncio
+import threading
+import httpx
+from app.services import serpapi_service
+from app.services.cache import LRUCache, SQLiteCache, TieredCache
+
+THREADS = 8
+LOOKUPS = 5000
+
+
+def test_counters_are_exact_under_concurrent_lookups():
+    cache = TieredCache(LRUCache(max_entries=16))
+    cache.set("hit", {"ok": True})
+    start = threading.Barrier(THREADS)
+
+    def lookups():
+        start.wait()
+        for i in range(LOOKUPS):
+            cache.get("hit" if i % 2 else "miss")
+
+    threads = [threading.Thread(target=lookups) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = cache.stats()
+    assert stats["hits_memory"] == THREADS * LOOKUPS // 2
+    assert stats["misses"] == THREADS * LOOKUPS // 2
+    assert stats["hits_disk"] == 0
+
+
+def test_disk_hits_are_promoted_to_memory(tmp_path):
+    cache = TieredCache(LRUCache(max_entries=16), SQLiteCache(str(tmp_path / "cache.sqlite3")))
+    cache.set("k", {"v": 1})
+    cache.memory.clear()
+
+    assert cache.get("k").value == {"v": 1}
+    assert cache.get("k").value == {"v": 1}
+    stats = cache.stats()
+    assert (stats["hits_disk"], stats["hits_memory"]) == (1, 1)
+
+
+class StubSerpAPI:
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self, params):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return {"best_flights": [{"price": 100 + self.calls}]}
+
+
+def _seed(params, age):
+    key = serpapi_service._cache_key(params)
+    stored_at = time.time() - age
+    serpapi_service.search_cache.memory.set(key, {"best_flights": [{"price": 99}]}, stored_at=stored_at)
+    return key
+
+
+def _search(params):
+    async def main():
+        result = await serpapi_service._cached_search_async(params)
+        await asyncio.gather(*serpapi_service._refresh_tasks)
+        return result
+    return asyncio.run(main())
+
+
+def test_stale_result_is_served_and_refreshed_in_background(monkeypatch):
+    stub = StubSerpAPI()
+    monkeypatch.setattr(serpapi_service, "_fetch_serpapi_async", stub)
+    params = serpapi_service._flight_params("SWR", "STL", "2026-12-01")
+    ttl = serpapi_service.CACHE_POLICY["google_flights"]["ttl"]
+    key = _seed(params, ttl + 60)
+
+    assert _search(params) == {"best_flights": [{"price": 99}]}
+    assert stub.calls == 1
+    assert serpapi_service.search_cache.get(key).value == {"best_flights": [{"price": 101}]}
+    assert _search(params) == {"best_flights": [{"price": 101}]}
+    assert stub.calls == 1
+
+
+def test_last_good_result_is_served_when_serpapi_fails(monkeypatch):
+    stub = StubSerpAPI(error=httpx.ConnectError("down"))
+    monkeypatch.setattr(serpapi_service, "_fetch_serpapi_async", stub)
+    params = serpapi_service._flight_params("SWR", "LGD", "2026-12-01")
+    policy = serpapi_service.CACHE_POLICY["google_flights"]
+    _seed(params, policy["ttl"] + policy["swr"] + 60)
+    served = serpapi_service.search_cache_stats()["fallback_served"]
+
+    assert _search(params) == {"best_flights": [{"price": 99}]}
+    assert stub.calls == 1
+    assert serpapi_service.search_cache_stats()["fallback_served"] == served + 1
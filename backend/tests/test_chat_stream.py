@@ -0,0 +1,147 @@
+import json
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.routes import chat
+from app.services import gemini_service
+
+TOKENS = ["Namaste", ", ", "Goa ", "in ", "December", "!"]
+
+
+class StubGeminiStream(httpx.AsyncByteStream):
+    """
+    streamGenerateContent?alt=sse body: one SSE event per token, optionally paced.
+    """
+
+    def __init__(self, tokens, delay=0.0):
+        self.tokens = tokens
+        self.delay = delay
+        self.sent = 0
+        self.closed = False
+
+    async def __aiter__(self):
+        for token in self.tokens:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            self.sent += 1
+            event = {"candidates": [{"content": {"parts": [{"text": token}]}}]}
+            yield f"data: {json.dumps(event)}\r\n\r\n".encode()
+
+    async def aclose(self):
+        self.closed = True
+
+
+@pytest.fixture
+def stub_gemini(monkeypatch):
+    """
+    Routes the shared async client to a stub Gemini; returns a function that
+    sets the next stream and returns it.
+    """
+    streams = []
+
+    def handler(request):
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, stream=streams[-1])
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(gemini_service, "get_async_client", lambda: client)
+
+    def serve(tokens, delay=0.0):
+        streams.append(StubGeminiStream(tokens, delay))
+        return streams[-1]
+    return serve
+
+
+def _app():
+    app = FastAPI()
+    app.include_router(chat.router, prefix="/api")
+    return app
+
+
+def _sse_events(body):
+    events = []
+    for block in body.split("\n\n"):
+        if not block:
+            continue
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines.get("event"), json.loads(lines["data"])))
+    return events
+
+
+def test_tokens_arrive_in_order_as_sse(stub_gemini):
+    upstream = stub_gemini(TOKENS)
+
+    response = TestClient(_app()).post("/api/chat/stream", json={"query": "plan my trip"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text.endswith("\n\n")
+    events = _sse_events(response.text)
+    assert events == [(None, {"text": token}) for token in TOKENS] + [("done", {})]
+    assert upstream.closed
+
+
+def test_upstream_error_becomes_error_event(monkeypatch):
+    def handler(request):
+        return httpx.Response(500, json={"error": "boom"})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(gemini_service, "get_async_client", lambda: client)
+
+    response = TestClient(_app()).post("/api/chat/stream", json={"query": "plan my trip"})
+
+    assert _sse_events(response.text) == [("error", {"error": "Gemini failed to respond."})]
+
+
+def test_generator_close_closes_upstream(stub_gemini):
+    upstream = stub_gemini(TOKENS)
+
+    async def first_token():
+        chunks = gemini_service.stream_gemini_response("plan my trip", use_cache=False)
+        token = await chunks.__anext__()
+        await chunks.aclose()
+        return token
+
+    assert asyncio.run(first_token()) == TOKENS[0]
+    assert upstream.closed
+    assert upstream.sent < len(TOKENS)
+
+
+def test_client_disconnect_closes_upstream(stub_gemini):
+    tokens = [f"t{i} " for i in range(50)]
+    upstream = stub_gemini(tokens, delay=0.01)
+
+    async def run():
+        app = _app()
+        received = []
+        first_chunk = asyncio.Event()
+        request_sent = False
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": b'{"query": "plan my trip"}', "more_body": False}
+            await first_chunk.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                received.append(message["body"].decode())
+                first_chunk.set()
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "POST", "scheme": "http", "path": "/api/chat/stream", "raw_path": b"/api/chat/stream",
+            "query_string": b"", "root_path": "", "headers": [(b"content-type", b"application/json")],
+            "client": ("127.0.0.1", 5000), "server": ("testserver", 80),
+        }
+        await asyncio.wait_for(app(scope, receive, send), 5)
+        return received
+
+    received = asyncio.run(run())
+
+    assert received[0] == f'data: {{"text":"{tokens[0]}"}}\n\n'
+    assert upstream.closed
+    assert upstream.sent < len(tokens)
@@ -0,0 +1,85 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from app.utils.compression import CompressionMiddleware, choose_encoding
+from app.utils.responses import FastJSONResponse, dumps, loads, project
+
+BIG = {"hotels": [{"id": f"hotel{i}", "name": "Sea Breeze Résort", "price": 5200 + i} for i in range(100)]}
+SMALL = {"ok": True}
+
+
+@pytest.fixture
+def client():
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.add_middleware(CompressionMiddleware, minimum_size=512)
+
+    @app.get("/big")
+    def big():
+        return FastJSONResponse(BIG, headers={"ETag": '"v1"'})
+
+    @app.get("/small")
+    def small():
+        return SMALL
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([dumps(BIG), b"\n", dumps(BIG)]), media_type="application/x-ndjson")
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate, br", "br"),
+    ("gzip", "gzip"),
+    ("br;q=0.5, gzip;q=0.8", "gzip"),
+    ("*", "br"),
+    ("identity", None),
+    ("gzip;q=0, br;q=0", None),
+    ("", None),
+])
+def test_encoding_negotiation(header, expected):
+    assert choose_encoding(header) == expected
+
+
+@pytest.mark.parametrize("encoding", ["br", "gzip"])
+def test_large_json_is_compressed(client, encoding):
+    response = client.get("/big", headers={"Accept-Encoding": encoding})
+
+    assert response.headers["content-encoding"] == encoding
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] == 'W/"v1"'
+    assert int(response.headers["content-length"]) < len(dumps(BIG)) // 4
+    assert response.json() == BIG  # decoded by the test client
+
+
+def test_small_bodies_and_streams_are_left_alone(client):
+    small = client.get("/small", headers={"Accept-Encoding": "br"})
+    assert "content-encoding" not in small.headers
+    assert small.json() == SMALL
+
+    stream = client.get("/stream", headers={"Accept-Encoding": "br"})
+    assert "content-encoding" not in stream.headers
+    assert [loads(line) for line in stream.text.splitlines()] == [BIG, BIG]
+
+
+def test_uncompressed_client_gets_plain_json(client):
+    response = client.get("/big", headers={"Accept-Encoding": "identity"})
+
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == '"v1"'
+    assert loads(response.content) == BIG
+
+
+def test_dumps_is_compact_utf8():
+    assert dumps({"name": "Résort", "n": [1, 2]}) == '{"name":"Résort","n":[1,2]}'.encode("utf-8")
+
+
+def test_project_keeps_fields_and_caps_lists():
+    plan = {"planId": "p1", "flights": [{"price": 1, "airline": "X", "stops": 0}] * 3, "hotels": [{"name": "H"}]}
+
+    assert project(plan, "flights.price", limit=2, keep=("planId",)) == {
+        "planId": "p1", "flights": [{"price": 1}, {"price": 1}],
+    }
+    assert project(plan["flights"], "airline,stops", limit=1) == [{"airline": "X", "stops": 0}]
+    assert project(plan) is plan
@@ -0,0 +1,153 @@
+import asyncio
+import itertools
+from datetime import date, timedelta
+import httpx
+import pytest
+from app.agents import flight_agent
+from app.agents.flight_agent import get_fare_calendar_async, search_flight_options_async, FARE_CALENDAR_COLUMNS
+from app.services import serpapi_service
+
+CENTER = date.today() + timedelta(days=30)
+_routes = itertools.count()
+
+
+def _day(offset):
+    return (CENTER + timedelta(days=offset)).isoformat()
+
+
+def _option(price, minutes, number):
+    return {
+        "flights": [{
+            "airline": "IndiGo", "flight_number": number,
+            "departure_airport": {"id": "DEL", "time": f"{CENTER} 06:00"},
+            "arrival_airport": {"id": "GOI", "time": f"{CENTER} 08:30"},
+        }],
+        "total_duration": minutes,
+        "price": price,
+    }
+
+
+def _fares(offset):
+    """
+    Two options per day: a cheap slow one and a pricier fast one.
+    Cheapest overall is offset +2, and offset -1 is the fastest day.
+    """
+    cheap = 6000 - 400 * offset if offset <= 2 else 6500
+    fast_minutes = 100 if offset == -1 else 125
+    return {
+        "best_flights": [_option(cheap, 180, f"6E {100 + offset}")],
+        "other_flights": [_option(cheap + 2500, fast_minutes, f"6E {200 + offset}")],
+    }
+
+
+class StubSerpAPI:
+    """
+    Stands in for the SerpAPI HTTP call; the search cache in front of it is real.
+    """
+
+    def __init__(self, fail_on=()):
+        self.fail_on = set(fail_on)
+        self.searches = []
+
+    async def __call__(self, params):
+        day = params["outbound_date"]
+        self.searches.append(day)
+        await asyncio.sleep(0)
+        if day in self.fail_on:
+            raise httpx.ConnectError("stub: connection refused")
+        offset = (date.fromisoformat(day) - CENTER).days
+        return _fares(offset)
+
+
+@pytest.fixture
+def serpapi(monkeypatch):
+    stub = StubSerpAPI()
+    monkeypatch.setattr(serpapi_service, "_fetch_serpapi_async", stub)
+    return stub
+
+
+@pytest.fixture
+def route():
+    """
+    A route no other test has searched, so the shared search cache starts empty.
+    """
+    n = next(_routes)
+    return f"D{n:02d}", f"G{n:02d}"
+
+
+def _calendar(route, flex_days, departure=None):
+    return asyncio.run(get_fare_calendar_async(*route, departure or _day(0), flex_days))
+
+
+def test_fans_out_one_search_per_day(serpapi, route):
+    calendar = _calendar(route, 2)
+
+    assert sorted(serpapi.searches) == [_day(offset) for offset in range(-2, 3)]
+    assert calendar["columns"] == FARE_CALENDAR_COLUMNS
+    assert [row[0] for row in calendar["rows"]] == [_day(offset) for offset in range(-2, 3)]
+    assert all(len(row) == len(FARE_CALENDAR_COLUMNS) for row in calendar["rows"])
+
+
+def test_rows_pick_cheapest_and_fastest(serpapi, route):
+    calendar = _calendar(route, 2)
+    rows = {row[0]: dict(zip(FARE_CALENDAR_COLUMNS, row)) for row in calendar["rows"]}
+
+    assert calendar["selectedDate"] == _day(0)
+    assert calendar["cheapestDate"] == _day(2)
+    assert rows[_day(0)] == {
+        "date": _day(0), "cheapestPrice": 6000, "cheapestId": "flight0",
+        "fastestMinutes": 125, "fastestPrice": 8500, "fastestId": "flight1", "options": 2,
+    }
+    assert rows[_day(2)]["cheapestPrice"] == 5200
+    assert rows[_day(-1)]["fastestMinutes"] == 100
+
+
+def test_failed_day_is_an_empty_row(serpapi, route):
+    serpapi.fail_on = {_day(1)}
+    calendar = _calendar(route, 2)
+    rows = {row[0]: row for row in calendar["rows"]}
+
+    assert rows[_day(1)] == [_day(1), None, None, None, None, None, 0]
+    assert rows[_day(0)][1] == 6000
+    assert calendar["cheapestDate"] == _day(2)
+
+
+def test_cached_days_are_reused(serpapi, route):
+    serpapi.fail_on = {_day(1)}
+    first = _calendar(route, 2)
+    assert len(serpapi.searches) == 5
+
+    # Only the day that failed is searched again (failures are not cached)
+    serpapi.fail_on = set()
+    second = _calendar(route, 2)
+    assert serpapi.searches[5:] == [_day(1)]
+    assert second["rows"][3][1] == 5600
+    assert [row for i, row in enumerate(second["rows"]) if i != 3] == [
+        row for i, row in enumerate(first["rows"]) if i != 3
+    ]
+
+    # A wider window only adds the new edge days
+    _calendar(route, 3)
+    assert sorted(serpapi.searches[6:]) == [_day(-3), _day(3)]
+
+
+def test_requested_day_shares_the_flight_search(serpapi, route):
+    flights = asyncio.run(search_flight_options_async(*route, _day(0)))
+    assert serpapi.searches == [_day(0)]
+    assert flights[0].cheapest
+
+    _calendar(route, 1)
+    assert sorted(serpapi.searches[1:]) == [_day(-1), _day(1)]
+
+
+def test_flex_days_are_clamped(serpapi, route):
+    calendar = _calendar(route, flight_agent.FARE_CALENDAR_MAX_DAYS + 4)
+    assert len(calendar["rows"]) == 2 * flight_agent.FARE_CALENDAR_MAX_DAYS + 1
+
+
+def test_past_days_are_skipped(serpapi, route):
+    today = date.today()
+    calendar = _calendar(route, 2, departure=(today + timedelta(days=1)).isoformat())
+    assert [row[0] for row in calendar["rows"]] == [
+        (today + timedelta(days=offset)).isoformat() for offset in range(0, 4)
+    ]
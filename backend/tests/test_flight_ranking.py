@@ -0,0 +1,93 @@
+import asyncio
+import pytest
+from app.agents import flight_agent
+from app.models.records import Flight
+from app.services.flight_ranking_service import pareto_frontier, rank_flights, explain_pick
+from app.services.metrics import track_fallbacks
+
+
+def _flight(i, price, duration, stops=0, departure="09:00"):
+    return Flight(f"flight{i}", "IndiGo", f"6E {100 + i}", departure, "12:00", "DEL", "GOI",
+                  duration, "Non-stop" if stops == 0 else f"{stops} stop", stops, price, "Economy")
+
+
+def _flights():
+    return [
+        _flight(0, 4200, 150),              # cheapest, direct
+        _flight(1, 9800, 70),               # fastest, expensive
+        _flight(2, 5100, 290, stops=1),     # dominated by flight0
+        _flight(3, 4300, 240, stops=1),     # dominated by flight0
+        _flight(4, 15000, 300, stops=2),    # dominated by everything
+    ]
+
+
+def test_pareto_frontier_drops_dominated_options():
+    flights = _flights()
+    frontier = pareto_frontier([f.price for f in flights], [f.duration_min for f in flights], [f.stops for f in flights])
+
+    assert sorted(frontier) == [0, 1]
+
+
+@pytest.mark.parametrize("travel_class, best", [("Economy", "flight0"), ("First", "flight1")])
+def test_travel_class_changes_the_weights(travel_class, best):
+    flights = _flights()
+    ranking = rank_flights(flights, {"travelClass": travel_class})
+
+    assert flights[ranking.best].id == best
+    assert not ranking.needs_tiebreak
+
+
+def test_red_eye_departures_cost_more():
+    flights = [_flight(0, 5000, 150, departure="02:30"), _flight(1, 5000, 150, departure="10:00")]
+    ranking = rank_flights(flights, {})
+
+    assert flights[ranking.best].id == "flight1"
+    assert explain_pick(flights, ranking, 0)["departure"] == "Early departure at 02:30."
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    """
+    Stands in for the Gemini tie-break; records the shortlists it is shown.
+    """
+    class Gemini:
+        pick = None
+        prompts = []
+
+    async def generate(prompt, model, parser):
+        Gemini.prompts.append(prompt)
+        return Gemini.pick
+
+    monkeypatch.setattr(flight_agent, "generate_gemini_json_async", generate)
+    return Gemini
+
+
+def _rank(flights):
+    return asyncio.run(flight_agent.rank_flight_options_async(flights, "DEL", "GOI", "2026-12-01", {"travelClass": "Economy"}))
+
+
+def test_clear_winner_needs_no_gemini(gemini):
+    flights = _rank(_flights())
+
+    assert gemini.prompts == []
+    picked = [f for f in flights if f.ai_recommended]
+    assert [f.id for f in picked] == ["flight0"]
+    assert picked[0].ai_reasoning["price"] == "Lowest fare available at ₹4200."
+
+
+def test_near_tie_asks_gemini_about_the_shortlist_only(gemini):
+    gemini.pick = {"recommended_id": "flight1", "reason": {"price": "p", "duration": "d", "airline": "a", "departure": "t"}}
+    flights = _rank([_flight(0, 5000, 150), _flight(1, 5050, 148), _flight(2, 9000, 400, stops=2)])
+
+    assert len(gemini.prompts) == 1
+    assert "flight1" in gemini.prompts[0] and "flight2" not in gemini.prompts[0]
+    assert [f.id for f in flights if f.ai_recommended] == ["flight1"]
+
+
+def test_pick_outside_the_shortlist_falls_back_to_local(gemini):
+    gemini.pick = {"recommended_id": "flight2", "reason": {"price": "p", "duration": "d", "airline": "a", "departure": "t"}}
+    fallbacks = track_fallbacks()
+    flights = _rank([_flight(0, 5000, 150), _flight(1, 5050, 148), _flight(2, 9000, 400, stops=2)])
+
+    assert [f.id for f in flights if f.ai_recommended] != ["flight2"]
+    assert fallbacks == {"flight_local_pick"}
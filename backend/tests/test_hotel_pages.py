@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.routes import hotel_routes
+from app.services import serpapi_service
+from app.services.serpapi_service import encode_hotel_cursor, decode_hotel_cursor, find_hotels_async
+
+# Two SerpAPI result pages, chained by next_page_token
+PAGES = {
+    None: {"properties": [{"name": f"Hotel {i}", "overall_rating": 4.0 + i / 10, "rate_per_night": {"extracted_lowest": 1000 * (i + 1)}}
+                          for i in range(3)],
+           "serpapi_pagination": {"next_page_token": "page2"}},
+    "page2": {"properties": [{"name": f"Hotel {i}", "overall_rating": 4.0, "rate_per_night": {"extracted_lowest": 1500}}
+                             for i in range(3, 5)]},
+}
+
+
+@pytest.fixture
+def serpapi(monkeypatch):
+    fetched = []
+
+    async def fetch(params):
+        token = params.get("next_page_token")
+        fetched.append(token)
+        return PAGES[token]
+
+    monkeypatch.setattr(serpapi_service, "_fetch_serpapi_async", fetch)
+    monkeypatch.setattr(hotel_routes, "record_hotel_traffic", lambda *args: None)
+    return fetched
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(hotel_routes.router)
+    return TestClient(app)
+
+
+def _walk(client, city, **params):
+    names, cursor, pages = [], None, 0
+    while True:
+        query = {"to": city, "checkin": "2026-12-01", "checkout": "2026-12-03", **params}
+        if cursor:
+            query["cursor"] = cursor
+        body = client.get("/hotels/search", params=query).json()
+        names += [hotel["name"] for hotel in body["hotels"]]
+        pages += 1
+        cursor = body["nextCursor"]
+        if cursor is None:
+            return names, pages
+
+
+def test_cursor_walks_every_hotel_once(serpapi, client):
+    names, pages = _walk(client, "Pager Bay", limit=2)
+
+    assert names == [f"Hotel {i}" for i in range(5)]
+    assert pages == 3
+    assert serpapi == [None, "page2"]  # each SerpAPI page fetched once, then cached
+
+
+def test_filters_apply_across_pages(serpapi, client):
+    names, _ = _walk(client, "Filter Bay", limit=2, maxPrice=1500)
+
+    assert names == ["Hotel 0", "Hotel 3", "Hotel 4"]
+
+
+def test_bad_cursor_is_a_400(serpapi, client):
+    response = client.get("/hotels/search", params={"to": "Goa", "checkin": "2026-12-01", "checkout": "2026-12-03",
+                                                    "cursor": "not-a-cursor"})
+    assert response.status_code == 400
+    assert serpapi == []
+
+
+def test_cursor_round_trip():
+    position = ("page2", 1, 4)
+    assert decode_hotel_cursor(encode_hotel_cursor(position)) == position
+    assert encode_hotel_cursor(None) is None
+    with pytest.raises(ValueError):
+        decode_hotel_cursor(encode_hotel_cursor(("page2", -1, 0)))
+
+
+def test_lazy_search_stops_before_the_next_page(serpapi):
+    hotels = asyncio.run(find_hotels_async("Lazy Bay", "2026-12-01", "2026-12-03", 2, max_pages=2))
+
+    assert [h.name for h in hotels] == ["Hotel 0", "Hotel 1"]
+    assert serpapi == [None]
@@ -0,0 +1,41 @@
+from app.agents.hotel_agent import _build_hotel_prompt, _prepare_hotels
+from app.services.hotel_ranking_service import _build_reasons_prompt, _build_user_prefs, rank_hotels
+from app.services.serpapi_service import _parse_hotels
+
+# One listing with everything, one with no price, rating or review count
+SERP_REPLY = {"properties": [
+    {"name": "Sea Breeze Resort", "overall_rating": 4.4, "reviews": 812, "rate_per_night": {"extracted_lowest": 5200}},
+    {"name": "Palm Lodge"},
+]}
+PREFERENCES = {"interests": ["beach"], "budget": 40000, "travelers": 2, "diet": "veg", "budget_range": "40000"}
+TRIP = ("Goa", "2026-12-01", "2026-12-04")
+
+
+def _hotels():
+    return _prepare_hotels(_parse_hotels(SERP_REPLY, "Goa", *TRIP[1:]), *TRIP, PREFERENCES)
+
+
+def test_missing_values_are_not_invented():
+    hotel = _hotels()[1]
+
+    assert hotel.rating is None
+    assert hotel.reviews is None
+    assert hotel.price_fallback
+    assert hotel.price == _hotels()[1].price
+
+
+def test_hotel_prompt_is_identical_across_requests():
+    prompt = _build_hotel_prompt(*TRIP, PREFERENCES, _hotels())
+
+    assert prompt == _build_hotel_prompt(*TRIP, PREFERENCES, _hotels())
+    assert "hotel1|Palm Lodge|950|True|-|-|" in prompt
+    assert "do not guess it" in prompt
+
+
+def test_reasons_prompt_is_identical_across_requests():
+    user_prefs = _build_user_prefs(*TRIP, PREFERENCES)
+    first = rank_hotels(_hotels(), user_prefs)
+
+    assert first == rank_hotels(_hotels(), user_prefs)
+    assert _build_reasons_prompt(first, user_prefs) == _build_reasons_prompt(rank_hotels(_hotels(), user_prefs), user_prefs)
+    assert [rec["reason"].split(";")[0] for rec in first] == ["Rated 4.4/5 by 812+ guests", "Not yet rated"]
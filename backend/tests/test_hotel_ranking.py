@@ -0,0 +1,65 @@
+import asyncio
+from app.models.records import Hotel
+from app.services import hotel_ranking_service
+from app.services.hotel_ranking_service import _build_user_prefs, rank_hotels, score_hotels
+
+# ₹20,000 over 4 nights: 45% for the hotel → ₹2,250 a night
+PREFERENCES = {"budget_range": "₹20,000", "travelers": 2, "interests": ["beaches"], "dietary_pref": "veg"}
+USER_PREFS = _build_user_prefs("Goa", "2026-12-01", "2026-12-05", PREFERENCES)
+
+
+def _hotel(i, price=2000, rating=4.2, reviews=300, amenities=("Free WiFi",)):
+    return Hotel(f"hotel{i}", f"Hotel {i}", price, False, rating, reviews, "Goa", list(amenities))
+
+
+def _top(hotels):
+    return [rec["name"] for rec in rank_hotels(hotels, USER_PREFS)]
+
+
+def test_nightly_budget_decides_price_fit():
+    scores, columns = score_hotels([_hotel(0, price=2200), _hotel(1, price=4500)], USER_PREFS)
+
+    assert columns["target"] == 2250
+    assert scores[0] > scores[1]
+
+
+def test_interest_and_diet_amenities_count():
+    beach = _hotel(0, amenities=["Free WiFi", "Beach access", "Pool", "Vegetarian restaurant"])
+    plain = _hotel(1)
+
+    assert _top([plain, beach]) == ["Hotel 0", "Hotel 1"]
+    reason = rank_hotels([plain, beach], USER_PREFS)[0]["reason"]
+    assert "offers" in reason and "beach" in reason
+
+
+def test_top_three_with_ties_in_serpapi_order():
+    hotels = [_hotel(i) for i in range(5)] + [_hotel(5, rating=4.9, reviews=2000)]
+
+    assert _top(hotels) == ["Hotel 5", "Hotel 0", "Hotel 1"]
+    assert rank_hotels([], USER_PREFS) == []
+
+
+def test_gemini_only_rewrites_reasons_when_asked(monkeypatch):
+    prompts = []
+
+    async def find(*args, **kwargs):
+        return [_hotel(0), _hotel(1, rating=4.8)]
+
+    async def generate(prompt, model, parser, many):
+        prompts.append(prompt)
+        return [{"name": "Hotel 1", "reason": "Great for a beach break."}]
+
+    monkeypatch.setattr(hotel_ranking_service, "find_hotels_async", find)
+    monkeypatch.setattr(hotel_ranking_service, "generate_gemini_json_async", generate)
+
+    def ranked(ai_reasons):
+        return asyncio.run(hotel_ranking_service.get_ranked_hotels_from_iata_async(
+            "GOI", "2026-12-01", "2026-12-05", PREFERENCES, ai_reasons=ai_reasons,
+        ))
+
+    local = ranked(False)
+    assert prompts == []
+    assert local[0]["name"] == "Hotel 1" and local[0]["reason"].startswith("Rated 4.8/5")
+
+    assert ranked(True)[0]["reason"] == "Great for a beach break."
+    assert len(prompts) == 1
@@ -0,0 +1,90 @@
+import json
+import asyncio
+import httpx
+import pytest
+from app.agents.itinerary_agent import stream_itinerary_days
+from app.models.gemini_models import ItineraryDay
+from app.services import gemini_service
+from app.services.resilience import Upstream
+from app.utils.llm_json import json_mode
+
+DAYS = [
+    {"day": n, "date": f"2026-12-0{n}", "title": f"Day {n}",
+     "activities": [{"time": "10:00 AM", "title": "Walk", "details": "Old town"}]}
+    for n in (1, 2, 3)
+]
+COMPLETE = json.dumps(DAYS)
+
+
+class StubGemini:
+    """
+    Serves `reply` in small chunks as streamGenerateContent SSE events, and as
+    a plain generateContent answer; counts upstream requests.
+    """
+
+    def __init__(self):
+        self.reply = ""
+        self.requests = 0
+
+    def __call__(self, request):
+        self.requests += 1
+        if "streamGenerateContent" not in str(request.url):
+            return httpx.Response(200, json=self._event(self.reply))
+        chunks = [self.reply[i:i + 40] for i in range(0, len(self.reply), 40)]
+        body = "".join(f"data: {json.dumps(self._event(chunk))}\r\n\r\n" for chunk in chunks)
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=body.encode())
+
+    @staticmethod
+    def _event(text):
+        return {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    stub = StubGemini()
+    client = httpx.AsyncClient(transport=httpx.MockTransport(stub))
+    monkeypatch.setattr(gemini_service, "get_async_client", lambda: client)
+    monkeypatch.setattr(gemini_service, "gemini_upstream", Upstream("gemini-test", 5, hedge=False))
+    return stub
+
+
+def _stream(prompt):
+    async def collect():
+        return [day async for day in stream_itinerary_days(prompt)]
+    return asyncio.run(collect())
+
+
+def _cached(prompt):
+    key = gemini_service._cache_key(prompt, json_mode(ItineraryDay, many=True))
+    return gemini_service.response_cache.get(key)
+
+
+def test_complete_stream_is_cached_and_shared_with_json_path(gemini):
+    prompt = "itinerary: complete"
+    gemini.reply = COMPLETE
+
+    assert _stream(prompt) == DAYS
+    assert _cached(prompt).value == COMPLETE
+
+    days = asyncio.run(gemini_service.generate_gemini_json_async(prompt, ItineraryDay, parser="itinerary", many=True))
+    assert days == DAYS
+    assert gemini.requests == 1
+
+
+@pytest.mark.parametrize("reply", [
+    COMPLETE[:-30],                                               # truncated mid-day
+    json.dumps(DAYS[:1] + [{"day": "two", "title": 2}]),          # a day fails the schema
+    COMPLETE[:-1] + ', {"day": 4,}]',                             # a day is not valid JSON
+    "Sorry, I can't help with that.",                             # no array at all
+], ids=["truncated", "schema", "malformed", "prose"])
+def test_unusable_stream_is_not_cached(gemini, reply):
+    prompt = f"itinerary: {reply[-20:]}"
+    gemini.reply = reply
+
+    _stream(prompt)
+
+    assert _cached(prompt) is None
+    # The next request asks Gemini again instead of replaying the bad reply
+    gemini.reply = COMPLETE
+    assert _stream(prompt) == DAYS
+    assert gemini.requests == 2
@@ -0,0 +1,94 @@
+import json
+import pytest
+from app.utils.json_stream import JSONArrayStream
+
+ITEMS = [
+    {"day": 1, "title": "Old Goa", "note": 'He said "meet at 9" \\ then left'},
+    {"day": 2, "title": "Beach } day ]", "tags": ["sun", "sand", ["nested", {"deep": [1, 2]}]]},
+    {"day": 3, "title": "Café – Fontainhas ☕", "escapes": "tab\tnewline\nunicodeé slash\\/"},
+    [1, [2, [3]], {"k": "v"}],
+    {"empty": {}, "none": None, "list": []},
+]
+
+PAYLOAD = json.dumps(ITEMS)
+
+
+def _feed(chunks):
+    stream = JSONArrayStream()
+    items = []
+    for chunk in chunks:
+        items.extend(stream.feed(chunk))
+    return stream, items
+
+
+def _split_at(text, *cuts):
+    bounds = [0, *cuts, len(text)]
+    return [text[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+def test_whole_payload():
+    stream, items = _feed([PAYLOAD])
+    assert items == ITEMS
+    assert stream.done
+    assert stream.errors == 0
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 16, 64])
+def test_fixed_chunk_sizes(size):
+    _, items = _feed([PAYLOAD[i:i + size] for i in range(0, len(PAYLOAD), size)])
+    assert items == ITEMS
+
+
+def test_every_two_way_split():
+    for cut in range(len(PAYLOAD) + 1):
+        _, items = _feed(_split_at(PAYLOAD, cut))
+        assert items == ITEMS, f"split at {cut}: {PAYLOAD[:cut]!r} | {PAYLOAD[cut:]!r}"
+
+
+def test_splits_inside_escapes():
+    # Cut right after each backslash, so the escaped character starts the next chunk
+    for cut in [i + 1 for i, ch in enumerate(PAYLOAD) if ch == "\\"]:
+        _, items = _feed(_split_at(PAYLOAD, cut))
+        assert items == ITEMS
+
+
+def test_items_are_emitted_as_soon_as_complete():
+    stream = JSONArrayStream()
+    first = json.dumps(ITEMS[0])
+    assert stream.feed("[" + first[:-1]) == []
+    assert stream.feed(first[-1] + ", {") == [ITEMS[0]]
+    assert stream.feed('"day": 2}') == [{"day": 2}]
+    assert not stream.done
+
+
+def test_prose_and_fences_are_skipped():
+    text = "Sure! Here is your plan:\n```json\n" + PAYLOAD + "\n```\nEnjoy the trip."
+    stream, items = _feed([text[i:i + 5] for i in range(0, len(text), 5)])
+    assert items == ITEMS
+    assert stream.done
+
+
+def test_trailing_garbage_is_ignored():
+    stream, items = _feed([PAYLOAD + ' [{"extra": true}] trailing }]', '{"more": 1}'])
+    assert items == ITEMS
+    assert stream.done
+    assert stream.feed('[{"after": "done"}]') == []
+
+
+def test_strings_between_elements_do_not_open_brackets():
+    stream, items = _feed(['["not ] an item", {"a": 1}, "{also not", ', '{"b": 2}]'])
+    assert items == [{"a": 1}, {"b": 2}]
+    assert stream.done
+
+
+def test_malformed_element_is_counted_and_skipped():
+    stream, items = _feed(['[{"a": 1}, {"b": 2,}, ', '{"c": 3}]'])
+    assert items == [{"a": 1}, {"c": 3}]
+    assert stream.errors == 1
+
+
+def test_truncated_stream_keeps_complete_items():
+    cut = PAYLOAD.index('{"day": 3')
+    stream, items = _feed([PAYLOAD[:cut + 10]])
+    assert items == ITEMS[:2]
+    assert not stream.done
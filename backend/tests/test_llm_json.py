@@ -0,0 +1,132 @@
+import json
+import asyncio
+import httpx
+import pytest
+from app.models.gemini_models import FlightPick, HotelNote
+from app.services import gemini_service
+from app.services.resilience import Upstream
+from app.utils.llm_json import extract_json, parse_reply, parse_stats, response_schema, ReplyParseError
+
+PICK = {
+    "recommended_id": "flight2",
+    "reason": {"price": "Cheapest", "duration": "2h 5m", "airline": "IndiGo", "departure": "Morning"},
+}
+FENCED = "Here is my pick:\n```json\n" + json.dumps(PICK, indent=2) + "\n```\nHave a good flight!"
+TRUNCATED = json.dumps(PICK)[:60]
+WRONG_SHAPE = json.dumps({"recommended_id": "flight2", "reason": {"price": "Cheapest"}})
+
+
+def test_extract_json_skips_fences_and_prose():
+    assert extract_json(FENCED) == PICK
+    assert extract_json("Options {a, b} aside: " + json.dumps(PICK) + " done") == PICK
+    assert extract_json('```json\n[{"name": "Taj", "reason": "Sea view"}]\n```', many=True) == [
+        {"name": "Taj", "reason": "Sea view"}
+    ]
+
+
+def test_extract_json_rejects_truncated_reply():
+    with pytest.raises(ReplyParseError, match="no valid JSON object"):
+        extract_json(TRUNCATED)
+
+
+def test_parse_reply_reports_failing_fields():
+    with pytest.raises(ReplyParseError) as e:
+        parse_reply(WRONG_SHAPE, FlightPick)
+    assert "reason.duration" in str(e.value)
+    assert "reason.airline" in str(e.value)
+
+
+def test_response_schema_is_inlined():
+    schema = response_schema(HotelNote, many=True)
+    assert schema["type"] == "ARRAY"
+    assert schema["items"]["properties"]["name"] == {"type": "STRING"}
+    assert schema["items"]["required"] == ["name", "reason"]
+    assert "$defs" not in json.dumps(response_schema(FlightPick))
+
+
+class StubGemini:
+    """
+    Answers generateContent with `first` for the original prompt and `repair`
+    for the repair prompt; records every prompt it receives.
+    """
+
+    def __init__(self, first, repair=None):
+        self.first = first
+        self.repair = repair
+        self.prompts = []
+
+    def reply(self, payload):
+        prompt = payload["contents"][0]["parts"][0]["text"]
+        self.prompts.append(prompt)
+        text = self.repair if "could not be used" in prompt else self.first
+        return {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    """
+    Points the Gemini client at a StubGemini (set via .first/.repair).
+    """
+    stub = StubGemini(None)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(200, json=stub.reply(json.loads(request.content)))
+    ))
+    monkeypatch.setattr(gemini_service, "get_async_client", lambda: client)
+    # No hedged duplicates (they would show up as extra prompts) and a fresh breaker
+    monkeypatch.setattr(gemini_service, "gemini_upstream", Upstream("gemini-test", 5, hedge=False))
+    return stub
+
+
+def _generate(prompt, parser):
+    return asyncio.run(gemini_service.generate_gemini_json_async(prompt, FlightPick, parser=parser))
+
+
+def _cached(prompt):
+    key = gemini_service._cache_key(prompt, gemini_service.json_mode(FlightPick))
+    return gemini_service.response_cache.get(key)
+
+
+def test_fenced_reply_is_parsed_and_cached(gemini):
+    prompt = "pick a flight (fenced)"
+    gemini.first = FENCED
+
+    assert _generate(prompt, "test_fenced") == PICK
+    assert _generate(prompt, "test_fenced") == PICK
+    assert len(gemini.prompts) == 1
+    assert _cached(prompt).value == FENCED
+
+
+@pytest.mark.parametrize("first", [TRUNCATED, WRONG_SHAPE], ids=["truncated", "schema"])
+def test_bad_reply_is_repaired(gemini, first):
+    prompt = f"pick a flight (repair, {first[:20]})"
+    parser = f"test_repair_{len(first)}"
+    gemini.first, gemini.repair = first, json.dumps(PICK)
+
+    assert _generate(prompt, parser) == PICK
+
+    assert len(gemini.prompts) == 2
+    repair = gemini.prompts[1]
+    assert repair.startswith(prompt)
+    assert first in repair
+    # The unusable reply is evicted; the repaired one stays cached
+    assert _cached(prompt) is None
+    assert _cached(repair).value == json.dumps(PICK)
+    assert parse_stats()[parser] == {"attempts": 2, "failures": 1, "repaired": 1, "failure_rate": 0.5}
+
+
+def test_reply_failing_twice_is_evicted(gemini):
+    prompt = "pick a flight (fails twice)"
+    parser = "test_fail"
+    gemini.first, gemini.repair = WRONG_SHAPE, TRUNCATED
+
+    assert _generate(prompt, parser) is None
+
+    assert len(gemini.prompts) == 2
+    assert _cached(prompt) is None
+    assert _cached(gemini.prompts[1]) is None
+    assert parse_stats()[parser] == {"attempts": 2, "failures": 2, "repaired": 0, "failure_rate": 1.0}
+
+    # Nothing unusable was kept: asking again goes back to Gemini
+    gemini.first, gemini.repair = FENCED, None
+    assert _generate(prompt, parser) == PICK
+    assert len(gemini.prompts) == 3
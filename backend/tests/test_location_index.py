@@ -0,0 +1,44 @@
+import pytest
+from fastapi import HTTPException
+from app.routes.plan import _require_iata
+from app.utils.iata_lookup import get_iata_code
+from app.utils.location_index import LocationNotFound, destination_city, resolve_airport, resolve_location
+
+
+@pytest.mark.parametrize("query, iata", [
+    ("goi", "GOI"),
+    ("Bombay", "BOM"),
+    ("  Bengalūru, ", "BLR"),
+    ("Banglore", "BLR"),
+    ("New Dehli", "DEL"),
+    ("Trivandram", "TRV"),
+])
+def test_codes_names_aliases_and_typos_resolve(query, iata):
+    assert resolve_airport(query) == iata
+
+
+@pytest.mark.parametrize("query", ["xyz", "DXB", "Navi Mumbai", "Udaipur Rajasthan", "Manali", ""])
+def test_unknown_places_do_not_resolve(query):
+    with pytest.raises(LocationNotFound):
+        resolve_airport(query)
+    assert get_iata_code(query) is None
+
+
+def test_unknown_place_comes_with_suggestions():
+    with pytest.raises(LocationNotFound) as e:
+        resolve_location("Navi Mumbai")
+    assert e.value.suggestions[0].city == "Mumbai"
+    assert "Did you mean: Mumbai" in str(e.value)
+
+
+def test_destinations_without_an_airport_keep_their_name():
+    assert destination_city("Navi Mumbai") == "Navi Mumbai"
+    assert destination_city("Manali") == "Manali"
+    assert destination_city("panjim") == "Goa"
+
+
+def test_unknown_origin_is_a_422():
+    with pytest.raises(HTTPException) as e:
+        _require_iata("xyz", "from_")
+    assert e.value.status_code == 422
+    assert e.value.detail["field"] == "from_"
@@ -0,0 +1,132 @@
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.agents.hotel_agent import _apply_gemini_pick
+from app.routes import plan as plan_routes
+from app.routes.plan import _storable
+from app.services.metrics import track_fallbacks
+from app.services.plan_store import PlanStore, plan_store, plan_id_for, etag_for
+from app.services.serpapi_service import _parse_hotels
+from app.utils import admin
+from app.utils.responses import loads
+
+LIVE_PLAN = {"flights": [{"id": "flight0"}], "hotels": [{"id": "hotel0"}], "itinerary": [{"day": 1}]}
+REQUEST = {"from_": "DEL", "to": "Goa", "departureDate": "2026-12-01", "returnDate": "2026-12-04"}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PlanStore(path=str(tmp_path / "plans.sqlite3"), max_plans=100, max_age=3600, fresh_for=60)
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(plan_routes.router, prefix="/api")
+    return TestClient(app)
+
+
+def test_live_plan_is_storable():
+    assert _storable(LIVE_PLAN, track_fallbacks())
+
+
+def test_canned_hotels_are_not_storable():
+    fallbacks = track_fallbacks()
+    hotels = _parse_hotels({}, "Goa", "2026-12-01", "2026-12-04")
+
+    assert hotels and hotels[0].name.startswith("Fallback Hotel")
+    assert not _storable(LIVE_PLAN, fallbacks)
+
+
+def test_missing_gemini_hotel_pick_is_not_storable():
+    fallbacks = track_fallbacks()
+    _apply_gemini_pick([], None)
+
+    assert not _storable(LIVE_PLAN, fallbacks)
+
+
+def test_failed_or_empty_sections_are_not_storable():
+    assert not _storable({**LIVE_PLAN, "errors": {"flights": "timed out"}}, track_fallbacks())
+    assert not _storable({**LIVE_PLAN, "hotels": []}, track_fallbacks())
+
+
+def test_put_and_get_round_trip(store):
+    stored = store.put(REQUEST, LIVE_PLAN)
+
+    assert stored.id == plan_id_for(REQUEST)
+    assert stored.etag == etag_for(stored.body)
+    assert loads(store.get(stored.id).body) == {**LIVE_PLAN, "planId": stored.id}
+    assert store.get("missing") is None
+
+
+def test_fresh_plan_is_kept_with_its_etag(store):
+    first = store.put(REQUEST, LIVE_PLAN)
+    again = store.put(REQUEST, {**LIVE_PLAN, "itinerary": [{"day": 1}, {"day": 2}]})
+
+    assert again.etag == first.etag
+    assert again.body == first.body
+
+
+def test_stale_plan_is_replaced_but_still_readable(store, monkeypatch):
+    first = store.put(REQUEST, LIVE_PLAN)
+    later = time.time() + store.fresh_for + 1
+    monkeypatch.setattr(time, "time", lambda: later)
+
+    assert store.get(first.id, fresh_only=True) is None
+    assert store.get(first.id) is not None
+    replaced = store.put(REQUEST, {**LIVE_PLAN, "hotels": [{"id": "hotel9"}]})
+    assert replaced.etag != first.etag
+
+
+def test_expire_drops_old_and_least_recently_read(store, monkeypatch):
+    ids = [store.put({**REQUEST, "to": city}, LIVE_PLAN).id for city in ("Goa", "Jaipur", "Kochi")]
+    store.max_plans = 2
+    store.get(ids[0])
+
+    assert store.expire() == 1
+    assert store.get(ids[1]) is None
+    assert store.get(ids[0]) is not None
+
+    later = time.time() + store.max_age + 1
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert store.get(ids[0]) is None
+    assert store.expire() == 1
+    assert store.stats()["plans"] == 0
+
+
+def test_get_plan_route_serves_etag_and_304(client):
+    stored = plan_store.put({**REQUEST, "to": "Udaipur"}, LIVE_PLAN)
+
+    response = client.get(f"/api/plans/{stored.id}")
+    assert response.status_code == 200
+    assert response.headers["etag"] == stored.etag
+    assert response.json()["planId"] == stored.id
+
+    assert client.get(f"/api/plans/{stored.id}", headers={"If-None-Match": stored.etag}).status_code == 304
+    projected = client.get(f"/api/plans/{stored.id}", params={"fields": "hotels"})
+    assert set(projected.json()) == {"hotels", "planId"}
+    assert projected.headers["etag"] != stored.etag
+
+
+def test_plans_are_not_listable(client):
+    assert client.get("/api/plans").status_code in (404, 405)
+
+
+def test_admin_routes_need_the_token(client, monkeypatch):
+    stored = plan_store.put({**REQUEST, "to": "Leh"}, LIVE_PLAN)
+
+    assert client.delete(f"/api/plans/{stored.id}").status_code == 403
+    assert client.post("/api/plans/expire").status_code == 403
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "s3cret")
+    assert client.delete(f"/api/plans/{stored.id}", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert plan_store.get(stored.id) is not None
+
+    assert client.delete(f"/api/plans/{stored.id}", headers={"X-Admin-Token": "s3cret"}).status_code == 204
+    assert plan_store.get(stored.id) is None
+    assert client.post("/api/plans/expire", headers={"X-Admin-Token": "s3cret"}).status_code == 200
+
+
+def test_admin_routes_are_disabled_without_a_configured_token(client, monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", None)
+    assert client.post("/api/plans/expire", headers={"X-Admin-Token": ""}).status_code == 403
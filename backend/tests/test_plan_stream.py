@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+from contextlib import aclosing
+from app.agents import trip_planner_agent
+from app.routes.plan import PlanInput
+
+PLAN = PlanInput(
+    from_="DEL", to="Goa", departureDate="2026-12-01", returnDate="2026-12-03",
+    travelClass="economy", budget="40000", travelers="2", interests=["beach"], diet="veg",
+)
+
+
+@pytest.fixture
+def stages(monkeypatch):
+    """
+    Flights answer at once; hotels hang on `stages.hotels` until it is resolved
+    or cancelled. Records which stages were cancelled.
+    """
+    class Stages:
+        cancelled = []
+        hotels = None
+
+    async def flights(*args):
+        return []
+
+    async def rank(options, *args):
+        return options
+
+    async def hotels(*args):
+        Stages.hotels = asyncio.get_running_loop().create_future()
+        try:
+            return await Stages.hotels
+        except asyncio.CancelledError:
+            Stages.cancelled.append("hotels")
+            raise
+
+    async def itinerary(*args):
+        yield {"day": 1}
+
+    monkeypatch.setattr(trip_planner_agent, "record_plan_traffic", lambda *args: None)
+    monkeypatch.setattr(trip_planner_agent, "search_flight_options_async", flights)
+    monkeypatch.setattr(trip_planner_agent, "rank_flight_options_async", rank)
+    monkeypatch.setattr(trip_planner_agent, "search_hotel_options_async", hotels)
+    monkeypatch.setattr(trip_planner_agent, "stream_daywise_itinerary", itinerary)
+    return Stages
+
+
+def test_closing_the_stream_stops_running_stages(stages):
+    async def main():
+        before = asyncio.all_tasks()
+        async with aclosing(trip_planner_agent.stream_full_plan(PLAN)) as events:
+            async for event, data in events:
+                if event == "flights_raw":
+                    break  # the client disconnects mid-plan
+        return asyncio.all_tasks() - before
+
+    assert asyncio.run(main()) == set()
+    assert stages.cancelled == ["hotels"]
+
+
+def test_shared_call_cancelled_under_a_stage_is_reported(stages):
+    async def main():
+        events = []
+        async for event, data in trip_planner_agent.stream_full_plan(PLAN):
+            events.append((event, data))
+            if stages.hotels is not None and not stages.hotels.done():
+                stages.hotels.cancel()  # e.g. the shared search's leader went away
+        return events
+
+    events = asyncio.run(main())
+    assert ("error", {"stage": "hotels", "error": "cancelled"}) in events
+    assert events[-1] == ("done", {"errors": {"hotels": "cancelled"}})
@@ -0,0 +1,44 @@
+import asyncio
+from app.services import serpapi_service, hotel_ranking_service
+from app.services.hotel_ranking_service import _build_reasons_prompt, _build_user_prefs
+from app.utils import prompt_encoding
+from app.utils.prompt_encoding import encode_table, estimate_tokens
+
+ROWS = [{"name": f"Hotel {i}", "location": "Goa", "price_per_night": 2000 + i, "rating": 4.1, "amenities": ["Pool"]}
+        for i in range(6)]
+COLUMNS = ["name", "location", "price_per_night", "rating", "amenities"]
+USER_PREFS = _build_user_prefs("Goa", "2026-12-01", "2026-12-04", {"budget_range": "40000", "travelers": 2})
+
+
+def test_encode_table_stays_under_budget():
+    table = encode_table(ROWS, COLUMNS, max_tokens=40)
+
+    assert table.splitlines()[0] == "|".join(COLUMNS)
+    assert 1 < len(table.splitlines()) < len(ROWS) + 1
+    assert estimate_tokens(table) <= 40
+
+
+def test_reasons_prompt_uses_the_hotel_ranking_budget(monkeypatch):
+    full = _build_reasons_prompt(ROWS, USER_PREFS)
+    monkeypatch.setitem(prompt_encoding.PROMPT_LIMITS, "hotel_ranking", {"top_k": 10, "max_tokens": 40})
+    trimmed = _build_reasons_prompt(ROWS, USER_PREFS)
+
+    assert "Hotel 5" in full
+    assert "Hotel 5" not in trimmed and "Hotel 0" in trimmed
+
+
+def test_empty_search_is_not_repeated(monkeypatch):
+    calls = []
+
+    async def fetch(params):
+        calls.append(params)
+        return {"properties": []}
+
+    monkeypatch.setattr(serpapi_service, "_fetch_serpapi_async", fetch)
+    monkeypatch.setattr(hotel_ranking_service, "resolve_city_from_iata", lambda code: "Nowhere Bay")
+    ranked = asyncio.run(hotel_ranking_service.get_ranked_hotels_from_iata_async(
+        "NWB", "2026-12-01", "2026-12-04", {"budget_range": "40000"},
+    ))
+
+    assert len(calls) == 1
+    assert [rec["name"] for rec in ranked] == ["Fallback Hotel 1", "Fallback Hotel 2", "Fallback Hotel 3"]
@@ -0,0 +1,102 @@
+import asyncio
+import pytest
+from app.services import serpapi_service
+from app.services.quota_scheduler import QuotaScheduler, QuotaExhausted, serpapi_priority, request_priority
+
+FLOORS = {"interactive": 0, "batch": 20, "prewarm": 50}
+WAITS = {"interactive": 5, "batch": 0.3, "prewarm": 0.3}
+
+
+def _scheduler(rate=10, burst=2):
+    return QuotaScheduler(rate=rate, burst=burst, floors=FLOORS, max_wait=WAITS)
+
+
+def test_interactive_is_never_queued_but_is_charged():
+    async def main():
+        scheduler = _scheduler(rate=1, burst=2)
+        for _ in range(6):
+            await asyncio.wait_for(scheduler.acquire("interactive"), 0.1)
+        return scheduler
+
+    scheduler = asyncio.run(main())
+    assert scheduler.granted["interactive"] == 6
+    assert scheduler.tokens <= -2 + 0.1  # debt is capped at one burst
+
+
+def test_background_waits_behind_interactive_debt():
+    async def main():
+        scheduler = _scheduler(rate=1, burst=2)
+        for _ in range(4):
+            await scheduler.acquire("interactive")
+        with pytest.raises(QuotaExhausted, match="No SerpAPI token"):
+            await scheduler.acquire("batch")
+        return scheduler
+
+    assert asyncio.run(main()).rejected["batch"] == 1
+
+
+def test_waiters_are_served_by_priority():
+    async def main():
+        scheduler = QuotaScheduler(rate=20, burst=1, floors=FLOORS, max_wait={"batch": 2, "prewarm": 2})
+        await scheduler.acquire("batch")  # empties the bucket
+        order = []
+
+        async def wait(priority, name):
+            await scheduler.acquire(priority)
+            order.append(name)
+
+        await asyncio.gather(wait("prewarm", "p1"), wait("batch", "b1"), wait("prewarm", "p2"), wait("batch", "b2"))
+        return order
+
+    assert asyncio.run(main()) == ["b1", "b2", "p1", "p2"]
+
+
+def test_quota_floors_reserve_searches_for_higher_priorities():
+    async def main():
+        scheduler = _scheduler(rate=100, burst=100)
+        scheduler.update_quota("30")
+        await scheduler.acquire("batch")
+        with pytest.raises(QuotaExhausted, match="prewarm floor"):
+            await scheduler.acquire("prewarm")
+        scheduler.update_quota(20)
+        with pytest.raises(QuotaExhausted, match="batch floor"):
+            await scheduler.acquire("batch")
+        await scheduler.acquire("interactive")
+        scheduler.update_quota(0)
+        with pytest.raises(QuotaExhausted, match="interactive floor"):
+            await scheduler.acquire("interactive")
+        return scheduler
+
+    scheduler = asyncio.run(main())
+    assert scheduler.quota_remaining == 0
+    assert scheduler.rejected == {"interactive": 1, "batch": 1, "prewarm": 1}
+
+
+def test_interactive_does_not_join_a_prewarm_fetch(monkeypatch):
+    fetched = []
+
+    async def main():
+        gate = asyncio.Event()
+
+        async def fetch(params):
+            priority = request_priority.get()
+            fetched.append(priority)
+            if priority == "prewarm":
+                await gate.wait()
+            return {"best_flights": [], "priority": priority}
+
+        monkeypatch.setattr(serpapi_service, "_fetch_serpapi_async", fetch)
+        params = serpapi_service._flight_params("PRW", "INT", "2026-12-01")
+        with serpapi_priority("prewarm"):
+            prewarm = asyncio.create_task(serpapi_service._cached_search_async(params))
+        await asyncio.sleep(0)
+
+        # The prewarm fetch is stuck (e.g. queued for a token); the user is not
+        interactive = await asyncio.wait_for(serpapi_service._cached_search_async(params), 1)
+        gate.set()
+        return interactive, await prewarm
+
+    interactive, prewarm = asyncio.run(main())
+    assert interactive["priority"] == "interactive"
+    assert prewarm["priority"] == "prewarm"
+    assert fetched == ["prewarm", "interactive"]
@@ -0,0 +1,107 @@
+import asyncio
+import pytest
+from app.services import resilience
+from app.services.resilience import Upstream, CircuitOpenError, BREAKER_MIN_CALLS, MIN_SAMPLES, OPEN_SECONDS
+
+
+class Flaky:
+    """
+    Upstream stand-in: raises `error` while set, otherwise answers after `delays` (one per attempt).
+    """
+
+    def __init__(self, error=None, delays=()):
+        self.error = error
+        self.delays = list(delays)
+        self.attempts = 0
+
+    async def __call__(self, timeout):
+        self.attempts += 1
+        attempt = self.attempts
+        if self.delays:
+            await asyncio.sleep(self.delays.pop(0))
+        if self.error:
+            raise self.error
+        return f"attempt {attempt}"
+
+
+def _call(upstream, fn):
+    return asyncio.run(upstream.call_async(fn))
+
+
+def _warm(upstream, seconds, n=MIN_SAMPLES):
+    for _ in range(n):
+        upstream.latency.record(seconds)
+
+
+def test_breaker_opens_then_probes_once():
+    upstream = Upstream("test-breaker", 5, hedge=False)
+    down = Flaky(error=ConnectionError("down"))
+
+    for _ in range(BREAKER_MIN_CALLS):
+        with pytest.raises(ConnectionError):
+            _call(upstream, down)
+    assert upstream.breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        _call(upstream, down)
+    assert down.attempts == BREAKER_MIN_CALLS  # rejected without calling out
+
+    upstream.breaker.opened_at -= OPEN_SECONDS
+    assert upstream.breaker.allow() and not upstream.breaker.allow()  # one probe at a time
+    upstream.breaker.release()
+
+    down.error = None
+    assert _call(upstream, down) == f"attempt {BREAKER_MIN_CALLS + 1}"
+    assert upstream.breaker.state == "closed"
+    assert upstream.stats()["breaker_trips"] == 1
+
+
+def test_errors_that_are_not_failures_keep_the_breaker_closed():
+    upstream = Upstream("test-not-failure", 5, hedge=False, is_failure=lambda e: not isinstance(e, LookupError))
+
+    for _ in range(BREAKER_MIN_CALLS * 2):
+        with pytest.raises(LookupError):
+            _call(upstream, Flaky(error=LookupError("no results")))
+    assert upstream.breaker.state == "closed"
+    assert upstream.stats()["failures"] == 0
+
+
+def test_timeout_adapts_to_observed_latency():
+    upstream = Upstream("test-timeout", 10, min_timeout=0.1)
+    assert upstream.timeout() == 10
+
+    _warm(upstream, 0.2)
+    assert upstream.timeout() == pytest.approx(0.2 * resilience.TIMEOUT_MULTIPLIER)
+
+    _warm(upstream, 20, n=resilience.LATENCY_WINDOW)
+    assert upstream.timeout() == 10  # never above the default
+
+
+def test_slow_call_is_hedged_and_the_duplicate_wins():
+    upstream = Upstream("test-hedge", 5)
+    _warm(upstream, 0.01)
+    slow_first = Flaky(delays=[1.0, 0.0])
+
+    assert _call(upstream, slow_first) == "attempt 2"
+    stats = upstream.stats()
+    assert (stats["hedged"], stats["hedge_wins"]) == (1, 1)
+
+
+def test_hedging_stays_within_budget():
+    upstream = Upstream("test-hedge-budget", 5)
+    _warm(upstream, 0.001)
+
+    for _ in range(20):
+        _call(upstream, Flaky(delays=[0.01, 0.01]))
+    stats = upstream.stats()
+    assert stats["calls"] == 20
+    assert stats["hedged"] <= resilience.HEDGE_BUDGET * stats["calls"] + 1
+
+
+def test_no_hedge_when_disabled():
+    upstream = Upstream("test-no-hedge", 5, hedge=False)
+    _warm(upstream, 0.001)
+    fn = Flaky(delays=[0.05])
+
+    assert _call(upstream, fn) == "attempt 1"
+    assert fn.attempts == 1
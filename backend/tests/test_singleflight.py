@@ -0,0 +1,99 @@
+import asyncio
+from app.services.singleflight import SingleFlight
+from app.services.metrics import FALLBACKS, track_fallbacks
+
+
+def test_fallbacks_reach_every_waiter():
+    flight = SingleFlight("test-fallbacks")
+    release = asyncio.Event()
+
+    async def degraded_fetch():
+        await release.wait()
+        FALLBACKS.inc(kind="test_degraded")
+        return {"hotels": []}
+
+    async def request():
+        seen = track_fallbacks()
+        result = await flight.do_async("hotels:goa", degraded_fetch)
+        return result, seen
+
+    async def main():
+        requests = [asyncio.create_task(request()) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*requests)
+
+    results = asyncio.run(main())
+
+    assert flight.stats()["coalesced"] == 2
+    assert [result for result, _ in results] == [{"hotels": []}] * 3
+    assert all(seen == {"test_degraded"} for _, seen in results)
+
+
+def test_live_result_carries_no_fallbacks():
+    flight = SingleFlight("test-live")
+
+    async def request():
+        seen = track_fallbacks()
+        return await flight.do_async("k", lambda: asyncio.sleep(0, "live")), seen
+
+    assert asyncio.run(request()) == ("live", set())
+
+
+class Upstream:
+    """
+    Counts fetches; each one waits for `release` and then returns (or raises) `answer`.
+    """
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.fetches = 0
+        self.release = None
+
+    async def fetch(self):
+        self.fetches += 1
+        await self.release.wait()
+        if isinstance(self.answer, Exception):
+            raise self.answer
+        return self.answer
+
+
+def _concurrently(flight, upstream, keys, cancel_first=False):
+    async def main():
+        upstream.release = asyncio.Event()
+        calls = [asyncio.create_task(flight.do_async(key, upstream.fetch)) for key in keys]
+        await asyncio.sleep(0)
+        if cancel_first:
+            calls[0].cancel()
+        upstream.release.set()
+        return await asyncio.gather(*calls, return_exceptions=True)
+    return asyncio.run(main())
+
+
+def test_identical_concurrent_calls_share_one_fetch():
+    flight, upstream = SingleFlight("test-share"), Upstream({"flights": [1]})
+
+    assert _concurrently(flight, upstream, ["a"] * 4 + ["b"]) == [{"flights": [1]}] * 5
+    assert upstream.fetches == 2
+    assert flight.stats() == {"calls": 5, "coalesced": 3, "in_flight": 0}
+
+    # Finished calls are not cached: the next call fetches again
+    _concurrently(flight, upstream, ["a"])
+    assert upstream.fetches == 3
+
+
+def test_errors_are_shared():
+    flight, upstream = SingleFlight("test-errors"), Upstream(ValueError("quota"))
+
+    results = _concurrently(flight, upstream, ["a"] * 3)
+    assert upstream.fetches == 1
+    assert all(isinstance(r, ValueError) and str(r) == "quota" for r in results)
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_fetch():
+    flight, upstream = SingleFlight("test-cancel"), Upstream("ok")
+
+    results = _concurrently(flight, upstream, ["a"] * 3, cancel_first=True)
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert results[1:] == ["ok", "ok"]
+    assert upstream.fetches == 1
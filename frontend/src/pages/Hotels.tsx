@@ -34,7 +34,7 @@ const Hotels = () => {
           location: hotel.location || 'City Center',
           description: hotel.description || '',
           price: parseInt(hotel.price?.toString().replace(/[^\d]/g, '') || '0'),
-          image: hotel.image || 'https://via.placeholder.com/300x200?text=Hotel',
+          image: hotel.thumbnail || hotel.image || 'https://via.placeholder.com/300x200?text=Hotel',
           aiRecommended: hotel.aiRecommended || hotel.ai_recommended || false,
           bestValue: hotel.bestValue || hotel.best_value || false,
           aiReasoning: hotel.aiReasoning || hotel.ai_reasoning || {},